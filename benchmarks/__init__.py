@@ -0,0 +1,11 @@
+"""
+Performance benchmarks of the library service.
+
+Every benchmark is a standalone script that runs against a
+throwaway test database, e.g.:
+
+    python -m benchmarks.bench_telegram_outbox
+
+`benchmarks.run` times the main API requests against a generated
+dataset and writes the results to JSON, to compare commits.
+"""
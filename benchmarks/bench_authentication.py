@@ -0,0 +1,52 @@
+"""
+Authenticate a request carrying an access token with simplejwt's
+JWTAuthentication and with CachedJWTAuthentication.
+
+    python -m benchmarks.bench_authentication --repeat 20000
+"""
+import argparse
+
+from benchmarks.utils import (
+    benchmark_database,
+    measure,
+    report,
+    setup_django
+)
+
+setup_django()
+
+from django.core.cache import cache  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+from rest_framework_simplejwt.authentication import (  # noqa: E402
+    JWTAuthentication
+)
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from users.authentication import CachedJWTAuthentication  # noqa: E402
+from users.models import User  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20000)
+    arguments = parser.parse_args()
+
+    with benchmark_database():
+        cache.clear()
+        user = User.objects.create_user(email="reader@example.com")
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+        for authentication in (JWTAuthentication, CachedJWTAuthentication):
+            backend = authentication()
+            report(
+                authentication.__name__,
+                measure(
+                    lambda: backend.authenticate(request),
+                    repeat=arguments.repeat
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
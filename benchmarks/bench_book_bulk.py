@@ -0,0 +1,81 @@
+"""
+Import a generated catalogue in chunks, import it again as updates,
+and export it, reporting rows per second and peak memory.
+
+    python -m benchmarks.bench_book_bulk --books 1000000
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.utils import benchmark_database, setup_django
+
+setup_django()
+
+from books.bulk import export_books, import_books  # noqa: E402
+
+
+def csv_lines(number, inventory):
+    yield "title,author,cover,inventory,daily_fee\n"
+    for index in range(number):
+        yield f"Book {index},Author {index % 50000},H,{inventory},1.50\n"
+
+
+def timed(name, function, rows):
+    start = time.perf_counter()
+    result = function()
+    duration = time.perf_counter() - start
+    print(f"{name:<20} {rows / duration:9.0f} rows/s")
+    return result
+
+
+def traced(name, function):
+    """Run apart from the timed runs, tracemalloc slows them down."""
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<20} peak memory {peak / 2 ** 20:7.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=1000000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    arguments = parser.parse_args()
+    number = arguments.books
+
+    with benchmark_database():
+        print(f"{number} books, chunks of {arguments.chunk_size}")
+        phases = (("import (create)", 3), ("import (update)", 5))
+        for name, inventory in phases:
+            report = timed(
+                name,
+                lambda: import_books(
+                    csv_lines(number, inventory),
+                    "csv",
+                    chunk_size=arguments.chunk_size
+                ),
+                number
+            )
+            assert report.error_count == 0, report.errors[:5]
+
+        def export():
+            for _ in export_books("csv"):
+                pass
+
+        timed("export (csv)", export, number)
+
+        traced(
+            "import (update)",
+            lambda: import_books(
+                csv_lines(number, 7),
+                "csv",
+                chunk_size=arguments.chunk_size
+            )
+        )
+        traced("export (csv)", export)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Time the book search on a large catalogue, with the FTS5 index
+and with the portable substring fallback.
+
+    python -m benchmarks.bench_book_search --books 1000000
+"""
+import argparse
+import random
+from unittest.mock import patch
+
+from benchmarks.utils import (
+    benchmark_database,
+    measure,
+    report,
+    setup_django
+)
+
+setup_django()
+
+from books.models import Book  # noqa: E402
+from books.search import rebuild_search_index, search_books  # noqa: E402
+
+BATCH_SIZE = 50000
+VOCABULARY = 20000
+AUTHORS = 50000
+REPEAT = 100
+SYLLABLES = (
+    "ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "an",
+    "bel", "cor", "dan", "est", "fen", "gar", "hol", "ith", "jor", "ler",
+)
+
+
+def words(number, randomizer):
+    vocabulary = set()
+    while len(vocabulary) < number:
+        vocabulary.add(
+            "".join(
+                randomizer.choice(SYLLABLES)
+                for _ in range(randomizer.randint(2, 4))
+            )
+        )
+    return sorted(vocabulary)
+
+
+def create_books(number):
+    randomizer = random.Random(0)
+    vocabulary = words(VOCABULARY, randomizer)
+    authors = [
+        f"{randomizer.choice(vocabulary).title()} "
+        f"{randomizer.choice(vocabulary).title()}"
+        for _ in range(AUTHORS)
+    ]
+    for start in range(0, number, BATCH_SIZE):
+        Book.objects.bulk_create(
+            Book(
+                title=" ".join(
+                    randomizer.choice(vocabulary)
+                    for _ in range(randomizer.randint(2, 6))
+                ).capitalize(),
+                author=randomizer.choice(authors),
+                cover=randomizer.choice("HS"),
+                inventory=randomizer.randint(0, 5),
+                daily_fee=f"{randomizer.randint(50, 500) / 100:.2f}"
+            )
+            for _ in range(start, min(start + BATCH_SIZE, number))
+        )
+    rebuild_search_index()
+    return vocabulary
+
+
+def searches(vocabulary):
+    randomizer = random.Random(1)
+
+    def word():
+        return randomizer.choice(vocabulary)
+
+    return (
+        ("one word", lambda: search_books(word())),
+        ("prefix of a word", lambda: search_books(word()[:5])),
+        ("three-letter prefix", lambda: search_books(word()[:3])),
+        ("two letters", lambda: search_books(word()[:2])),
+        ("two words", lambda: search_books(f"{word()} {word()[:4]}")),
+        (
+            "prefix of a word, filtered",
+            lambda: search_books(
+                word()[:5],
+                cover="H",
+                min_fee="1.00",
+                max_fee="3.00",
+                available=True
+            )
+        ),
+        (
+            "one word, filtered",
+            lambda: search_books(
+                word(),
+                cover="H",
+                min_fee="1.00",
+                max_fee="3.00",
+                available=True
+            )
+        ),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=1000000)
+    arguments = parser.parse_args()
+
+    with benchmark_database():
+        vocabulary = create_books(arguments.books)
+        print(f"{arguments.books} books")
+
+        print("FTS5 index:")
+        for name, function in searches(vocabulary):
+            report(name, measure(function, REPEAT))
+
+        print("Substring fallback:")
+        with patch("books.search.search_index_supported", return_value=False):
+            for name, function in searches(vocabulary):
+                report(name, measure(function, 5))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Time the frequent borrowing and payment lookups on a large
+table with the indexes of the borrowings app, and again
+after dropping them.
+
+    python -m benchmarks.bench_borrowing_indexes --borrowings 1000000
+"""
+import argparse
+import datetime
+import random
+
+from benchmarks.utils import (
+    benchmark_database,
+    measure,
+    report,
+    setup_django
+)
+
+setup_django()
+
+from django.db import connection  # noqa: E402
+
+from books.models import Book  # noqa: E402
+from borrowings.models import Borrowing  # noqa: E402
+from borrowings.tasks import overdue_borrowings_queryset  # noqa: E402
+from payments.models import Payment  # noqa: E402
+from users.models import User  # noqa: E402
+
+USERS = 10000
+BOOKS = 10000
+BATCH_SIZE = 20000
+REPEAT = 50
+
+
+def create_borrowings(number):
+    """
+    Nine in ten borrowings are returned, the
+    active ones are due within a month either way.
+    """
+    users = User.objects.bulk_create(
+        User(email=f"user-{index}@example.com")
+        for index in range(USERS)
+    )
+    books = Book.objects.bulk_create(
+        Book(
+            title=f"Book {index}",
+            author=f"Author {index}",
+            cover="H",
+            inventory=10,
+            daily_fee="1.50"
+        )
+        for index in range(BOOKS)
+    )
+    today = datetime.date.today()
+    randomizer = random.Random(0)
+    for start in range(0, number, BATCH_SIZE):
+        borrowings = Borrowing.objects.bulk_create(
+            Borrowing(
+                user=users[randomizer.randrange(USERS)],
+                book=books[randomizer.randrange(BOOKS)],
+                expected_return_date=today + datetime.timedelta(
+                    days=randomizer.randint(-30, 30)
+                ),
+                actual_return_date=(
+                    None if randomizer.random() < 0.1 else today
+                )
+            )
+            for _ in range(start, min(start + BATCH_SIZE, number))
+        )
+        Payment.objects.bulk_create(
+            Payment(
+                status=Payment.Status.PAID,
+                type=Payment.Type.PAYMENT,
+                borrowing=borrowing,
+                session_url="https://checkout.stripe.com/",
+                session_id=f"cs_{borrowing.id}",
+                money_to_pay="3.00"
+            )
+            for borrowing in borrowings
+        )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return users
+
+
+def lookups(users, borrowings):
+    randomizer = random.Random(1)
+    today = datetime.date.today()
+
+    def user_active_borrowings():
+        user = users[randomizer.randrange(len(users))]
+        list(Borrowing.objects.filter(user=user, actual_return_date=None))
+
+    def overdue_report():
+        for _ in overdue_borrowings_queryset(today).iterator(chunk_size=2000):
+            pass
+
+    def payment_by_session_id():
+        Payment.objects.get(
+            session_id=f"cs_{randomizer.randint(1, borrowings)}"
+        )
+
+    return (
+        ("active borrowings of a user", user_active_borrowings, REPEAT),
+        ("overdue report (full read)", overdue_report, 3),
+        ("payment by session id", payment_by_session_id, REPEAT),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--borrowings", type=int, default=1000000)
+    arguments = parser.parse_args()
+
+    with benchmark_database():
+        users = create_borrowings(arguments.borrowings)
+        print(f"{arguments.borrowings} borrowings and payments")
+
+        print("With indexes:")
+        for name, function, repeat in lookups(users, arguments.borrowings):
+            report(name, measure(function, repeat))
+
+        with connection.cursor() as cursor:
+            cursor.execute("DROP INDEX borrowing_user_returned_idx")
+            cursor.execute("DROP INDEX borrowing_active_due_idx")
+            cursor.execute("ANALYZE")
+        print("Without the borrowing indexes (the user_id index is kept):")
+        for name, function, repeat in lookups(users, arguments.borrowings)[:2]:
+            report(name, measure(function, repeat))
+
+
+if __name__ == "__main__":
+    main()
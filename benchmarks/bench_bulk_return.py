@@ -0,0 +1,132 @@
+"""
+Return borrowings at the front desk one at a time through the
+return endpoint, and many at once through the bulk return endpoint.
+
+    python -m benchmarks.bench_bulk_return --returns 1000 --repeat 10
+"""
+import argparse
+import datetime
+from decimal import Decimal
+
+from benchmarks.utils import (
+    benchmark_database,
+    measure,
+    report,
+    setup_django
+)
+
+setup_django()
+
+from django.test import override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from books.models import Book  # noqa: E402
+from borrowings.models import Borrowing  # noqa: E402
+from payments.models import Payment  # noqa: E402
+from users.models import User  # noqa: E402
+
+BULK_RETURN_URL = reverse("borrowings:borrowing-bulk-return")
+# The single returns are timed on a sample and reported per call.
+SINGLE_SAMPLE = 100
+
+
+def create_borrowings(user, books, number, round_number):
+    """Paid borrowings, a tenth of them overdue."""
+    today = datetime.date.today()
+    borrowings = Borrowing.objects.bulk_create(
+        Borrowing(
+            user=user,
+            book=books[index % len(books)],
+            expected_return_date=(
+                today - datetime.timedelta(days=1) if index % 10 == 0
+                else today + datetime.timedelta(days=7)
+            )
+        )
+        for index in range(number)
+    )
+    Payment.objects.bulk_create(
+        Payment(
+            status=Payment.Status.PAID,
+            type=Payment.Type.PAYMENT,
+            borrowing=borrowing,
+            session_url="https://checkout.stripe.com/paid",
+            session_id=f"cs_{round_number}_{borrowing.id}",
+            money_to_pay=borrowing.calculate_borrowing_price()
+        )
+        for borrowing in borrowings
+    )
+    return [borrowing.id for borrowing in borrowings]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--returns", type=int, default=1000)
+    parser.add_argument("--books", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=10)
+    arguments = parser.parse_args()
+
+    with benchmark_database(), override_settings(PAYMENT_GATEWAY="fake"):
+        user = User.objects.create_user(email="reader@example.com")
+        client = APIClient()
+        client.force_authenticate(
+            user=User.objects.create_superuser(
+                email="desk@example.com", password="desk"
+            )
+        )
+        books = Book.objects.bulk_create(
+            Book(
+                title=f"Book {index}",
+                author=f"Author {index}",
+                cover="H",
+                inventory=10,
+                daily_fee=Decimal("1.50")
+            )
+            for index in range(arguments.books)
+        )
+        rounds = iter(range(arguments.repeat * 2 + 1))
+
+        ids = create_borrowings(
+            user, books, SINGLE_SAMPLE, next(rounds)
+        )
+        calls = iter(ids)
+        report(
+            "return, one call per borrowing",
+            measure(
+                lambda: client.post(
+                    reverse(
+                        "borrowings:borrowing-return-borrowing",
+                        args=[next(calls)]
+                    )
+                ),
+                repeat=len(ids)
+            )
+        )
+
+        batches = [
+            create_borrowings(user, books, arguments.returns, next(rounds))
+            for _ in range(arguments.repeat)
+        ]
+        batch_ids = iter(batches)
+        report(
+            f"bulk return of {arguments.returns}",
+            measure(
+                lambda: client.post(
+                    BULK_RETURN_URL,
+                    {"ids": next(batch_ids)},
+                    format="json"
+                ),
+                repeat=arguments.repeat
+            )
+        )
+        returned = Borrowing.objects.filter(
+            id__in=[id_ for batch in batches for id_ in batch],
+            actual_return_date__isnull=False
+        ).count()
+        assert returned == arguments.repeat * arguments.returns * 9 // 10, (
+            returned
+        )
+
+
+if __name__ == "__main__":
+    main()
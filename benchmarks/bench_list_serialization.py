@@ -0,0 +1,157 @@
+"""
+Compare the serializer and the `.values()` paths of the borrowing
+and payment lists: per-row cost of reading and rendering every row,
+and requests per second of the list endpoints.
+
+    python -m benchmarks.bench_list_serialization --rows 50000
+"""
+import argparse
+import datetime
+import statistics
+
+from benchmarks.utils import benchmark_database, measure, setup_django
+
+setup_django()
+
+from django.test import override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from books.models import Book  # noqa: E402
+from borrowings.fast_serializers import (  # noqa: E402
+    BORROWING_LIST_VALUES,
+    serialize_borrowings
+)
+from borrowings.models import Borrowing  # noqa: E402
+from borrowings.serializers import ReadBorrowingSerializer  # noqa: E402
+from borrowings.views import BorrowingViewSet  # noqa: E402
+from payments.fast_serializers import (  # noqa: E402
+    PAYMENT_LIST_VALUES,
+    serialize_payments
+)
+from payments.models import Payment  # noqa: E402
+from payments.serializers import PaymentListSerializer  # noqa: E402
+from payments.views import PaymentViewSet  # noqa: E402
+from users.models import User  # noqa: E402
+
+BOOKS = 1000
+BATCH_SIZE = 10000
+PAGE_SIZE = 1000
+REQUESTS = 20
+
+
+def create_rows(number):
+    user = User.objects.create_superuser(
+        email="admin@example.com",
+        password="benchmark"
+    )
+    books = Book.objects.bulk_create(
+        Book(
+            title=f"Book {index}",
+            author=f"Author {index}",
+            cover="HS"[index % 2],
+            inventory=10,
+            daily_fee="1.50"
+        )
+        for index in range(BOOKS)
+    )
+    today = datetime.date.today()
+    for start in range(0, number, BATCH_SIZE):
+        borrowings = Borrowing.objects.bulk_create(
+            Borrowing(
+                user=user,
+                book=books[index % BOOKS],
+                expected_return_date=today,
+                actual_return_date=today if index % 2 else None
+            )
+            for index in range(start, min(start + BATCH_SIZE, number))
+        )
+        Payment.objects.bulk_create(
+            Payment(
+                status=Payment.Status.PAID,
+                type=Payment.Type.PAYMENT,
+                borrowing=borrowing,
+                session_url="https://checkout.stripe.com/",
+                session_id=f"cs_{borrowing.id}",
+                money_to_pay="3.00"
+            )
+            for borrowing in borrowings
+        )
+    return user
+
+
+def per_row(name, function, rows):
+    duration = min(measure(function, 3))
+    print(f"{name:<40} {duration / rows * 1e6:9.2f} µs per row")
+
+
+def requests_per_second(name, client, url):
+    durations = measure(
+        lambda: client.get(url, {"page_size": PAGE_SIZE}),
+        REQUESTS
+    )
+    print(
+        f"{name:<40} {1 / statistics.mean(durations):9.1f} requests/s "
+        f"({PAGE_SIZE} rows per page)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    arguments = parser.parse_args()
+
+    with benchmark_database():
+        user = create_rows(arguments.rows)
+        print(f"{arguments.rows} borrowings and payments")
+
+        borrowings = BorrowingViewSet.queryset
+        per_row(
+            "borrowings, serializer",
+            lambda: ReadBorrowingSerializer(
+                borrowings.all(), many=True
+            ).data,
+            arguments.rows
+        )
+        per_row(
+            "borrowings, values",
+            lambda: serialize_borrowings(
+                Borrowing.objects.values(*BORROWING_LIST_VALUES)
+            ),
+            arguments.rows
+        )
+        payments = PaymentViewSet.queryset
+        per_row(
+            "payments, serializer",
+            lambda: PaymentListSerializer(
+                payments.all(), many=True
+            ).data,
+            arguments.rows
+        )
+        per_row(
+            "payments, values",
+            lambda: serialize_payments(
+                Payment.objects.values(*PAYMENT_LIST_VALUES)
+            ),
+            arguments.rows
+        )
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+        for fast in (False, True):
+            path = "values" if fast else "serializer"
+            with override_settings(FAST_LIST_SERIALIZATION=fast):
+                requests_per_second(
+                    f"GET borrowings, {path}",
+                    client,
+                    reverse("borrowings:borrowing-list")
+                )
+                requests_per_second(
+                    f"GET payments, {path}",
+                    client,
+                    reverse("payments:payment-list")
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Memory and request count of the daily overdue report for a
+large number of synthetic overdue borrowings: the previous
+materialising implementation versus the streaming task.
+
+    python -m benchmarks.bench_overdue_report --borrowings 100000
+"""
+import argparse
+import datetime
+import time
+import tracemalloc
+
+from benchmarks.utils import benchmark_database, setup_django
+
+setup_django()
+
+from django.test import override_settings  # noqa: E402
+
+from books.models import Book  # noqa: E402
+from borrowings.models import Borrowing  # noqa: E402
+from borrowings.tasks import send_overdue_borrowings  # noqa: E402
+from borrowings.tests.help_test_functions.telegram_stub import (  # noqa: E402
+    TelegramStub
+)
+from users.models import User  # noqa: E402
+
+
+def create_overdue_borrowings(number):
+    users = User.objects.bulk_create(
+        User(email=f"user-{index}@example.com", first_name="John")
+        for index in range(1000)
+    )
+    books = Book.objects.bulk_create(
+        Book(
+            title=f"Book {index}",
+            author=f"Author {index}",
+            cover="H" if index % 2 else "S",
+            inventory=10,
+            daily_fee="1.50"
+        )
+        for index in range(1000)
+    )
+    expected_return_date = datetime.date.today() - datetime.timedelta(days=3)
+    Borrowing.objects.bulk_create(
+        (
+            Borrowing(
+                user=users[index % len(users)],
+                book=books[index % len(books)],
+                expected_return_date=expected_return_date
+            )
+            for index in range(number)
+        ),
+        batch_size=5000
+    )
+
+
+def materialised_report():
+    """The report as it was built before streaming."""
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    overdue_borrowings = Borrowing.is_active.filter(
+        expected_return_date__lte=tomorrow,
+    ).prefetch_related("user", "book")
+    messages = ["Overdue borrowings"]
+    for borrowing in overdue_borrowings:
+        book = borrowing.book
+        user = borrowing.user
+        time_difference = (
+            borrowing.expected_return_date - borrowing.borrow_date
+        ).days + 1
+        messages.append(
+            f"Borrowing ID: {borrowing.id},\n\n"
+            f"borrower id: {borrowing.user_id}\n"
+            f"borrower email: {user.email},\n"
+            f"Title: {book.title},\n"
+            f"Author: {book.author},\n"
+            f"Cover: {book.get_cover_display()}\n\n"
+            f"The total price is: {book.daily_fee * time_difference}$"
+        )
+    return len(messages)
+
+
+def profile(function):
+    """
+    Time the function, then run it again under tracemalloc,
+    which slows it down too much for timing, to get the peak
+    of allocated memory.
+    """
+    start = time.perf_counter()
+    result = function()
+    duration = time.perf_counter() - start
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, duration, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--borrowings", type=int, default=100000)
+    arguments = parser.parse_args()
+
+    with benchmark_database(), TelegramStub(
+        record_messages=False
+    ) as stub:
+        create_overdue_borrowings(arguments.borrowings)
+        print(f"{arguments.borrowings} overdue borrowings")
+
+        requests, duration, peak = profile(materialised_report)
+        print(
+            f"{'materialised (messages not sent)':<34} "
+            f"{duration:7.2f} s  peak {peak:8.1f} MiB  "
+            f"{requests:7} requests"
+        )
+
+        with override_settings(TELEGRAM_API_URL=stub.url):
+            requests, duration, peak = profile(send_overdue_borrowings)
+        print(
+            f"{'streaming (messages sent)':<34} "
+            f"{duration:7.2f} s  peak {peak:8.1f} MiB  "
+            f"{requests:7} requests"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Run the borrow -> pay -> return flow through the API against the
+fake payment gateway and report, per step, the request time and the
+part of it spent waiting for the gateway.
+
+    python -m benchmarks.bench_payment_flow --rounds 200 --latency 0.05
+"""
+import argparse
+import datetime
+import json
+import re
+import time
+
+from benchmarks.utils import benchmark_database, report, setup_django
+
+setup_django()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from books.models import Book  # noqa: E402
+from payments.events import process_pending_events  # noqa: E402
+from payments.gateways import get_gateway  # noqa: E402
+from payments.models import Payment  # noqa: E402
+
+GATEWAY_DURATION = re.compile(r"gateway;dur=([\d.]+)")
+STEPS = ("borrow", "webhook", "success", "return")
+
+
+def gateway_seconds(response):
+    match = GATEWAY_DURATION.search(response.get("Server-Timing", ""))
+    return float(match.group(1)) / 1000 if match else 0.0
+
+
+def timed(client_call, *args, **kwargs):
+    start = time.perf_counter()
+    response = client_call(*args, **kwargs)
+    duration = time.perf_counter() - start
+    assert response.status_code < 400, response
+    return duration, gateway_seconds(response)
+
+
+def run_flow(client, book, timings):
+    today = datetime.date.today()
+    borrow = timed(
+        client.post,
+        reverse("borrowings:borrowing-list"),
+        {
+            "book": book.id,
+            "expected_return_date": today + datetime.timedelta(days=1),
+        }
+    )
+    payment = Payment.objects.latest("id")
+    session = get_gateway().pay(payment.session_id)
+    payload = json.dumps(
+        {
+            "id": f"evt_{session.id}",
+            "type": "checkout.session.completed",
+            "data": {"object": session._asdict()},
+        }
+    ).encode()
+    webhook = timed(
+        client.post,
+        reverse("stripe-webhook"),
+        payload,
+        content_type="application/json",
+        HTTP_STRIPE_SIGNATURE=get_gateway().sign(payload)
+    )
+    process_pending_events()
+    success = timed(
+        client.get,
+        reverse("payments:success"),
+        {"session_id": payment.session_id}
+    )
+    returned = timed(
+        client.post,
+        reverse(
+            "borrowings:borrowing-return-borrowing",
+            args=[payment.borrowing_id]
+        )
+    )
+    for step, (duration, gateway) in zip(
+            STEPS, (borrow, webhook, success, returned)
+    ):
+        timings[step][0].append(duration)
+        timings[step][1].append(gateway)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    arguments = parser.parse_args()
+
+    with benchmark_database(), override_settings(
+            PAYMENT_GATEWAY="fake",
+            FAKE_GATEWAY_LATENCY=arguments.latency,
+            ALLOWED_HOSTS=["testserver"]
+    ):
+        client = APIClient()
+        client.force_authenticate(
+            user=get_user_model().objects.create_user(
+                email="benchmark@example.com",
+                password="benchmark"
+            )
+        )
+        book = Book.objects.create(
+            title="Dune",
+            author="Frank Herbert",
+            cover="H",
+            inventory=10,
+            daily_fee="1.99"
+        )
+        timings = {step: ([], []) for step in STEPS}
+        for _ in range(arguments.rounds):
+            run_flow(client, book, timings)
+
+        print(
+            f"{arguments.rounds} rounds, "
+            f"gateway latency {arguments.latency * 1000:.0f} ms"
+        )
+        for step in STEPS:
+            durations, gateway = timings[step]
+            report(f"{step} (request)", durations)
+            report(f"{step} (gateway)", gateway)
+            print(
+                f"{step:<40} "
+                f"{sum(gateway) / sum(durations):6.1%} of the time "
+                f"in the gateway"
+            )
+
+
+if __name__ == "__main__":
+    main()
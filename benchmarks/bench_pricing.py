@@ -0,0 +1,222 @@
+"""
+Compute the price and the fine of every borrowing with the per-row
+model methods and with the `with_prices()` annotations, with the
+default fine policy or, with `--tiered`, a policy with grace days,
+tiers, a daily cap, a cover multiplier and a max fine.
+
+    python -m benchmarks.bench_pricing --borrowings 1000000 --tiered
+"""
+import argparse
+import datetime
+import time
+from decimal import Decimal
+
+from benchmarks.utils import benchmark_database, setup_django
+
+setup_django()
+
+from django.db.models import Sum  # noqa: E402
+
+from books.models import Book  # noqa: E402
+from borrowings.fines import get_fine_policy  # noqa: E402
+from borrowings.models import (  # noqa: E402
+    Borrowing,
+    FineCoverMultiplier,
+    FinePolicy,
+    FineTier
+)
+from borrowings.pricing import overdue_days  # noqa: E402
+from users.models import User  # noqa: E402
+
+BATCH_SIZE = 50000
+CHUNK_SIZE = 2000
+# The lazy `self.book` loads cost one query per borrowing,
+# so that variant is timed on a sample and reported per row.
+LAZY_SAMPLE = 20000
+
+
+def create_borrowings(number):
+    users = User.objects.bulk_create(
+        User(email=f"user-{index}@example.com")
+        for index in range(1000)
+    )
+    books = Book.objects.bulk_create(
+        Book(
+            title=f"Book {index}",
+            author=f"Author {index}",
+            cover="HS"[index % 2],
+            inventory=10,
+            daily_fee=f"{0.5 + index % 40 / 8:.2f}"
+        )
+        for index in range(1000)
+    )
+    today = datetime.date.today()
+    for start in range(0, number, BATCH_SIZE):
+        Borrowing.objects.bulk_create(
+            Borrowing(
+                user=users[index % len(users)],
+                book=books[index % len(books)],
+                expected_return_date=(
+                    today + datetime.timedelta(days=index % 60 - 30)
+                )
+            )
+            for index in range(start, min(start + BATCH_SIZE, number))
+        )
+
+
+def create_tiered_policy():
+    policy = FinePolicy.objects.create(
+        name="Tiered",
+        is_active=True,
+        grace_days=2,
+        max_fine=Decimal("60.00")
+    )
+    FineTier.objects.bulk_create([
+        FineTier(policy=policy, first_day=1, multiplier=Decimal("1.50")),
+        FineTier(
+            policy=policy,
+            first_day=8,
+            multiplier=Decimal("3.00"),
+            daily_cap=Decimal("10.00")
+        ),
+    ])
+    FineCoverMultiplier.objects.create(
+        policy=policy,
+        cover=Book.Cover.SOFT,
+        multiplier=Decimal("0.75")
+    )
+
+
+def lazy_methods(as_of, limit):
+    prices = fines = Decimal(0)
+    for borrowing in Borrowing.objects.all()[:limit].iterator(
+            chunk_size=CHUNK_SIZE
+    ):
+        prices += borrowing.calculate_borrowing_price()
+        fines += borrowing.calculate_fine_price(as_of)
+    return prices, fines
+
+
+def methods(as_of):
+    prices = fines = Decimal(0)
+    for borrowing in Borrowing.objects.select_related("book").iterator(
+            chunk_size=CHUNK_SIZE
+    ):
+        prices += borrowing.calculate_borrowing_price()
+        fines += borrowing.calculate_fine_price(as_of)
+    return prices, fines
+
+
+def annotations(as_of):
+    prices = fines = Decimal(0)
+    for price, fine in Borrowing.objects.with_prices(
+            as_of=as_of
+    ).values_list(
+        "borrowing_price", "fine_price"
+    ).iterator(
+        chunk_size=CHUNK_SIZE
+    ):
+        prices += price
+        fines += fine
+    return prices, fines
+
+
+def aggregate(as_of):
+    totals = Borrowing.objects.with_prices(as_of=as_of).aggregate(
+        prices=Sum("borrowing_price"),
+        fines=Sum("fine_price")
+    )
+    return totals["prices"], totals["fines"]
+
+
+def aggregate_fines(as_of):
+    return Borrowing.objects.with_prices(as_of=as_of).aggregate(
+        fines=Sum("fine_price")
+    )["fines"]
+
+
+def policy_rows(as_of):
+    return [
+        (daily_fee, cover, overdue_days(expected_return_date, as_of))
+        for daily_fee, cover, expected_return_date
+        in Borrowing.objects.values_list(
+            "book__daily_fee", "book__cover", "expected_return_date"
+        ).iterator(chunk_size=CHUNK_SIZE)
+    ]
+
+
+def evaluate_policy(rows):
+    evaluate = get_fine_policy().evaluate
+    return sum(
+        evaluate(daily_fee, cover, days)
+        for daily_fee, cover, days in rows
+    )
+
+
+def timed(name, function, rows):
+    start = time.perf_counter()
+    result = function()
+    duration = time.perf_counter() - start
+    print(
+        f"{name:<34} {duration:8.2f} s  "
+        f"{duration / rows * 1e6:8.2f} µs/row"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--borrowings", type=int, default=1000000)
+    parser.add_argument("--tiered", action="store_true")
+    arguments = parser.parse_args()
+    number = arguments.borrowings
+    as_of = datetime.date.today()
+
+    with benchmark_database():
+        create_borrowings(number)
+        if arguments.tiered:
+            create_tiered_policy()
+        print(f"{number} borrowings")
+
+        sample = min(LAZY_SAMPLE, number)
+        timed(
+            f"methods, lazy book ({sample} rows)",
+            lambda: lazy_methods(as_of, sample),
+            sample
+        )
+        expected = timed(
+            "methods, select_related",
+            lambda: methods(as_of),
+            number
+        )
+        result = timed(
+            "with_prices(), values_list",
+            lambda: annotations(as_of),
+            number
+        )
+        assert result == expected, (result, expected)
+        prices, fines = timed(
+            "with_prices(), Sum()",
+            lambda: aggregate(as_of),
+            number
+        )
+        assert abs(prices - expected[0]) < 1, (prices, expected[0])
+        assert abs(fines - expected[1]) < 1, (fines, expected[1])
+        fines = timed(
+            "with_prices(), Sum() of fines",
+            lambda: aggregate_fines(as_of),
+            number
+        )
+        assert fines == expected[1], (fines, expected[1])
+
+        rows = policy_rows(as_of)
+        fines = timed(
+            "compiled policy, evaluate()",
+            lambda: evaluate_policy(rows),
+            number
+        )
+        assert fines == expected[1], (fines, expected[1])
+
+
+if __name__ == "__main__":
+    main()
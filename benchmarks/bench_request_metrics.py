@@ -0,0 +1,89 @@
+"""
+Overhead of RequestMetricsMiddleware on the books list endpoint:
+the same requests are sent through the middleware stack with and
+without it, in rounds of alternating order so both see the same
+drift.
+
+    python -m benchmarks.bench_request_metrics --requests 20000
+"""
+import argparse
+
+from benchmarks.utils import (
+    benchmark_database,
+    measure,
+    percentile,
+    report,
+    setup_django
+)
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from books.models import Book  # noqa: E402
+
+BOOK_LIST_URL = reverse("books:book-list")
+METRICS_MIDDLEWARE = (
+    "library_service_project.middleware.RequestMetricsMiddleware"
+)
+ROUNDS = 20
+
+
+def client(middleware):
+    """
+    A client whose handler has loaded the middleware,
+    which it keeps for its later requests.
+    """
+    api_client = APIClient()
+    with override_settings(MIDDLEWARE=middleware):
+        api_client.get(BOOK_LIST_URL)
+    return api_client
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--books", type=int, default=100)
+    arguments = parser.parse_args()
+    per_round = arguments.requests // ROUNDS
+
+    with benchmark_database():
+        Book.objects.bulk_create(
+            Book(
+                title=f"Book {index}",
+                author=f"Author {index}",
+                cover="H",
+                inventory=10,
+                daily_fee="1.50"
+            )
+            for index in range(arguments.books)
+        )
+        clients = {
+            "without metrics": client([
+                name for name in settings.MIDDLEWARE
+                if name != METRICS_MIDDLEWARE
+            ]),
+            "with metrics": client(settings.MIDDLEWARE),
+        }
+        durations = {name: [] for name in clients}
+        order = list(clients)
+        for _ in range(ROUNDS):
+            for name in order:
+                durations[name] += measure(
+                    lambda: clients[name].get(BOOK_LIST_URL),
+                    repeat=per_round
+                )
+            order.reverse()
+
+        for name, values in durations.items():
+            report(f"books list, {name}", values)
+        base = percentile(durations["without metrics"], 50)
+        measured = percentile(durations["with metrics"], 50)
+        print(f"overhead at p50: {(measured - base) / base * 100:.2f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Latency of a borrowing write with a slow Telegram API:
+the old synchronous notification versus the outbox.
+
+    python -m benchmarks.bench_telegram_outbox
+"""
+import datetime
+
+from benchmarks.utils import (
+    benchmark_database,
+    measure,
+    report,
+    setup_django
+)
+
+setup_django()
+
+from django.db import transaction  # noqa: E402
+from django.test import override_settings  # noqa: E402
+
+from books.models import Book  # noqa: E402
+from borrowings.models import Borrowing  # noqa: E402
+from borrowings.tasks import send_telegram_outbox  # noqa: E402
+from borrowings.telegram_notification import send_to_telegram  # noqa: E402
+from borrowings.tests.help_test_functions.telegram_stub import (  # noqa: E402
+    TelegramStub
+)
+from users.models import User  # noqa: E402
+
+TELEGRAM_DELAY = 0.2
+REPEAT = 20
+
+
+def main():
+    with benchmark_database(), TelegramStub(delay=TELEGRAM_DELAY) as stub:
+        with override_settings(
+            TELEGRAM_API_URL=stub.url,
+            TELEGRAM_CHAT_MIN_INTERVAL=0
+        ):
+            user = User.objects.create(email="benchmark@example.com")
+            book = Book.objects.create(
+                title="Benchmark",
+                author="Benchmark",
+                cover="H",
+                inventory=REPEAT,
+                daily_fee="1.00"
+            )
+            due = datetime.date.today() + datetime.timedelta(days=7)
+
+            @transaction.atomic
+            def create_borrowing():
+                return Borrowing.objects.create(
+                    user=user,
+                    book=book,
+                    expected_return_date=due
+                )
+
+            @transaction.atomic
+            def create_borrowing_synchronous_notification():
+                borrowing = create_borrowing()
+                send_to_telegram(f"The borrowing #{borrowing.id} is created")
+
+            print(f"Telegram API latency: {TELEGRAM_DELAY * 1000:.0f} ms")
+            report(
+                "synchronous notification",
+                measure(create_borrowing_synchronous_notification, REPEAT)
+            )
+            report("outbox", measure(create_borrowing, REPEAT))
+            report("outbox drain (worker)", measure(send_telegram_outbox))
+            print(f"Telegram requests from the drain: {len(stub.messages) - REPEAT}")
+
+
+if __name__ == "__main__":
+    main()
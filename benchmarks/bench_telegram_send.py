@@ -0,0 +1,125 @@
+"""
+Telegram notifications against a local stub API with a fixed
+latency: a new connection per message (the old `requests.post`)
+and the pooled notifier, without rate limits, then the overdue
+digest of `--borrowings` borrowings packed into messages and sent
+with the real rate limits of the settings. One chat takes a message
+per TELEGRAM_CHAT_MIN_INTERVAL, so only the first `--sample` packs
+are sent and the time of the whole digest is projected from them.
+
+    python -m benchmarks.bench_telegram_send --borrowings 10000
+"""
+import argparse
+import time
+
+from benchmarks.utils import measure, setup_django
+
+setup_django()
+
+import requests  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from borrowings.telegram_notification import (  # noqa: E402
+    RateLimiter,
+    TelegramNotifier,
+    pack_messages
+)
+from borrowings.tests.help_test_functions.telegram_stub import (  # noqa: E402
+    TelegramStub
+)
+
+
+def overdue_message(number):
+    """A message of the length of an overdue borrowing's."""
+    return (
+        f"Borrowing ID: {number},\n\n"
+        f"Borrower information:\n"
+        f"borrower id: {number % 1000}\n"
+        f"borrower email: reader-{number % 1000}@example.com,\n"
+        f"borrower first name: not specified\n"
+        f"borrower last name: not specified\n\n"
+        f"Book:\n"
+        f"Title: Book {number % 500},\n"
+        f"Author: Author {number % 500},\n"
+        f"Cover: Hard\n\n"
+        f"The total price is: 10.50$"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--borrowings", type=int, default=10000)
+    parser.add_argument("--sample", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.01)
+    arguments = parser.parse_args()
+    messages = [
+        f"Overdue borrowing #{number}"
+        for number in range(arguments.messages)
+    ]
+
+    with TelegramStub(delay=arguments.latency) as stub:
+        api_url = f"{stub.url}/bottoken/sendMessage"
+
+        def notifier(rate_limiter):
+            return TelegramNotifier(
+                api_url=stub.url,
+                api_token="token",
+                chat_id="42",
+                rate_limiter=rate_limiter
+            )
+
+        unlimited = notifier(RateLimiter(chat_interval=0, per_second=10 ** 6))
+
+        def new_connection_per_message():
+            for message in messages:
+                requests.post(
+                    api_url,
+                    json={"chat_id": "42", "text": message}
+                )
+
+        def pooled():
+            unlimited.send_in_order(messages)
+
+        print(
+            f"{arguments.messages} messages, "
+            f"API latency {arguments.latency * 1000:.0f} ms, "
+            f"no rate limits"
+        )
+        for name, function in (
+            ("new connection per message", new_connection_per_message),
+            ("pooled", pooled),
+        ):
+            connections = len(stub.connections)
+            [duration] = measure(function)
+            print(
+                f"{name:<30} {duration:8.2f} s  "
+                f"{arguments.messages / duration:9.0f} msg/s  "
+                f"{len(stub.connections) - connections:6} connections"
+            )
+        unlimited.close()
+
+        start = time.perf_counter()
+        packs = list(pack_messages(
+            overdue_message(number)
+            for number in range(arguments.borrowings)
+        ))
+        packing = time.perf_counter() - start
+        limited = notifier(RateLimiter())
+        [duration] = measure(
+            lambda: limited.send_in_order(packs[:arguments.sample])
+        )
+        limited.close()
+        sample = min(arguments.sample, len(packs))
+        print(
+            f"digest of {arguments.borrowings} borrowings: "
+            f"{len(packs)} messages packed in {packing:.2f} s; "
+            f"{sample} sent in {duration:.2f} s with "
+            f"{settings.TELEGRAM_CHAT_MIN_INTERVAL} s between messages "
+            f"to a chat, about {duration / sample * len(packs):.0f} s "
+            f"for the whole digest"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Replay a burst of signed checkout events against the webhook and
+report the acknowledgement latency, then the time the inbox consumer
+takes to handle the burst.
+
+By default the events are sent in-process to a fresh test database:
+
+    python -m benchmarks.bench_webhook_burst --events 5000
+
+With --url they are sent over HTTP by --concurrency threads to a
+running server started with PAYMENT_GATEWAY=fake and the same
+STRIPE_WEBHOOK_SECRET; the consumer is then the server's Celery beat:
+
+    python -m benchmarks.bench_webhook_burst \\
+        --url http://127.0.0.1:8000/webhooks/stripe/ --concurrency 32
+"""
+import argparse
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.utils import benchmark_database, report, setup_django
+
+setup_django()
+
+from django.test import Client  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from payments.events import process_pending_events  # noqa: E402
+from payments.gateways import FakeGateway  # noqa: E402
+
+
+def signed_events(number, borrowings, gateway):
+    """
+    Yield (payload, signature) of `number` completed checkout
+    events spread over `borrowings` borrowings, every tenth
+    one a redelivery of the previous event.
+    """
+    payload = None
+    for index in range(number):
+        if payload is None or index % 10:
+            payload = json.dumps(
+                {
+                    "id": f"evt_{uuid.uuid4().hex}",
+                    "type": "checkout.session.completed",
+                    "data": {
+                        "object": {
+                            "id": f"cs_{uuid.uuid4().hex}",
+                            "payment_status": "paid",
+                            "metadata": {
+                                "borrowing_id": str(
+                                    index % borrowings + 1
+                                ),
+                            },
+                        }
+                    },
+                }
+            ).encode()
+        yield payload, gateway.sign(payload)
+
+
+def send_in_process(events):
+    client = Client()
+    url = reverse("stripe-webhook")
+    durations = []
+    for payload, signature in events:
+        start = time.perf_counter()
+        response = client.post(
+            url,
+            payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=signature
+        )
+        durations.append(time.perf_counter() - start)
+        assert response.status_code == 200, response
+    return durations
+
+
+def send_over_http(events, url, concurrency):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def send(event):
+        payload, signature = event
+        start = time.perf_counter()
+        response = session.post(
+            url,
+            data=payload,
+            headers={
+                "Content-Type": "application/json",
+                "Stripe-Signature": signature,
+            }
+        )
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        return list(executor.map(send, events))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--borrowings", type=int, default=500)
+    parser.add_argument("--url")
+    parser.add_argument("--concurrency", type=int, default=16)
+    arguments = parser.parse_args()
+
+    gateway = FakeGateway()
+    events = list(
+        signed_events(arguments.events, arguments.borrowings, gateway)
+    )
+
+    if arguments.url:
+        start = time.perf_counter()
+        durations = send_over_http(
+            events, arguments.url, arguments.concurrency
+        )
+        elapsed = time.perf_counter() - start
+        print(
+            f"{len(events)} events, {arguments.concurrency} threads, "
+            f"{len(events) / elapsed:.0f} events/s"
+        )
+        report("acknowledgement", durations)
+        return
+
+    with benchmark_database(), override_settings(
+            PAYMENT_GATEWAY="fake",
+            STRIPE_WEBHOOK_SECRET=gateway.webhook_secret,
+            ALLOWED_HOSTS=["testserver"]
+    ):
+        start = time.perf_counter()
+        durations = send_in_process(events)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{len(events)} events, "
+            f"{len(events) / elapsed:.0f} events/s acknowledged"
+        )
+        report("acknowledgement", durations)
+
+        start = time.perf_counter()
+        processed = process_pending_events()
+        elapsed = time.perf_counter() - start
+        print(
+            f"{processed} events handled by the consumer "
+            f"in {elapsed:.2f} s, {processed / elapsed:.0f} events/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+A reproducible library to benchmark against: the same arguments and
+seed generate the same users, books, borrowings and payments.
+
+Of the borrowings, 80% are returned, 15% are active and 5% are
+active and overdue; a tenth of the returned ones came back late and
+have a paid fine. Every borrowing has a paid payment, except 5% of
+the active ones whose checkout was abandoned and is still pending.
+"""
+import datetime
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from books.models import Book
+from books.search import index_books
+from borrowings.models import Borrowing
+from borrowings.pricing import borrowing_price, fine_price
+from payments.models import Payment
+from users.models import User
+from users.stats import rebuild_stats
+
+RETURNED_SHARE = 0.80
+OVERDUE_SHARE = 0.05
+LATE_RETURN_SHARE = 0.10
+ABANDONED_CHECKOUT_SHARE = 0.05
+HISTORY_DAYS = 365
+CHUNK_SIZE = 2000
+
+
+@dataclass
+class Dataset:
+    seed: int
+    staff_id: int = None
+    reader_ids: list = field(default_factory=list)
+    book_ids: list = field(default_factory=list)
+    borrowings: int = 0
+    payments: int = 0
+
+    def counts(self) -> dict:
+        return {
+            "seed": self.seed,
+            "users": len(self.reader_ids) + 1,
+            "books": len(self.book_ids),
+            "borrowings": self.borrowings,
+            "payments": self.payments,
+        }
+
+
+@contextmanager
+def keep_borrow_dates():
+    """Let bulk_create() store the generated borrow dates."""
+    borrow_date = Borrowing._meta.get_field("borrow_date")
+    borrow_date.auto_now_add = False
+    try:
+        yield
+    finally:
+        borrow_date.auto_now_add = True
+
+
+def chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def create_users(users) -> list:
+    # One hash for all, hashing is the slowest part of a user.
+    password = make_password("benchmark")
+    readers = []
+    for batch in chunks(range(users)):
+        readers += User.objects.bulk_create(
+            User(email=f"reader{index}@example.com", password=password)
+            for index in batch
+        )
+    return readers
+
+
+def create_books(rng, books) -> list:
+    created = []
+    for batch in chunks(range(books)):
+        created += Book.objects.bulk_create(
+            Book(
+                title=f"Book {index}",
+                author=f"Author {index % max(books // 5, 1)}",
+                cover=rng.choice(Book.Cover.values),
+                inventory=rng.randint(1, 10),
+                daily_fee=Decimal(rng.randrange(50, 300, 5)) / 100
+            )
+            for index in batch
+        )
+    index_books(created)
+    return created
+
+
+def generate_borrowing(rng, readers, books, today):
+    """An unsaved borrowing and whether its checkout was abandoned."""
+    book = rng.choice(books)
+    rental_days = rng.randint(3, 21)
+    kind = rng.random()
+    if kind < RETURNED_SHARE:
+        borrow_date = today - datetime.timedelta(
+            days=rng.randint(rental_days + 1, HISTORY_DAYS)
+        )
+        expected = borrow_date + datetime.timedelta(days=rental_days)
+        late_days = (
+            rng.randint(1, 10) if rng.random() < LATE_RETURN_SHARE else 0
+        )
+        actual = min(
+            expected + datetime.timedelta(
+                days=late_days or -rng.randint(0, rental_days - 1)
+            ),
+            today
+        )
+    elif kind < RETURNED_SHARE + OVERDUE_SHARE:
+        expected = today - datetime.timedelta(days=rng.randint(1, 30))
+        borrow_date = expected - datetime.timedelta(days=rental_days)
+        actual = None
+    else:
+        borrow_date = today - datetime.timedelta(
+            days=rng.randint(0, rental_days - 1)
+        )
+        expected = borrow_date + datetime.timedelta(days=rental_days)
+        actual = None
+    abandoned = (
+        actual is None and expected >= today
+        and rng.random() < ABANDONED_CHECKOUT_SHARE
+    )
+    borrowing = Borrowing(
+        user=rng.choice(readers),
+        book=book,
+        borrow_date=borrow_date,
+        expected_return_date=expected,
+        actual_return_date=actual
+    )
+    return borrowing, abandoned
+
+
+def payments_of(borrowing, abandoned) -> list:
+    book = borrowing.book
+    status = (
+        Payment.Status.PENDING if abandoned else Payment.Status.PAID
+    )
+    payments = [
+        Payment(
+            status=status,
+            type=Payment.Type.PAYMENT,
+            borrowing=borrowing,
+            session_url=f"https://checkout.example.com/{borrowing.id}",
+            session_id=f"cs_data_{borrowing.id}",
+            money_to_pay=borrowing_price(
+                book.daily_fee,
+                borrowing.borrow_date,
+                borrowing.expected_return_date
+            )
+        )
+    ]
+    returned = borrowing.actual_return_date
+    if returned and returned > borrowing.expected_return_date:
+        payments.append(
+            Payment(
+                status=Payment.Status.PAID,
+                type=Payment.Type.FINE,
+                borrowing=borrowing,
+                session_url=(
+                    f"https://checkout.example.com/fine/{borrowing.id}"
+                ),
+                session_id=f"cs_data_fine_{borrowing.id}",
+                money_to_pay=fine_price(
+                    book.daily_fee,
+                    book.cover,
+                    borrowing.expected_return_date,
+                    returned
+                )
+            )
+        )
+    return payments
+
+
+def generate(users=1000, books=500, borrowings=20000, seed=0):
+    """
+    Fill the database and return the Dataset describing it,
+    with the per-user stats rebuilt as the nightly task would.
+    """
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    dataset = Dataset(seed=seed)
+    with transaction.atomic():
+        dataset.staff_id = User.objects.create_superuser(
+            email="staff@example.com", password="benchmark"
+        ).id
+        readers = create_users(users)
+        book_rows = create_books(rng, books)
+        dataset.reader_ids = [reader.id for reader in readers]
+        dataset.book_ids = [book.id for book in book_rows]
+
+        with keep_borrow_dates():
+            for batch in chunks(range(borrowings)):
+                generated = [
+                    generate_borrowing(rng, readers, book_rows, today)
+                    for _ in batch
+                ]
+                created = Borrowing.objects.bulk_create(
+                    borrowing for borrowing, _ in generated
+                )
+                payments = Payment.objects.bulk_create(
+                    payment
+                    for borrowing, (_, abandoned) in zip(created, generated)
+                    for payment in payments_of(borrowing, abandoned)
+                )
+                dataset.borrowings += len(created)
+                dataset.payments += len(payments)
+    rebuild_stats()
+    return dataset
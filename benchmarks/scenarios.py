@@ -0,0 +1,211 @@
+"""
+The requests the runner times, one scenario per kind of request.
+
+A scenario prepares, untimed, whatever rows its requests use up,
+e.g. the borrowings to return, then sends one request per call.
+Requests are sent with the test client as readers of the generated
+dataset, picked with the dataset's seed.
+"""
+import datetime
+import json
+import random
+from decimal import Decimal
+
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from books.models import Book
+from borrowings.models import Borrowing
+from payments.events import process_pending_events
+from payments.gateways import get_gateway
+from payments.models import Payment
+from users.models import User
+
+RENTAL = datetime.timedelta(days=7)
+
+
+class Scenario:
+    name = None
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.rng = random.Random(f"{dataset.seed}-{self.name}")
+        self.client = APIClient()
+        self.readers = User.objects.in_bulk(dataset.reader_ids)
+        self.staff = User.objects.get(id=dataset.staff_id)
+
+    def reader(self):
+        return self.readers[self.rng.choice(self.dataset.reader_ids)]
+
+    def prepare(self, requests):
+        """Create the rows used up by `requests` requests."""
+
+    def request(self):
+        raise NotImplementedError
+
+
+class BooksList(Scenario):
+    name = "books-list"
+
+    def request(self):
+        self.client.force_authenticate(user=self.reader())
+        return self.client.get(reverse("books:book-list"))
+
+
+class BorrowingsList(Scenario):
+    """The borrowings of a reader."""
+    name = "borrowings-list"
+
+    def request(self):
+        self.client.force_authenticate(user=self.reader())
+        return self.client.get(reverse("borrowings:borrowing-list"))
+
+
+class StaffBorrowingsList(Scenario):
+    """A page of the active borrowings of every reader."""
+    name = "staff-borrowings-list"
+
+    def request(self):
+        self.client.force_authenticate(user=self.staff)
+        return self.client.get(
+            reverse("borrowings:borrowing-list"), {"is_active": "true"}
+        )
+
+
+class PaymentsList(Scenario):
+    name = "payments-list"
+
+    def request(self):
+        self.client.force_authenticate(user=self.reader())
+        return self.client.get(reverse("payments:payment-list"))
+
+
+def create_stock_book(copies):
+    """A book with a copy for every borrowing of a scenario."""
+    return Book.objects.create(
+        title="Benchmark stock",
+        author="Benchmark",
+        cover=Book.Cover.HARD,
+        inventory=copies,
+        daily_fee=Decimal("1.50")
+    )
+
+
+class Borrow(Scenario):
+    """A borrowing with its checkout session at the gateway."""
+    name = "borrow"
+
+    def prepare(self, requests):
+        self.book = create_stock_book(requests)
+
+    def request(self):
+        self.client.force_authenticate(user=self.reader())
+        return self.client.post(
+            reverse("borrowings:borrowing-list"),
+            {
+                "book": self.book.id,
+                "expected_return_date": datetime.date.today() + RENTAL,
+            }
+        )
+
+
+class Return(Scenario):
+    """The return of a paid borrowing, before it is due."""
+    name = "return"
+
+    def prepare(self, requests):
+        book = create_stock_book(requests)
+        borrowings = Borrowing.objects.bulk_create(
+            Borrowing(
+                user=self.reader(),
+                book=book,
+                expected_return_date=datetime.date.today() + RENTAL
+            )
+            for _ in range(requests)
+        )
+        Payment.objects.bulk_create(
+            Payment(
+                status=Payment.Status.PAID,
+                type=Payment.Type.PAYMENT,
+                borrowing=borrowing,
+                session_url="https://checkout.example.com/paid",
+                session_id=f"cs_return_{borrowing.id}",
+                money_to_pay=borrowing.calculate_borrowing_price()
+            )
+            for borrowing in borrowings
+        )
+        self.borrowings = iter(borrowings)
+
+    def request(self):
+        borrowing = next(self.borrowings)
+        self.client.force_authenticate(user=borrowing.user)
+        return self.client.post(
+            reverse(
+                "borrowings:borrowing-return-borrowing",
+                args=[borrowing.id]
+            )
+        )
+
+
+class Success(Scenario):
+    """
+    The redirect after the checkout, once the gateway's webhook
+    has confirmed the payment.
+    """
+    name = "success"
+
+    def prepare(self, requests):
+        book = create_stock_book(requests)
+        gateway = get_gateway()
+        self.sessions = []
+        for _ in range(requests):
+            reader = self.reader()
+            self.client.force_authenticate(user=reader)
+            self.client.post(
+                reverse("borrowings:borrowing-list"),
+                {
+                    "book": book.id,
+                    "expected_return_date": datetime.date.today() + RENTAL,
+                }
+            )
+            session_id = Payment.objects.filter(
+                borrowing__user=reader
+            ).latest("id").session_id
+            session = gateway.pay(session_id)
+            payload = json.dumps(
+                {
+                    "id": f"evt_{session.id}",
+                    "type": "checkout.session.completed",
+                    "data": {"object": session._asdict()},
+                }
+            ).encode()
+            self.client.post(
+                reverse("stripe-webhook"),
+                payload,
+                content_type="application/json",
+                HTTP_STRIPE_SIGNATURE=gateway.sign(payload)
+            )
+            self.sessions.append((reader, session_id))
+        process_pending_events()
+        self.sessions = iter(self.sessions)
+
+    def request(self):
+        reader, session_id = next(self.sessions)
+        self.client.force_authenticate(user=reader)
+        return self.client.get(
+            reverse("payments:success"), {"session_id": session_id}
+        )
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        BooksList,
+        BorrowingsList,
+        StaffBorrowingsList,
+        PaymentsList,
+        Borrow,
+        Return,
+        Success,
+    )
+}
@@ -0,0 +1,178 @@
+"""
+Bulk import and export of the book catalogue as CSV or JSON Lines.
+
+Imports are read as a stream and written in chunks: every chunk is
+validated row by row, then its books are upserted on (title, author)
+with one `bulk_create` and a batched `bulk_update`. Invalid rows,
+and updates leaving fewer copies than are reserved, are reported
+with their line numbers and skipped, the rest of the chunk is still
+imported. Exports are generators of lines over an
+`iterator()`, so neither side holds the catalogue in memory.
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from books.cache import invalidate_book
+from books.models import Book
+from books.search import index_books
+from books.serializers import BookImportSerializer
+
+FORMATS = ("csv", "jsonl")
+FIELDS = ("title", "author", "cover", "inventory", "daily_fee")
+UPDATED_FIELDS = ("cover", "inventory", "daily_fee")
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    updated: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < settings.BOOK_IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self) -> dict:
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def format_from_name(name, default="csv") -> str:
+    extension = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    return extension if extension in FORMATS else default
+
+
+def read_rows(lines, file_format):
+    """
+    Yield (line number, row) from a text stream. A row which
+    cannot be parsed is yielded as None.
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def import_books(lines, file_format, chunk_size=None) -> ImportReport:
+    chunk_size = chunk_size or settings.BOOK_IMPORT_CHUNK_SIZE
+    report = ImportReport()
+    rows = read_rows(lines, file_format)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return report
+        import_chunk(chunk, report)
+
+
+def import_chunk(chunk, report):
+    # One serializer validates the whole chunk, like the
+    # child of a `many=True` serializer, instead of building
+    # its fields again for every row.
+    serializer = BookImportSerializer()
+    books = {}
+    for line, row in chunk:
+        if row is None:
+            report.add_error(line, {"non_field_errors": ["Malformed row."]})
+            continue
+        try:
+            data = serializer.run_validation(row)
+        except ValidationError as error:
+            report.add_error(line, error.detail)
+            continue
+        # A later row of the same book replaces an earlier one.
+        books[(data["title"], data["author"])] = line, data
+
+    if not books:
+        return
+    with transaction.atomic():
+        # Filtering the authors too would make the database probe
+        # the index for every (title, author) pair of the chunk.
+        # The rows are locked so their reserved copies stay put.
+        existing = {}
+        for book in Book.objects.select_for_update().filter(
+                title__in={title for title, _ in books}
+        ).order_by("-id"):
+            existing[(book.title, book.author)] = book
+
+        to_create, to_update = [], []
+        for key, (line, data) in books.items():
+            book = existing.get(key)
+            if book is None:
+                to_create.append(Book(**data))
+                continue
+            if data["inventory"] < book.reserved:
+                report.add_error(
+                    line,
+                    {
+                        "inventory": [
+                            f"Ensure this value is greater than or "
+                            f"equal to the {book.reserved} reserved "
+                            f"copies."
+                        ]
+                    }
+                )
+                continue
+            for name in UPDATED_FIELDS:
+                setattr(book, name, data[name])
+            to_update.append(book)
+
+        Book.objects.bulk_create(to_create)
+        Book.objects.bulk_update(
+            to_update,
+            UPDATED_FIELDS,
+            batch_size=settings.BOOK_IMPORT_UPDATE_BATCH_SIZE
+        )
+        # Bulk writes send no signals, so keep the search
+        # index and the cached catalogue in step here. New
+        # books have nothing cached but the catalogue pages.
+        index_books(to_create)
+        invalidate_book(*(book.id for book in to_update))
+    report.created += len(to_create)
+    report.updated += len(to_update)
+
+
+class Echo:
+    """A file-like object which returns what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def export_books(file_format, chunk_size=None):
+    """Yield the catalogue as lines of CSV or JSON Lines."""
+    books = Book.objects.order_by("id").values_list(*FIELDS).iterator(
+        chunk_size=chunk_size or settings.BOOK_EXPORT_CHUNK_SIZE
+    )
+    if file_format == "csv":
+        writer = csv.writer(Echo())
+        yield writer.writerow(FIELDS)
+        for book in books:
+            yield writer.writerow(book)
+        return
+
+    for book in books:
+        row = dict(zip(FIELDS, book))
+        row["daily_fee"] = str(row["daily_fee"])
+        yield json.dumps(row) + "\n"
@@ -0,0 +1,147 @@
+"""
+Cache of the book catalogue.
+
+Serialized catalogue pages are stored under the catalogue version,
+which is bumped whenever a book is saved or deleted, so a single
+write invalidates every page at once. Book details are stored per
+book. The stock of a book (`inventory` and `available`) changes far
+more often than the rest of the catalogue, so it is cached under its
+own short-lived key and laid over the cached pages when they are
+served; the inventory helpers delete it when they change the stock.
+"""
+import hashlib
+import json
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+CATALOGUE_VERSION_KEY = "books:catalogue:version"
+STOCK_FIELDS = ("inventory", "available")
+
+
+def catalogue_version() -> int:
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        # Start from the clock rather than from 1, so pages of an
+        # evicted version are never mistaken for current ones.
+        cache.add(CATALOGUE_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(CATALOGUE_VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    try:
+        cache.incr(CATALOGUE_VERSION_KEY)
+    except ValueError:
+        catalogue_version()
+
+
+def catalogue_page_key(request) -> str:
+    uri = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"books:catalogue:{catalogue_version()}:{uri}"
+
+
+def book_key(book_id) -> str:
+    return f"books:book:{book_id}"
+
+
+def stock_key(book_id) -> str:
+    return f"books:stock:{book_id}"
+
+
+def now_and_on_commit(function):
+    """
+    Invalidate now and once again when the transaction commits,
+    so a request which has read the old rows in between cannot
+    keep them in the cache.
+    """
+    function()
+    transaction.on_commit(function)
+
+
+def invalidate_book(*book_ids):
+    """Drop the catalogue pages and the cached details of the books."""
+    keys = [
+        key
+        for book_id in book_ids
+        for key in (book_key(book_id), stock_key(book_id))
+    ]
+
+    def invalidate():
+        bump_catalogue_version()
+        cache.delete_many(keys)
+
+    now_and_on_commit(invalidate)
+
+
+def invalidate_book_stock(*book_ids):
+    """Drop the cached stock of the books."""
+    keys = [stock_key(book_id) for book_id in book_ids]
+    now_and_on_commit(lambda: cache.delete_many(keys))
+
+
+def get_book_stock(book_ids) -> dict:
+    """
+    Return {book id: (inventory, available)}, reading the books
+    missing from the cache with a single query.
+    """
+    cached = cache.get_many([stock_key(book_id) for book_id in book_ids])
+    stock = {
+        book_id: cached[stock_key(book_id)]
+        for book_id in book_ids
+        if stock_key(book_id) in cached
+    }
+    missing = [book_id for book_id in book_ids if book_id not in stock]
+    if missing:
+        loaded = {
+            book_id: (inventory, inventory - reserved)
+            for book_id, inventory, reserved in apps.get_model(
+                "books", "Book"
+            ).objects.filter(
+                id__in=missing
+            ).values_list(
+                "id", "inventory", "reserved"
+            )
+        }
+        cache.set_many(
+            {stock_key(book_id): value for book_id, value in loaded.items()},
+            settings.BOOK_STOCK_CACHE_TIMEOUT
+        )
+        stock.update(loaded)
+    return stock
+
+
+def cached_book_response(request, key, render):
+    """
+    Serve the serialized books returned by `render()` from the
+    cache, with their current stock and an ETag of the served data.
+    A request whose If-None-Match holds the ETag gets an empty 304
+    response.
+    """
+    data = cache.get(key)
+    if data is None:
+        data = render()
+        cache.set(key, data, settings.BOOK_CATALOGUE_CACHE_TIMEOUT)
+
+    books = data["results"] if "results" in data else [data]
+    stock = get_book_stock([book["id"] for book in books])
+    for book in books:
+        if book["id"] in stock:
+            book.update(zip(STOCK_FIELDS, stock[book["id"]]))
+
+    etag = quote_etag(
+        hashlib.md5(
+            json.dumps(data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+    )
+    headers = {"ETag": etag}
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in if_none_match or "*" in if_none_match:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(data, headers=headers)
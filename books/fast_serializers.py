@@ -0,0 +1,47 @@
+"""
+Helpers for building list responses straight from `.values()` rows.
+They render values exactly like the matching DRF fields, so the
+JSON is the same as the one of the model serializers.
+"""
+from decimal import Decimal
+
+from django.utils import timezone
+
+from books.models import Book
+
+CENTS = Decimal("0.01")
+
+
+def cover_display() -> dict:
+    """
+    Map the stored cover values to their labels, like
+    `Book.get_cover_display` does, in the active language.
+    """
+    return {value: str(label) for value, label in Book.Cover.choices}
+
+
+def format_decimal(value):
+    """Render a two-place decimal like DRF's `DecimalField`."""
+    if value is None:
+        return None
+    return f"{value.quantize(CENTS):f}"
+
+
+def format_date(value):
+    """Render a date like DRF's `DateField`."""
+    if value is None:
+        return None
+    return value.isoformat()
+
+
+def format_datetime(value):
+    """
+    Render an aware datetime like DRF's `DateTimeField`,
+    in the current time zone.
+    """
+    if value is None:
+        return None
+    value = timezone.localtime(value).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
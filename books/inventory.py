@@ -0,0 +1,186 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from books.cache import invalidate_book_stock
+from books.models import Book, Reservation
+
+
+def decrease_book_inventory(book_id) -> bool:
+    """
+    Take one copy of the book off the shelf with a single
+    conditional UPDATE, so concurrent checkouts can neither
+    lose an update nor push the inventory below zero.
+    Return False if there were no copies left.
+    """
+    updated = Book.objects.filter(
+        pk=book_id,
+        inventory__gt=0
+    ).update(
+        inventory=F("inventory") - 1
+    )
+    if updated:
+        invalidate_book_stock(book_id)
+    return updated == 1
+
+
+def increase_book_inventory(book_id) -> bool:
+    """
+    Put one copy of the book back on the shelf.
+    Return False if the book does not exist.
+    """
+    updated = Book.objects.filter(
+        pk=book_id
+    ).update(
+        inventory=F("inventory") + 1
+    )
+    if updated:
+        invalidate_book_stock(book_id)
+    return updated == 1
+
+
+@transaction.atomic
+def reserve_book_copy(borrowing, expires_at) -> bool:
+    """
+    Hold one copy of the borrowed book until `expires_at`.
+    The `reserved` counter is only incremented while it is
+    below the inventory, so pending checkouts can never hold
+    more copies than the library has.
+    Return False if there were no copies available.
+    """
+    reserved = Book.objects.filter(
+        pk=borrowing.book_id,
+        inventory__gt=F("reserved")
+    ).update(
+        reserved=F("reserved") + 1
+    )
+    if not reserved:
+        return False
+    invalidate_book_stock(borrowing.book_id)
+    Reservation.objects.create(
+        book_id=borrowing.book_id,
+        borrowing=borrowing,
+        expires_at=expires_at
+    )
+    return True
+
+
+def reserve_book_copies(borrowings, expires_at) -> bool:
+    """
+    Hold one copy of the book of every borrowing until
+    `expires_at`, with one UPDATE for all the books and one
+    INSERT for all the reservations. The borrowings must be
+    of different books. Either every copy is held or, if one
+    of the books has no copies available, none is.
+    Return False in that case.
+    """
+    book_ids = [borrowing.book_id for borrowing in borrowings]
+    with transaction.atomic():
+        reserved = Book.objects.filter(
+            pk__in=book_ids,
+            inventory__gt=F("reserved")
+        ).update(
+            reserved=F("reserved") + 1
+        )
+        if reserved != len(book_ids):
+            transaction.set_rollback(True)
+            return False
+        invalidate_book_stock(*book_ids)
+        Reservation.objects.bulk_create(
+            Reservation(
+                book_id=borrowing.book_id,
+                borrowing=borrowing,
+                expires_at=expires_at
+            )
+            for borrowing in borrowings
+        )
+    return True
+
+
+def take_free_copy(book_id) -> bool:
+    """
+    Take one copy of the book which is not held for a pending
+    checkout, with a single conditional UPDATE.
+    Return False if every copy left is held or borrowed.
+    """
+    updated = Book.objects.filter(
+        pk=book_id,
+        inventory__gt=F("reserved")
+    ).update(
+        inventory=F("inventory") - 1
+    )
+    if updated:
+        invalidate_book_stock(book_id)
+    return updated == 1
+
+
+@transaction.atomic
+def fulfil_reservation(borrowing) -> bool:
+    """
+    Turn the copy held for the borrowing into a borrowed one.
+    If the reservation has already expired, fall back to
+    taking a copy that is neither borrowed nor held for
+    another pending checkout.
+    Return False if there were no such copies left.
+    """
+    deleted, _ = Reservation.objects.filter(
+        borrowing_id=borrowing.id
+    ).delete()
+    if not deleted:
+        return take_free_copy(borrowing.book_id)
+    updated = Book.objects.filter(
+        pk=borrowing.book_id,
+        inventory__gt=0,
+        reserved__gt=0
+    ).update(
+        inventory=F("inventory") - 1,
+        reserved=F("reserved") - 1
+    )
+    if updated:
+        invalidate_book_stock(borrowing.book_id)
+    return updated == 1
+
+
+def release_expired_reservations(now=None, batch_size=1000) -> int:
+    """
+    Delete reservations whose checkout session has expired
+    and give their copies back, one batch at a time.
+    Return the number of released reservations.
+    """
+    now = now or timezone.now()
+    released = 0
+    while True:
+        expired = list(
+            Reservation.objects.filter(
+                expires_at__lte=now
+            ).order_by(
+                "expires_at"
+            ).values_list(
+                "id", "book_id"
+            )[:batch_size]
+        )
+        if not expired:
+            return released
+
+        ids_by_book = {}
+        for reservation_id, book_id in expired:
+            ids_by_book.setdefault(book_id, []).append(reservation_id)
+
+        for book_id, reservation_ids in ids_by_book.items():
+            with transaction.atomic():
+                # A concurrent payment may have fulfilled some of
+                # these reservations, so only give back the copies
+                # of the rows this call has actually deleted.
+                deleted, _ = Reservation.objects.filter(
+                    id__in=reservation_ids
+                ).delete()
+                if deleted:
+                    Book.objects.filter(
+                        pk=book_id
+                    ).update(
+                        reserved=F("reserved") - deleted
+                    )
+                    invalidate_book_stock(book_id)
+            released += deleted
+        if len(expired) < batch_size:
+            return released
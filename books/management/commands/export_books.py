@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from books.bulk import FORMATS, export_books, format_from_name
+
+
+class Command(BaseCommand):
+    help = "Export the books as CSV or JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            help="The file to write, the standard output by default."
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="The file format, guessed from the extension by default."
+        )
+        parser.add_argument("--chunk-size", type=int)
+
+    def handle(self, *args, **options):
+        path = options["output"]
+        file_format = options["format"] or format_from_name(path or "")
+        lines = export_books(file_format, chunk_size=options["chunk_size"])
+        if not path:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+
+        with open(path, "w", encoding="utf-8", newline="") as output:
+            output.writelines(lines)
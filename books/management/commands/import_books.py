@@ -0,0 +1,55 @@
+import io
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from books.bulk import FORMATS, format_from_name, import_books
+
+
+class Command(BaseCommand):
+    help = (
+        "Import books from a CSV or JSON Lines file, creating "
+        "new books and updating the ones with the same title "
+        "and author."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="The file to import, or - to read the standard input."
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="The file format, guessed from the extension by default."
+        )
+        parser.add_argument("--chunk-size", type=int)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or format_from_name(path)
+        try:
+            lines = (
+                io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig")
+                if path == "-"
+                else open(path, encoding="utf-8-sig", newline="")
+            )
+        except OSError as error:
+            raise CommandError(error)
+
+        with lines:
+            report = import_books(
+                lines,
+                file_format,
+                chunk_size=options["chunk_size"]
+            )
+
+        for error in report.errors:
+            self.stderr.write(f"Line {error['line']}: {error['errors']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{report.created} books created, "
+                f"{report.updated} updated, "
+                f"{report.error_count} rows skipped."
+            )
+        )
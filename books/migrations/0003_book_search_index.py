@@ -0,0 +1,40 @@
+# Generated by Django 4.2.3 on 2026-10-18 10:30
+
+from django.db import migrations
+
+# The DDL is kept here rather than imported from `books.search`,
+# so later changes of the app code cannot rewrite this migration.
+FTS_TABLE = "books_book_fts"
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        f"USING fts5("
+        f"title, author, "
+        f"tokenize = 'unicode61 remove_diacritics 2', "
+        f"prefix = '2 3 4'"
+        f")"
+    )
+    book_table = apps.get_model("books", "Book")._meta.db_table
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, author) "
+        f"SELECT id, title, author FROM {book_table}"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0002_book_reserved_reservation"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,6 +1,11 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
+from books.cache import invalidate_book
+from books.search import index_books, unindex_books
+
 
 class Book(models.Model):
     class Cover(models.TextChoices):
@@ -14,18 +19,72 @@ class Book(models.Model):
         choices=Cover.choices,
     )
     inventory = models.PositiveIntegerField()
+    reserved = models.PositiveIntegerField(
+        default=0,
+        editable=False
+    )
     daily_fee = models.DecimalField(
         max_digits=6,
         decimal_places=2
     )
 
-    def decrease_book_inventory(self):
-        self.inventory -= 1
-        self.save()
+    @property
+    def available(self) -> int:
+        """
+        Copies that can still be borrowed: the inventory
+        minus the copies held by pending checkouts.
+        """
+        return self.inventory - self.reserved
 
-    def increase_book_inventory(self):
-        self.inventory += 1
-        self.save()
+    class Meta:
+        indexes = [
+            # The natural key of the bulk imports.
+            models.Index(
+                fields=["title", "author"],
+                name="book_title_author_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class Reservation(models.Model):
+    """
+    A copy of a book held for a borrowing while its
+    checkout session is being paid.
+    """
+    book = models.ForeignKey(
+        Book,
+        related_name="reservations",
+        on_delete=models.CASCADE
+    )
+    borrowing = models.OneToOneField(
+        "borrowings.Borrowing",
+        related_name="reservation",
+        on_delete=models.CASCADE
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Reservation of {self.book} until {self.expires_at}"
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_cached_book(sender, instance, **kwargs):
+    """
+    Keep the cached catalogue in step with the books,
+    including the edits made through the admin site.
+    """
+    invalidate_book(instance.id)
+
+
+@receiver(post_save, sender=Book)
+def index_book(sender, instance, **kwargs):
+    index_books([instance])
+
+
+@receiver(post_delete, sender=Book)
+def unindex_book(sender, instance, **kwargs):
+    unindex_books([instance.id])
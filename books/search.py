@@ -0,0 +1,155 @@
+"""
+Full-text search of the book catalogue.
+
+On SQLite, titles and authors are indexed in the FTS5 table
+`books_book_fts`, whose rowids are the book ids; the table is
+created by the migration `0003_book_search_index`. The index is kept
+in step with the books by the signal receivers of `books.models`;
+writes which bypass the signals (`bulk_create`, `update`) have to
+call `index_books` or `rebuild_search_index` themselves. Other
+databases fall back to case-insensitive substring filters.
+"""
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+
+FTS_TABLE = "books_book_fts"
+# Titles weigh twice as much as authors in the ranking.
+RANKING = f"bm25({FTS_TABLE}, 2.0, 1.0)"
+
+
+def search_index_supported(connection=connection) -> bool:
+    return connection.vendor == "sqlite"
+
+
+def rebuild_search_index(connection=connection):
+    """Index every book again, for example after a bulk import."""
+    if not search_index_supported(connection):
+        return
+    book_table = apps.get_model("books", "Book")._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, author) "
+            f"SELECT id, title, author FROM {book_table}"
+        )
+
+
+def index_books(books):
+    """Add the books to the index or replace their indexed texts."""
+    if not search_index_supported():
+        return
+    rows = [(book.id, book.title, book.author) for book in books]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+            [(book_id,) for book_id, _, _ in rows]
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, author) "
+            f"VALUES (%s, %s, %s)",
+            rows
+        )
+
+
+def unindex_books(book_ids):
+    if not search_index_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+            [(book_id,) for book_id in book_ids]
+        )
+
+
+def search_terms(query) -> list:
+    return re.findall(r"\w+", query or "")
+
+
+def search_books(
+        query=None,
+        cover=None,
+        min_fee=None,
+        max_fee=None,
+        available=False,
+        limit=100,
+        offset=0
+) -> list:
+    """
+    Return a page of the books whose title or author has words
+    starting with every term of the query, best matches first.
+    Terms shorter than BOOK_SEARCH_MIN_PREFIX_LENGTH match whole
+    words only, and only the first BOOK_SEARCH_MAX_RANKED matches
+    are ranked. Without a query the filtered books are listed by id.
+    """
+    Book = apps.get_model("books", "Book")
+    terms = search_terms(query)
+    if terms and search_index_supported():
+        book_ids = ranked_book_ids(
+            terms, cover, min_fee, max_fee, available, limit, offset
+        )
+        books = Book.objects.in_bulk(book_ids)
+        return [books[book_id] for book_id in book_ids if book_id in books]
+
+    books = Book.objects.all()
+    for term in terms:
+        books = books.filter(
+            Q(title__icontains=term) | Q(author__icontains=term)
+        )
+    if cover:
+        books = books.filter(cover=cover)
+    if min_fee is not None:
+        books = books.filter(daily_fee__gte=min_fee)
+    if max_fee is not None:
+        books = books.filter(daily_fee__lte=max_fee)
+    if available:
+        books = books.filter(inventory__gt=F("reserved"))
+    return list(books.order_by("id")[offset:offset + limit])
+
+
+def ranked_book_ids(
+        terms, cover, min_fee, max_fee, available, limit, offset
+) -> list:
+    book_table = apps.get_model("books", "Book")._meta.db_table
+    # Every term is quoted, so it cannot be read as FTS5 syntax.
+    # Short terms would match a large part of the catalogue as
+    # prefixes, they match whole words.
+    match = " ".join(
+        f'"{term}"*'
+        if len(term) >= settings.BOOK_SEARCH_MIN_PREFIX_LENGTH
+        else f'"{term}"'
+        for term in terms
+    )
+    conditions = [f"{FTS_TABLE} MATCH %s"]
+    params = [match]
+    if cover:
+        conditions.append("book.cover = %s")
+        params.append(cover)
+    if min_fee is not None:
+        conditions.append("book.daily_fee >= %s")
+        params.append(min_fee)
+    if max_fee is not None:
+        conditions.append("book.daily_fee <= %s")
+        params.append(max_fee)
+    if available:
+        conditions.append("book.inventory > book.reserved")
+    # Only the first matches by id are scored: the candidates do not
+    # depend on the page, so the pages of a query follow one ranking,
+    # and broad queries do not score the whole catalogue.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id FROM ("
+            f"SELECT book.id AS id, {RANKING} AS score "
+            f"FROM {FTS_TABLE} "
+            f"JOIN {book_table} book ON book.id = {FTS_TABLE}.rowid "
+            f"WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {FTS_TABLE}.rowid "
+            f"LIMIT %s"
+            f") ORDER BY score, id "
+            f"LIMIT %s OFFSET %s",
+            [*params, settings.BOOK_SEARCH_MAX_RANKED, limit, offset]
+        )
+        return [book_id for book_id, in cursor.fetchall()]
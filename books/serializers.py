@@ -1,14 +1,29 @@
+from django.conf import settings
+from django.utils.functional import cached_property
 from rest_framework import serializers
 
 from books.models import Book
 
 
 class BookSerializer(serializers.ModelSerializer):
+    """
+    The copies held by pending checkouts are internal, only the
+    copies which can still be borrowed are shown.
+    """
     cover = serializers.CharField(source="get_cover_display")
+    available = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Book
-        fields = "__all__"
+        fields = (
+            "id",
+            "cover",
+            "title",
+            "author",
+            "inventory",
+            "available",
+            "daily_fee",
+        )
 
 
 class BookBorrowingSerializer(serializers.ModelSerializer):
@@ -19,4 +34,62 @@ class BookBorrowingSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Book
-        exclude = ("inventory", )
+        exclude = ("inventory", "reserved")
+
+
+class BookImportSerializer(serializers.ModelSerializer):
+    """
+    A row of a bulk import. The cover can be given either
+    as stored ("H") or as displayed ("Hard").
+    """
+    cover = serializers.CharField()
+
+    class Meta:
+        model = Book
+        fields = ("title", "author", "cover", "inventory", "daily_fee")
+        # The database would reject the whole chunk otherwise.
+        extra_kwargs = {"inventory": {"min_value": 0}}
+
+    @cached_property
+    def covers(self) -> dict:
+        return {
+            name.lower(): cover
+            for cover, label in Book.Cover.choices
+            for name in (cover, str(label))
+        }
+
+    def validate_cover(self, value):
+        try:
+            return self.covers[value.lower()]
+        except KeyError:
+            raise serializers.ValidationError(
+                f'"{value}" is not a valid cover.'
+            )
+
+
+class BookSearchSerializer(serializers.Serializer):
+    """
+    The query parameters of the book search.
+    """
+    q = serializers.CharField(required=False, allow_blank=True)
+    cover = serializers.ChoiceField(
+        choices=Book.Cover.choices,
+        required=False
+    )
+    min_fee = serializers.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        required=False
+    )
+    max_fee = serializers.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        required=False
+    )
+    available = serializers.BooleanField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.PAGINATION_MAX_PAGE_SIZE,
+        default=settings.REST_FRAMEWORK["PAGE_SIZE"]
+    )
+    offset = serializers.IntegerField(min_value=0, default=0)
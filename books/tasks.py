@@ -0,0 +1,11 @@
+from celery import shared_task
+from django.conf import settings
+
+from books.inventory import release_expired_reservations
+
+
+@shared_task
+def release_expired_book_reservations():
+    return release_expired_reservations(
+        batch_size=settings.RESERVATION_RELEASE_BATCH_SIZE
+    )
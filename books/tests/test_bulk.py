@@ -0,0 +1,212 @@
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.bulk import export_books, import_books
+from books.models import Book
+from books.search import search_books
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_book,
+    sample_user
+)
+
+User = get_user_model()
+BOOK_IMPORT_URL = reverse("books:book-import-catalogue")
+BOOK_EXPORT_URL = reverse("books:book-export-catalogue")
+BOOK_LIST_URL = reverse("books:book-list")
+
+CSV = (
+    "title,author,cover,inventory,daily_fee\n"
+    "Dune,Frank Herbert,H,3,1.50\n"
+    "Emma,Jane Austen,Soft,2,0.99\n"
+    "Broken,Nobody,X,-1,abc\n"
+    "Win Every Argument,Mehdi Hasan,S,7,2.00\n"
+)
+
+
+class ImportBooksTest(TestCase):
+    def setUp(self):
+        self.book = Book.objects.create(
+            **sample_book()
+        )
+
+    def test_csv_rows_are_created_and_updated(self):
+        report = import_books(io.StringIO(CSV), "csv", chunk_size=2)
+        self.book.refresh_from_db()
+
+        self.assertEqual((report.created, report.updated), (2, 1))
+        self.assertEqual(Book.objects.count(), 3)
+        self.assertEqual(self.book.inventory, 7)
+        self.assertEqual(self.book.cover, "S")
+        self.assertEqual(Book.objects.get(title="Emma").cover, "S")
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        report = import_books(io.StringIO(CSV), "csv", chunk_size=2)
+
+        self.assertEqual(report.error_count, 1)
+        self.assertEqual(report.errors[0]["line"], 4)
+        self.assertEqual(
+            set(report.errors[0]["errors"]),
+            {"cover", "inventory", "daily_fee"}
+        )
+        self.assertFalse(Book.objects.filter(title="Broken").exists())
+
+    def test_inventory_below_the_reserved_copies_is_rejected(self):
+        Book.objects.filter(id=self.book.id).update(reserved=8)
+
+        report = import_books(io.StringIO(CSV), "csv")
+        self.book.refresh_from_db()
+
+        self.assertEqual((report.created, report.updated), (2, 0))
+        self.assertEqual(report.errors[1]["line"], 5)
+        self.assertEqual(set(report.errors[1]["errors"]), {"inventory"})
+        self.assertEqual(self.book.inventory, 10)
+        self.assertEqual(self.book.cover, "H")
+
+    @override_settings(BOOK_IMPORT_UPDATE_BATCH_SIZE=2)
+    def test_updates_are_written_in_batches(self):
+        import_books(io.StringIO(CSV), "csv")
+        lines = io.StringIO(CSV.replace(",1.50", ",2.50"))
+
+        report = import_books(lines, "csv")
+
+        self.assertEqual((report.created, report.updated), (0, 3))
+        self.assertEqual(
+            Book.objects.get(title="Dune").daily_fee, Decimal("2.50")
+        )
+        self.assertEqual(Book.objects.get(title="Emma").inventory, 2)
+
+    def test_jsonl_rows(self):
+        lines = io.StringIO(
+            '{"title": "Dune", "author": "Frank Herbert", "cover": "H", '
+            '"inventory": 3, "daily_fee": "1.50"}\n'
+            "\n"
+            "not json\n"
+            '{"title": "Dune", "author": "Frank Herbert", "cover": "H", '
+            '"inventory": 4, "daily_fee": "1.50"}\n'
+        )
+
+        report = import_books(lines, "jsonl")
+
+        self.assertEqual((report.created, report.error_count), (1, 1))
+        self.assertEqual(report.errors[0]["line"], 3)
+        self.assertEqual(Book.objects.get(title="Dune").inventory, 4)
+
+    def test_imported_books_are_searchable_and_listed(self):
+        cache.clear()
+        APIClient().get(BOOK_LIST_URL)
+
+        import_books(io.StringIO(CSV), "csv")
+
+        self.assertEqual(
+            [book.title for book in search_books("herbert")],
+            ["Dune"]
+        )
+        self.assertEqual(
+            len(APIClient().get(BOOK_LIST_URL).data["results"]),
+            3
+        )
+
+
+class ExportBooksTest(TestCase):
+    def setUp(self):
+        Book.objects.create(**sample_book())
+        Book.objects.create(
+            **sample_book(title="Emma, a novel", daily_fee=Decimal("0.50"))
+        )
+
+    def test_csv_export_can_be_imported_back(self):
+        exported = "".join(export_books("csv", chunk_size=1))
+        Book.objects.all().delete()
+
+        report = import_books(io.StringIO(exported), "csv")
+
+        self.assertEqual((report.created, report.error_count), (2, 0))
+        self.assertEqual(
+            Book.objects.get(title="Emma, a novel").daily_fee,
+            Decimal("0.50")
+        )
+
+    def test_jsonl_export(self):
+        rows = [json.loads(line) for line in export_books("jsonl")]
+
+        self.assertEqual(
+            rows[1],
+            {
+                "title": "Emma, a novel",
+                "author": "Mehdi Hasan",
+                "cover": "H",
+                "inventory": 10,
+                "daily_fee": "0.50",
+            }
+        )
+
+
+class BulkEndpointsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            user=User.objects.create_superuser(**sample_user())
+        )
+
+    def test_import_endpoint(self):
+        response = self.client.post(
+            BOOK_IMPORT_URL,
+            {"file": SimpleUploadedFile("books.csv", CSV.encode())},
+            format="multipart"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 3)
+        self.assertEqual(response.data["error_count"], 1)
+
+    def test_export_endpoint_streams(self):
+        Book.objects.create(**sample_book())
+
+        response = self.client.get(BOOK_EXPORT_URL, {"file_format": "jsonl"})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            json.loads(b"".join(response.streaming_content))["title"],
+            "Win Every Argument"
+        )
+
+    def test_endpoints_are_staff_only(self):
+        self.client.force_authenticate(
+            user=User.objects.create_user(**sample_user())
+        )
+
+        self.assertEqual(
+            self.client.get(BOOK_EXPORT_URL).status_code,
+            status.HTTP_403_FORBIDDEN
+        )
+        self.assertEqual(
+            self.client.post(BOOK_IMPORT_URL).status_code,
+            status.HTTP_403_FORBIDDEN
+        )
+
+
+class BulkCommandsTest(TestCase):
+    def test_export_and_import_commands(self):
+        Book.objects.create(**sample_book())
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "books.jsonl")
+
+        call_command("export_books", output=path)
+        Book.objects.all().delete()
+        output = io.StringIO()
+        call_command("import_books", path, stdout=output)
+
+        self.assertIn("1 books created", output.getvalue())
+        self.assertEqual(Book.objects.get().title, "Win Every Argument")
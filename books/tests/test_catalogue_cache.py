@@ -0,0 +1,158 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.inventory import decrease_book_inventory, increase_book_inventory
+from books.models import Book
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_book,
+    sample_user
+)
+
+User = get_user_model()
+BOOK_LIST_URL = reverse("books:book-list")
+
+
+def book_detail_url(book_id):
+    return reverse("books:book-detail", args=[book_id])
+
+
+class CatalogueCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.book = Book.objects.create(
+            **sample_book()
+        )
+
+    def test_cached_list_is_served_without_queries(self):
+        response = self.client.get(BOOK_LIST_URL)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(BOOK_LIST_URL)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.content, response.content)
+
+    def test_book_save_invalidates_the_catalogue(self):
+        self.client.get(BOOK_LIST_URL)
+        self.client.get(book_detail_url(self.book.id))
+
+        self.book.title = "Updated title"
+        self.book.save()
+        Book.objects.create(**sample_book(title="New book"))
+        response = self.client.get(BOOK_LIST_URL)
+        detail = self.client.get(book_detail_url(self.book.id))
+
+        self.assertEqual(
+            [book["title"] for book in response.data["results"]],
+            ["Updated title", "New book"]
+        )
+        self.assertEqual(detail.data["title"], "Updated title")
+
+    def test_book_delete_invalidates_the_catalogue(self):
+        self.client.get(BOOK_LIST_URL)
+        self.client.get(book_detail_url(self.book.id))
+
+        self.book.delete()
+
+        self.assertEqual(self.client.get(BOOK_LIST_URL).data["results"], [])
+        self.assertEqual(
+            self.client.get(book_detail_url(self.book.id)).status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+
+    def test_stock_changes_keep_the_cached_page(self):
+        self.client.get(BOOK_LIST_URL)
+        self.client.get(book_detail_url(self.book.id))
+
+        decrease_book_inventory(self.book.id)
+        with self.assertNumQueries(1):
+            response = self.client.get(BOOK_LIST_URL)
+        detail = self.client.get(book_detail_url(self.book.id))
+
+        self.assertEqual(response.data["results"][0]["inventory"], 9)
+        self.assertEqual(detail.data["inventory"], 9)
+
+    def test_books_show_the_available_copies(self):
+        Book.objects.filter(id=self.book.id).update(reserved=3)
+
+        listed = self.client.get(BOOK_LIST_URL).data["results"][0]
+        detail = self.client.get(book_detail_url(self.book.id)).data
+
+        for book in (listed, detail):
+            self.assertNotIn("reserved", book)
+            self.assertEqual(book["available"], 7)
+
+    def test_staff_edits_through_the_api_invalidate_the_catalogue(self):
+        self.client.force_authenticate(
+            user=User.objects.create_superuser(**sample_user())
+        )
+        self.client.get(book_detail_url(self.book.id))
+
+        self.client.patch(
+            book_detail_url(self.book.id),
+            {"daily_fee": "2.50"}
+        )
+
+        self.assertEqual(
+            self.client.get(book_detail_url(self.book.id)).data["daily_fee"],
+            "2.50"
+        )
+
+
+class CatalogueETagTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.book = Book.objects.create(
+            **sample_book()
+        )
+
+    def test_matching_etag_gets_not_modified(self):
+        etag = self.client.get(BOOK_LIST_URL)["ETag"]
+
+        response = self.client.get(BOOK_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_etag_changes_with_the_stock(self):
+        etag = self.client.get(book_detail_url(self.book.id))["ETag"]
+
+        increase_book_inventory(self.book.id)
+        response = self.client.get(
+            book_detail_url(self.book.id),
+            HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["inventory"], 11)
+
+    def test_etag_changes_with_the_catalogue(self):
+        etag = self.client.get(BOOK_LIST_URL)["ETag"]
+
+        Book.objects.create(**sample_book(title="New book"))
+        response = self.client.get(BOOK_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_etag_changes_with_the_book(self):
+        etag = self.client.get(book_detail_url(self.book.id))["ETag"]
+
+        self.book.title = "New title"
+        self.book.save()
+        response = self.client.get(
+            book_detail_url(self.book.id),
+            HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["title"], "New title")
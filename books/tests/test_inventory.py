@@ -0,0 +1,106 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, OperationalError
+from django.test import TransactionTestCase
+
+from books.inventory import (
+    decrease_book_inventory,
+    increase_book_inventory
+)
+from books.models import Book
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_book
+)
+
+THREADS = 16
+ATTEMPTS = 64
+
+
+def retry_locked(function, *args):
+    """
+    SQLite reports a locked table instead of waiting
+    for the concurrent writer, so simply try again.
+    """
+    while True:
+        try:
+            return function(*args)
+        except OperationalError:
+            continue
+
+
+def hammer(function, book_id, attempts=ATTEMPTS, threads=THREADS):
+    """
+    Call `function(book_id)` `attempts` times from
+    `threads` threads released at the same moment and
+    return the list of results.
+    """
+    barrier = threading.Barrier(threads)
+
+    def worker(calls):
+        barrier.wait()
+        results = []
+        try:
+            for _ in range(calls):
+                results.append(function(book_id))
+        finally:
+            connection.close()
+        return results
+
+    calls_per_thread = [attempts // threads] * threads
+    calls_per_thread[0] += attempts % threads
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        chunks = executor.map(worker, calls_per_thread)
+    return [result for chunk in chunks for result in chunk]
+
+
+class BookInventoryTest(TransactionTestCase):
+    def test_decrease_returns_false_when_no_copies_left(self):
+        book = Book.objects.create(**sample_book(inventory=1))
+
+        self.assertTrue(decrease_book_inventory(book.id))
+        self.assertFalse(decrease_book_inventory(book.id))
+        book.refresh_from_db()
+        self.assertEqual(book.inventory, 0)
+
+    def test_increase_unknown_book(self):
+        self.assertFalse(increase_book_inventory(0))
+
+    def test_concurrent_decrease_does_not_oversell(self):
+        book = Book.objects.create(**sample_book(inventory=10))
+
+        results = hammer(
+            lambda book_id: retry_locked(decrease_book_inventory, book_id),
+            book.id
+        )
+
+        book.refresh_from_db()
+        self.assertEqual(len(results), ATTEMPTS)
+        self.assertEqual(results.count(True), 10)
+        self.assertEqual(book.inventory, 0)
+
+    def test_concurrent_increase_does_not_lose_updates(self):
+        book = Book.objects.create(**sample_book(inventory=10))
+
+        results = hammer(
+            lambda book_id: retry_locked(increase_book_inventory, book_id),
+            book.id
+        )
+
+        book.refresh_from_db()
+        self.assertTrue(all(results))
+        self.assertEqual(book.inventory, 10 + ATTEMPTS)
+
+    def test_concurrent_decrease_and_increase(self):
+        book = Book.objects.create(**sample_book(inventory=5))
+
+        def borrow_and_return(book_id):
+            if retry_locked(decrease_book_inventory, book_id):
+                retry_locked(increase_book_inventory, book_id)
+                return True
+            return False
+
+        hammer(borrow_and_return, book.id)
+
+        book.refresh_from_db()
+        self.assertEqual(book.inventory, 5)
@@ -0,0 +1,164 @@
+import datetime
+from unittest.mock import patch
+
+import stripe
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.inventory import (
+    fulfil_reservation,
+    release_expired_reservations,
+    reserve_book_copy
+)
+from books.models import Book, Reservation
+from borrowings.models import Borrowing
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    BORROWING_LIST_URL,
+    sample_book,
+    sample_borrowing,
+    sample_user
+)
+
+User = get_user_model()
+TOMORROW = timezone.now() + datetime.timedelta(days=1)
+STRIPE_SESSION = stripe.checkout.Session.construct_from(
+    {
+        "id": "cs_test",
+        "url": "https://checkout.stripe.com/c/pay/cs_test"
+    },
+    "sk_test"
+)
+
+
+class ReservationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            **sample_user()
+        )
+        self.book = Book.objects.create(
+            **sample_book(inventory=2)
+        )
+
+    def create_borrowing(self):
+        return Borrowing.objects.create(
+            expected_return_date=TOMORROW.date(),
+            book=self.book,
+            user=self.user,
+        )
+
+    def test_reservations_never_exceed_inventory(self):
+        results = [
+            reserve_book_copy(self.create_borrowing(), TOMORROW)
+            for _ in range(3)
+        ]
+        self.book.refresh_from_db()
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(self.book.reserved, 2)
+        self.assertEqual(self.book.available, 0)
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    def test_fulfil_reservation(self):
+        borrowing = self.create_borrowing()
+        reserve_book_copy(borrowing, TOMORROW)
+
+        self.assertTrue(fulfil_reservation(borrowing))
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 1)
+        self.assertEqual(self.book.reserved, 0)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_fulfil_expired_reservation_takes_a_free_copy(self):
+        borrowing = self.create_borrowing()
+
+        self.assertTrue(fulfil_reservation(borrowing))
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 1)
+        self.assertEqual(self.book.reserved, 0)
+
+    def test_expired_reservation_leaves_held_copies(self):
+        for _ in range(2):
+            reserve_book_copy(self.create_borrowing(), TOMORROW)
+        late_borrowing = self.create_borrowing()
+
+        self.assertFalse(fulfil_reservation(late_borrowing))
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 2)
+        self.assertEqual(self.book.reserved, 2)
+
+    def test_expired_reservation_takes_a_copy_nobody_holds(self):
+        reserve_book_copy(self.create_borrowing(), TOMORROW)
+        late_borrowing = self.create_borrowing()
+
+        self.assertTrue(fulfil_reservation(late_borrowing))
+        self.assertFalse(fulfil_reservation(self.create_borrowing()))
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 1)
+        self.assertEqual(self.book.reserved, 1)
+
+    def test_release_expired_reservations(self):
+        expired_borrowing = self.create_borrowing()
+        live_borrowing = self.create_borrowing()
+        reserve_book_copy(
+            expired_borrowing,
+            timezone.now() - datetime.timedelta(minutes=1)
+        )
+        reserve_book_copy(live_borrowing, TOMORROW)
+
+        released = release_expired_reservations(batch_size=1)
+        self.book.refresh_from_db()
+
+        self.assertEqual(released, 1)
+        self.assertEqual(self.book.reserved, 1)
+        self.assertEqual(self.book.inventory, 2)
+        self.assertEqual(
+            Reservation.objects.get().borrowing,
+            live_borrowing
+        )
+
+
+class CreateBorrowingReservationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            **sample_user()
+        )
+        self.client.force_authenticate(
+            user=self.user
+        )
+        self.book = Book.objects.create(
+            **sample_book(inventory=1)
+        )
+
+    @patch(
+        "stripe.checkout.Session.create",
+        return_value=STRIPE_SESSION
+    )
+    def test_pending_checkout_holds_the_last_copy(self, mock_create):
+        first_response = self.client.post(
+            BORROWING_LIST_URL,
+            data=sample_borrowing(book=self.book.id),
+        )
+        second_response = self.client.post(
+            BORROWING_LIST_URL,
+            data=sample_borrowing(book=self.book.id),
+        )
+        self.book.refresh_from_db()
+
+        self.assertEqual(
+            first_response.status_code,
+            status.HTTP_201_CREATED
+        )
+        self.assertEqual(
+            second_response.data,
+            {
+                "book":
+                    [f'No "{self.book.title}" books left']
+            }
+        )
+        self.assertEqual(self.book.inventory, 1)
+        self.assertEqual(self.book.reserved, 1)
+        self.assertEqual(mock_create.call_count, 1)
@@ -0,0 +1,209 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.models import Book
+from books.search import rebuild_search_index, search_books
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_book
+)
+
+BOOK_SEARCH_URL = reverse("books:book-search")
+
+
+def titles(response):
+    return [book["title"] for book in response.data["results"]]
+
+
+class BookSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        Book.objects.create(
+            **sample_book(title="The Hobbit", author="J. R. R. Tolkien")
+        )
+        Book.objects.create(
+            **sample_book(
+                title="The Lord of the Rings",
+                author="J. R. R. Tolkien",
+                cover="S",
+                daily_fee=Decimal("3.00")
+            )
+        )
+        Book.objects.create(
+            **sample_book(
+                title="Tolkien: A Biography",
+                author="Humphrey Carpenter",
+                inventory=1
+            )
+        )
+        Book.objects.create(
+            **sample_book(title="Dune", author="Frank Herbert")
+        )
+
+    def test_search_matches_title_and_author_prefixes(self):
+        response = self.client.get(BOOK_SEARCH_URL, {"q": "tolk"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertEqual(
+            titles(self.client.get(BOOK_SEARCH_URL, {"q": "herb dun"})),
+            ["Dune"]
+        )
+
+    def test_title_matches_rank_first(self):
+        response = self.client.get(BOOK_SEARCH_URL, {"q": "tolkien"})
+
+        self.assertEqual(titles(response)[0], "Tolkien: A Biography")
+
+    def test_every_term_has_to_match(self):
+        response = self.client.get(BOOK_SEARCH_URL, {"q": "tolkien rings"})
+
+        self.assertEqual(titles(response), ["The Lord of the Rings"])
+
+    def test_search_syntax_is_not_interpreted(self):
+        response = self.client.get(
+            BOOK_SEARCH_URL,
+            {"q": 'hobbit" OR author:*'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(titles(response), [])
+
+    def test_filters(self):
+        Book.objects.filter(title="The Hobbit").update(reserved=10)
+
+        self.assertEqual(
+            titles(
+                self.client.get(BOOK_SEARCH_URL, {"q": "tolk", "cover": "S"})
+            ),
+            ["The Lord of the Rings"]
+        )
+        self.assertEqual(
+            titles(
+                self.client.get(
+                    BOOK_SEARCH_URL,
+                    {"q": "tolk", "min_fee": "2", "max_fee": "5"}
+                )
+            ),
+            ["The Lord of the Rings"]
+        )
+        self.assertNotIn(
+            "The Hobbit",
+            titles(
+                self.client.get(
+                    BOOK_SEARCH_URL,
+                    {"q": "tolk", "available": "true"}
+                )
+            )
+        )
+
+    def test_filters_without_query_list_books_by_id(self):
+        response = self.client.get(BOOK_SEARCH_URL, {"cover": "H"})
+
+        self.assertEqual(
+            titles(response),
+            ["The Hobbit", "Tolkien: A Biography", "Dune"]
+        )
+
+    def test_pages(self):
+        first = self.client.get(BOOK_SEARCH_URL, {"q": "tolk", "limit": 2})
+        second = self.client.get(first.data["next"])
+
+        self.assertEqual(len(first.data["results"]), 2)
+        self.assertIsNone(first.data["previous"])
+        self.assertEqual(len(second.data["results"]), 1)
+        self.assertIsNone(second.data["next"])
+        self.assertIsNotNone(second.data["previous"])
+
+    def test_invalid_parameters(self):
+        response = self.client.get(BOOK_SEARCH_URL, {"cover": "X"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_follows_book_changes(self):
+        book = Book.objects.get(title="Dune")
+        book.title = "Children of Dune"
+        book.save()
+        Book.objects.get(title="The Hobbit").delete()
+
+        self.assertEqual(
+            titles(self.client.get(BOOK_SEARCH_URL, {"q": "children"})),
+            ["Children of Dune"]
+        )
+        self.assertEqual(
+            titles(self.client.get(BOOK_SEARCH_URL, {"q": "hobbit"})),
+            []
+        )
+
+    def test_fallback_without_search_index(self):
+        with patch("books.search.search_index_supported", return_value=False):
+            books = search_books("tolkien RINGS", cover="S")
+
+        self.assertEqual(
+            [book.title for book in books],
+            ["The Lord of the Rings"]
+        )
+
+    def test_pages_follow_one_ranking(self):
+        Book.objects.bulk_create(
+            Book(**sample_book(title=f"Essays {index}", author="Tolkien"))
+            for index in range(30)
+        )
+        rebuild_search_index()
+        # The best match is the last one found in the index.
+        Book.objects.create(
+            **sample_book(title="Tolkien Tolkien", author="Tolkien")
+        )
+
+        ranked = [book.title for book in search_books("tolk", limit=100)]
+        pages = [
+            [
+                book.title
+                for book in search_books("tolk", limit=7, offset=offset)
+            ]
+            for offset in range(0, len(ranked), 7)
+        ]
+
+        self.assertEqual(len(ranked), 34)
+        self.assertEqual(ranked[0], "Tolkien Tolkien")
+        self.assertEqual(sum(pages, []), ranked)
+
+    def test_short_terms_match_whole_words(self):
+        Book.objects.create(**sample_book(title="Du côté de chez Swann"))
+
+        self.assertEqual(
+            [book.title for book in search_books("du")],
+            ["Du côté de chez Swann"]
+        )
+        self.assertEqual(
+            [book.title for book in search_books("dun")],
+            ["Dune"]
+        )
+
+    @override_settings(BOOK_SEARCH_MAX_RANKED=10)
+    def test_only_the_first_matches_are_ranked(self):
+        Book.objects.bulk_create(
+            Book(**sample_book(title=f"Essays {index}", author="Tolkien"))
+            for index in range(30)
+        )
+        rebuild_search_index()
+        Book.objects.create(
+            **sample_book(title="Tolkien Tolkien", author="Tolkien")
+        )
+
+        ranked = [book.title for book in search_books("tolk", limit=100)]
+        pages = [
+            [
+                book.title
+                for book in search_books("tolk", limit=3, offset=offset)
+            ]
+            for offset in range(0, 12, 3)
+        ]
+
+        self.assertEqual(len(ranked), 10)
+        self.assertNotIn("Tolkien Tolkien", ranked)
+        self.assertEqual(sum(pages, []), ranked)
@@ -1,11 +1,166 @@
-from rest_framework import viewsets
+import io
 
+from django.http import StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from books.bulk import FORMATS, export_books, format_from_name, import_books
+from books.cache import book_key, cached_book_response, catalogue_page_key
 from books.models import Book
 from books.permissions import IsAdminOrReadOnly
-from books.serializers import BookSerializer
+from books.search import search_books
+from books.serializers import BookSearchSerializer, BookSerializer
 
 
 class BookViewSet(viewsets.ModelViewSet):
+    """
+    Reading the catalogue is served from the cache, see `books.cache`.
+    """
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAdminOrReadOnly]
+
+    def list(self, request, *args, **kwargs):
+        return cached_book_response(
+            request,
+            catalogue_page_key(request),
+            lambda: super(BookViewSet, self).list(
+                request, *args, **kwargs
+            ).data
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.kwargs["pk"]
+        if not pk.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        return cached_book_response(
+            request,
+            book_key(int(pk)),
+            lambda: super(BookViewSet, self).retrieve(
+                request, *args, **kwargs
+            ).data
+        )
+
+    @extend_schema(
+        description=(
+                "Search the books by words of their title and author. "
+                "Every word of `q` has to start a word of the title or "
+                "of the author; the best matches come first. The "
+                "results can be filtered by cover, daily fee and by "
+                "the books which have copies available."
+        ),
+        parameters=[BookSearchSerializer],
+    )
+    @action(methods=["GET"], detail=False)
+    def search(self, request):
+        serializer = BookSearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        limit, offset = params["limit"], params["offset"]
+
+        books = search_books(
+            query=params.get("q"),
+            cover=params.get("cover"),
+            min_fee=params.get("min_fee"),
+            max_fee=params.get("max_fee"),
+            available=params.get("available", False),
+            limit=limit + 1,
+            offset=offset
+        )
+        url = request.build_absolute_uri()
+        previous_url = None
+        if offset:
+            previous_url = replace_query_param(
+                url, "offset", max(offset - limit, 0)
+            )
+        return Response({
+            "next": (
+                replace_query_param(url, "offset", offset + limit)
+                if len(books) > limit else None
+            ),
+            "previous": previous_url,
+            "results": self.get_serializer(books[:limit], many=True).data,
+        })
+
+    @extend_schema(
+        description=(
+                "Import books from an uploaded CSV or JSON Lines file "
+                "(staff only). Books with the title and author of an "
+                "existing book update it, the others are created. "
+                "Invalid rows are skipped and reported with their "
+                "line numbers."
+        ),
+        request={
+            "multipart/form-data": {
+                "type": "object",
+                "properties": {
+                    "file": {"type": "string", "format": "binary"},
+                    "file_format": {"type": "string", "enum": FORMATS},
+                },
+            }
+        },
+    )
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="import",
+        parser_classes=[MultiPartParser],
+        permission_classes=[IsAdminUser],
+    )
+    def import_catalogue(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise serializers.ValidationError({"file": ["No file was sent."]})
+        file_format = request.data.get("file_format") or format_from_name(
+            upload.name
+        )
+        if file_format not in FORMATS:
+            raise serializers.ValidationError(
+                {"file_format": [f"Choose one of {', '.join(FORMATS)}."]}
+            )
+
+        lines = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+        report = import_books(lines, file_format)
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+    @extend_schema(
+        description="Export the books as CSV or JSON Lines (staff only).",
+        parameters=[
+            OpenApiParameter(
+                name="file_format",
+                type=OpenApiTypes.STR,
+                enum=FORMATS,
+                location=OpenApiParameter.QUERY,
+                required=False,
+            )
+        ],
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=[IsAdminUser],
+    )
+    def export_catalogue(self, request):
+        file_format = request.query_params.get("file_format", "csv")
+        if file_format not in FORMATS:
+            raise serializers.ValidationError(
+                {"file_format": [f"Choose one of {', '.join(FORMATS)}."]}
+            )
+        return StreamingHttpResponse(
+            export_books(file_format),
+            content_type=(
+                "text/csv" if file_format == "csv"
+                else "application/jsonl"
+            ),
+            headers={
+                "Content-Disposition":
+                    f'attachment; filename="books.{file_format}"'
+            },
+        )
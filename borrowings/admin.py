@@ -1,5 +1,26 @@
 from django.contrib import admin
 
-from borrowings.models import Borrowing
+from borrowings.models import (
+    Borrowing,
+    FineCoverMultiplier,
+    FinePolicy,
+    FineTier
+)
 
 admin.site.register(Borrowing)
+
+
+class FineTierInline(admin.TabularInline):
+    model = FineTier
+    extra = 1
+
+
+class FineCoverMultiplierInline(admin.TabularInline):
+    model = FineCoverMultiplier
+    extra = 0
+
+
+@admin.register(FinePolicy)
+class FinePolicyAdmin(admin.ModelAdmin):
+    list_display = ("name", "is_active", "grace_days", "max_fine")
+    inlines = (FineTierInline, FineCoverMultiplierInline)
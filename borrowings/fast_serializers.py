@@ -0,0 +1,86 @@
+from books.fast_serializers import (
+    cover_display,
+    format_date,
+    format_datetime,
+    format_decimal
+)
+from payments.models import Payment
+
+BORROWING_LIST_VALUES = (
+    "id",
+    "user_id",
+    "borrow_date",
+    "expected_return_date",
+    "actual_return_date",
+    "book__id",
+    "book__cover",
+    "book__title",
+    "book__author",
+    "book__daily_fee",
+)
+
+
+def payments_by_borrowing(borrowing_ids) -> dict:
+    """
+    Read the payments of the borrowings with one query and
+    render them like `PaymentSerializer`.
+    """
+    payments = {}
+    rows = Payment.objects.filter(
+        borrowing_id__in=borrowing_ids
+    ).order_by(
+        "id"
+    ).values_list(
+        "borrowing_id",
+        "id",
+        "status",
+        "type",
+        "session_url",
+        "session_id",
+        "money_to_pay",
+        "out_of_stock",
+        "created_at",
+    )
+    for borrowing_id, *payment in rows:
+        payments.setdefault(borrowing_id, []).append({
+            "id": payment[0],
+            "status": payment[1],
+            "type": payment[2],
+            "session_url": payment[3],
+            "session_id": payment[4],
+            "money_to_pay": format_decimal(payment[5]),
+            "out_of_stock": payment[6],
+            "created_at": format_datetime(payment[7]),
+            "borrowing": borrowing_id,
+        })
+    return payments
+
+
+def serialize_borrowings(rows) -> list:
+    """
+    Render `BORROWING_LIST_VALUES` rows the
+    way `ReadBorrowingSerializer` does.
+    """
+    rows = list(rows)
+    covers = cover_display()
+    payments = payments_by_borrowing([row["id"] for row in rows])
+    return [
+        {
+            "id": row["id"],
+            "user": row["user_id"],
+            "borrow_date": format_date(row["borrow_date"]),
+            "expected_return_date": format_date(
+                row["expected_return_date"]
+            ),
+            "book": {
+                "id": row["book__id"],
+                "cover": covers.get(row["book__cover"], row["book__cover"]),
+                "title": row["book__title"],
+                "author": row["book__author"],
+                "daily_fee": format_decimal(row["book__daily_fee"]),
+            },
+            "actual_return_date": format_date(row["actual_return_date"]),
+            "payments": payments.get(row["id"], []),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,257 @@
+"""
+Fine policies.
+
+The active FinePolicy is compiled once into a `CompiledFinePolicy`
+and kept in the process until a policy, a tier or a cover multiplier
+is saved or deleted. That bumps a version number in the cache, so the
+other processes compile the policy again too. Without an active
+policy, a fine is twice the daily fee for every overdue day.
+
+Overdue days are charged after the grace days of the policy. From its
+first day on, a tier charges the daily fee times its multiplier and
+the multiplier of the book's cover, at most its daily cap; the whole
+fine is at most the policy's max fine.
+
+A compiled policy evaluates fines in Python, one borrowing at a time,
+and builds the matching SQL expression for whole querysets. Both
+compute in integers, fees in cents and multipliers in hundredths, and
+round half up to cents once at the end, so they give the same cents
+even where the database computes with floats, like SQLite does.
+"""
+import time
+from decimal import Decimal
+from functools import lru_cache, reduce
+from operator import add
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import models
+from django.db.models import Case, Func, Value, When
+from django.db.models.functions import Greatest, Least
+from django.db.models.lookups import GreaterThan
+
+from books.cache import now_and_on_commit
+
+FINE_POLICY_VERSION_KEY = "borrowings:fine_policy:version"
+# Fees are counted in cents times two multipliers in hundredths.
+SCALE = 100 * 100
+
+
+def to_cents(amount) -> int:
+    return int(amount * 100)
+
+
+def to_hundredths(multiplier) -> int:
+    return int(multiplier * 100)
+
+
+class CentsField(models.BigIntegerField):
+    """An amount computed in cents, read as a two-place Decimal."""
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return Decimal(int(value)).scaleb(-2)
+
+
+class Cents(Func):
+    """An amount in cents, as an integer."""
+    template = "CAST(ROUND(%(expressions)s * 100) AS BIGINT)"
+    output_field = models.BigIntegerField()
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="CAST(ROUND(%(expressions)s * 100) AS SIGNED)",
+            **extra_context
+        )
+
+
+class CompiledTier:
+    def __init__(self, first_day, last_day, factor, cover_factors, cap):
+        # Charged days are counted from 1 after the grace days.
+        self.offset = first_day - 1
+        self.length = None if last_day is None else last_day - self.offset
+        self.factor = factor
+        self.cover_factors = cover_factors
+        self.cap = cap
+
+
+class CompiledFinePolicy:
+    def __init__(self, grace_days=0, tiers=(), max_fine=None):
+        self.grace_days = grace_days
+        self.tiers = tuple(tiers)
+        self.max_fine = max_fine
+        # Fines repeat for the same fee, cover and overdue days.
+        self.evaluate = lru_cache(maxsize=2 ** 16)(self._evaluate)
+
+    @classmethod
+    def from_policy(cls, policy):
+        cover_multipliers = {
+            cover_multiplier.cover: to_hundredths(cover_multiplier.multiplier)
+            for cover_multiplier in policy.cover_multipliers.all()
+        }
+        tiers = sorted(policy.tiers.all(), key=lambda tier: tier.first_day)
+        last_days = [tier.first_day - 1 for tier in tiers[1:]] + [None]
+        return cls(
+            grace_days=policy.grace_days,
+            tiers=[
+                CompiledTier(
+                    first_day=tier.first_day,
+                    last_day=last_day,
+                    factor=to_hundredths(tier.multiplier) * 100,
+                    cover_factors={
+                        cover: to_hundredths(tier.multiplier) * multiplier
+                        for cover, multiplier in cover_multipliers.items()
+                    },
+                    cap=(
+                        None if tier.daily_cap is None
+                        else to_cents(tier.daily_cap) * SCALE
+                    )
+                )
+                for tier, last_day in zip(tiers, last_days)
+            ],
+            max_fine=(
+                None if policy.max_fine is None
+                else to_cents(policy.max_fine) * SCALE
+            )
+        )
+
+    def _evaluate(self, daily_fee, cover, overdue_days) -> Decimal:
+        cents = self.fine_cents(to_cents(daily_fee), cover, overdue_days)
+        return Decimal(cents).scaleb(-2)
+
+    def fine_cents(self, fee_cents, cover, overdue_days) -> int:
+        charged_days = max(overdue_days - self.grace_days, 0)
+        total = 0
+        for tier in self.tiers:
+            days = max(charged_days - tier.offset, 0)
+            if tier.length is not None:
+                days = min(days, tier.length)
+            rate = fee_cents * tier.cover_factors.get(cover, tier.factor)
+            if tier.cap is not None:
+                rate = min(rate, tier.cap)
+            total += days * rate
+        if self.max_fine is not None:
+            total = min(total, self.max_fine)
+        return (total + SCALE // 2) // SCALE
+
+    def expression(self, overdue_days, daily_fee, cover_field, charged=None):
+        """
+        The fine in SQL, from the expressions of the overdue days
+        and of the daily fee, and the lookup of the book's cover.
+        `charged` is a condition true where a day is charged, which
+        may be cheaper than the overdue days, e.g. on the due date;
+        the rest of the rows is fined 0 without computing the fine.
+        """
+        def integer(value):
+            return Value(value, output_field=models.BigIntegerField())
+
+        if charged is None:
+            charged = GreaterThan(overdue_days, Value(self.grace_days))
+        fee_cents = Cents(daily_fee)
+        charged_days = (
+            overdue_days - Value(self.grace_days)
+            if self.grace_days else overdue_days
+        )
+
+        terms = []
+        for tier in self.tiers:
+            days = (
+                Greatest(charged_days - Value(tier.offset), Value(0))
+                if tier.offset else charged_days
+            )
+            if tier.length is not None:
+                days = Least(days, Value(tier.length))
+            factor = integer(tier.factor)
+            if tier.cover_factors:
+                factor = Case(
+                    *(
+                        When(**{cover_field: cover}, then=integer(value))
+                        for cover, value in tier.cover_factors.items()
+                    ),
+                    default=factor,
+                    output_field=models.BigIntegerField()
+                )
+            rate = fee_cents * factor
+            if tier.cap is not None:
+                rate = Least(
+                    rate,
+                    integer(tier.cap),
+                    output_field=models.BigIntegerField()
+                )
+            terms.append(days * rate)
+
+        total = reduce(add, terms) if terms else integer(0)
+        if self.max_fine is not None:
+            total = Least(
+                total,
+                integer(self.max_fine),
+                output_field=models.BigIntegerField()
+            )
+        return Case(
+            When(
+                charged,
+                then=(total + integer(SCALE // 2)) / integer(SCALE)
+            ),
+            default=integer(0),
+            output_field=CentsField()
+        )
+
+
+DEFAULT_FINE_POLICY = CompiledFinePolicy(
+    tiers=[
+        CompiledTier(
+            first_day=1,
+            last_day=None,
+            factor=200 * 100,
+            cover_factors={},
+            cap=None
+        )
+    ]
+)
+
+_compiled = (None, None)
+
+
+def fine_policy_version() -> int:
+    version = cache.get(FINE_POLICY_VERSION_KEY)
+    if version is None:
+        cache.add(FINE_POLICY_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(FINE_POLICY_VERSION_KEY)
+    return version
+
+
+def load_fine_policy() -> CompiledFinePolicy:
+    FinePolicy = apps.get_model("borrowings", "FinePolicy")
+    policy = FinePolicy.objects.filter(
+        is_active=True
+    ).prefetch_related(
+        "tiers", "cover_multipliers"
+    ).first()
+    if policy is None:
+        return DEFAULT_FINE_POLICY
+    return CompiledFinePolicy.from_policy(policy)
+
+
+def get_fine_policy() -> CompiledFinePolicy:
+    """Return the active policy, compiled once per version."""
+    global _compiled
+    version = fine_policy_version()
+    compiled_version, policy = _compiled
+    if policy is None or compiled_version != version:
+        policy = load_fine_policy()
+        _compiled = (version, policy)
+    return policy
+
+
+def _bump_fine_policy_version():
+    try:
+        cache.incr(FINE_POLICY_VERSION_KEY)
+    except ValueError:
+        fine_policy_version()
+
+
+def invalidate_fine_policy():
+    now_and_on_commit(_bump_fine_policy_version)
@@ -1,20 +1,19 @@
-from _decimal import Decimal
-
 from rest_framework import status
 
+from books.inventory import increase_book_inventory
 from payments.models import Payment
 
 
-def fine_coefficient(expected_price: Decimal) -> Decimal:
-    return expected_price * Decimal("2")
-
-
 def finish_fine_payment(payment):
     borrowing = payment.borrowing
-    book = borrowing.book
-
     borrowing.make_today_actual_return_date()
-    borrowing.book.increase_book_inventory()
+    increase_book_inventory(borrowing.book_id)
+
+
+def fine_payment_response_message(
+        payment: Payment
+):
+    book = payment.borrowing.book
     headers = {
         "payment_type": "fine_payment"
     }
@@ -59,7 +58,59 @@ def payment_successful_response_message(
     }
 
 
-def get_payment(session_id):
-    return Payment.objects.get(
-        session_id=session_id
+def batch_payment_successful_response_message(
+        payments: list
+):
+    lines = "".join(
+        f"Book: {payment.borrowing.book.title}, "
+        f"from {payment.borrowing.borrow_date.strftime('%d %B %Y')} "
+        f"to {payment.borrowing.expected_return_date.strftime('%d %B %Y')}"
+        f"<br>"
+        for payment in payments
+    )
+    headers = {
+        "payment_type": "borrowing_payment"
+    }
+    return {
+        "message":
+            f"Payment is successful.<br><br>"
+            f"Thank you for your purchase!<br><br>"
+            f"You can now show this confirmation to a library "
+            f"staff and they will give you the books.<br><br>"
+            f"Payment IDs: "
+            f"{', '.join(str(payment.id) for payment in payments)}<br>"
+            f"{lines}<br>"
+            f"Have a nice day!",
+        "status": status.HTTP_201_CREATED,
+        "headers": headers
+    }
+
+
+def out_of_stock_response_message(
+        payment: Payment
+):
+    book = payment.borrowing.book
+    return {
+        "message":
+            f"Payment is successful, but there are no "
+            f"\"{book.title}\" books left.<br><br>"
+            f"Please contact a library staff.<br><br>"
+            f"Payment ID: {payment.id}",
+        "status": status.HTTP_409_CONFLICT,
+    }
+
+
+def get_payments(session_id) -> list:
+    """
+    The payments of the checkout session: one, or one for
+    every borrowing of a batch checkout.
+    """
+    return list(
+        Payment.objects.select_related(
+            "borrowing__book"
+        ).filter(
+            session_id=session_id
+        ).order_by(
+            "id"
+        )
     )
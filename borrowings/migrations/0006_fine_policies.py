@@ -0,0 +1,130 @@
+# Generated by Django 4.2.3 on 2026-10-18 12:16
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("borrowings", "0005_borrowing_borrowing_user_returned_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FineCoverMultiplier",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "cover",
+                    models.CharField(
+                        choices=[("H", "Hard"), ("S", "Soft")], max_length=1
+                    ),
+                ),
+                ("multiplier", models.DecimalField(decimal_places=2, max_digits=5)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="FinePolicy",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("is_active", models.BooleanField(default=False)),
+                ("grace_days", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "max_fine",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "fine policies",
+            },
+        ),
+        migrations.CreateModel(
+            name="FineTier",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "first_day",
+                    models.PositiveSmallIntegerField(
+                        default=1,
+                        validators=[django.core.validators.MinValueValidator(1)],
+                    ),
+                ),
+                ("multiplier", models.DecimalField(decimal_places=2, max_digits=5)),
+                (
+                    "daily_cap",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=8, null=True
+                    ),
+                ),
+                (
+                    "policy",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tiers",
+                        to="borrowings.finepolicy",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["first_day"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="finepolicy",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_active", True)),
+                fields=("is_active",),
+                name="fine_policy_single_active",
+            ),
+        ),
+        migrations.AddField(
+            model_name="finecovermultiplier",
+            name="policy",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="cover_multipliers",
+                to="borrowings.finepolicy",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="finetier",
+            constraint=models.UniqueConstraint(
+                fields=("policy", "first_day"), name="fine_tier_policy_first_day_unique"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="finecovermultiplier",
+            constraint=models.UniqueConstraint(
+                fields=("policy", "cover"),
+                name="fine_cover_multiplier_policy_cover_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.3 on 2026-10-18 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("borrowings", "0006_fine_policies"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="telegrammessage",
+            name="claim_token",
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="telegrammessage",
+            name="claimed_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
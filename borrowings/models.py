@@ -1,18 +1,24 @@
 from _decimal import Decimal
-from datetime import datetime
+from datetime import date, datetime
 
 from django.conf import settings
+from django.core.validators import MinValueValidator
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from books.models import Book
-from borrowings.helper_functions import fine_coefficient
-from borrowings.telegram_notification import send_to_telegram
+from borrowings.fines import invalidate_fine_policy
+from borrowings.pricing import (
+    BorrowingQuerySet,
+    borrowing_price,
+    fine_price
+)
 from payments.helper_borrowing_function import create_stripe_session
+from users.stats import refresh_stats_on_commit
 
 
-class BorrowingManager(models.Manager):
+class BorrowingManager(models.Manager.from_queryset(BorrowingQuerySet)):
     def get_queryset(self):
         return super().get_queryset().filter(
             actual_return_date=None
@@ -37,24 +43,37 @@ class Borrowing(models.Model):
         on_delete=models.CASCADE
     )
 
-    objects = models.Manager()
+    objects = BorrowingQuerySet.as_manager()
     is_active = BorrowingManager()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "actual_return_date"],
+                name="borrowing_user_returned_idx",
+            ),
+            models.Index(
+                fields=["expected_return_date"],
+                condition=models.Q(actual_return_date=None),
+                name="borrowing_active_due_idx",
+            ),
+        ]
+
     def make_today_actual_return_date(self):
         self.actual_return_date = datetime.now().date()
         self.save()
 
-    def calculate_fine_price(self) -> Decimal:
-        book = self.book
-        daily_fee = book.daily_fee
-        time_difference = (
-                datetime.now().date()
-                - self.expected_return_date
+    def calculate_fine_price(self, as_of=None) -> Decimal:
+        """
+        The fine for the days after the expected return date,
+        up to `as_of` (today by default).
+        """
+        return fine_price(
+            self.book.daily_fee,
+            self.book.cover,
+            self.expected_return_date,
+            as_of
         )
-        time_difference = time_difference.days
-        expected_price = daily_fee * time_difference
-        final_price = fine_coefficient(expected_price)
-        return final_price
 
     def calculate_borrowing_price(
             self
@@ -64,21 +83,17 @@ class Borrowing(models.Model):
         borrowing date and return date
          and calculate Decimal price
         """
-        book = self.book
-        daily_fee = book.daily_fee
-        time_difference = (
-                self.expected_return_date
-                - self.borrow_date
+        return borrowing_price(
+            self.book.daily_fee,
+            self.borrow_date,
+            self.expected_return_date
         )
-        time_difference = time_difference.days + 1
-        expected_price = daily_fee * time_difference
-        return expected_price
 
     def check_overdue(self, request):
-        today = datetime.now().date()
+        today = date.today()
         expected_return_date = self.expected_return_date
         if today > expected_return_date:
-            fine_decimal_price = self.calculate_fine_price()
+            fine_decimal_price = self.calculate_fine_price(today)
             checkout_session = create_stripe_session(
                 borrowing=self,
                 request=request,
@@ -91,6 +106,138 @@ class Borrowing(models.Model):
         return f"Borrowing #{self.pk}"
 
 
+class FinePolicy(models.Model):
+    """
+    Rules of the fines of overdue borrowings, compiled by
+    `borrowings.fines`. Only the active policy is applied.
+    """
+    name = models.CharField(max_length=100)
+    is_active = models.BooleanField(default=False)
+    grace_days = models.PositiveSmallIntegerField(default=0)
+    max_fine = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name_plural = "fine policies"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["is_active"],
+                condition=models.Q(is_active=True),
+                name="fine_policy_single_active",
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class FineTier(models.Model):
+    """
+    From its first day on, counted after the grace days, an overdue
+    day costs the daily fee times the multiplier, at most the cap.
+    """
+    policy = models.ForeignKey(
+        FinePolicy,
+        related_name="tiers",
+        on_delete=models.CASCADE
+    )
+    first_day = models.PositiveSmallIntegerField(
+        default=1,
+        validators=[MinValueValidator(1)]
+    )
+    multiplier = models.DecimalField(
+        max_digits=5,
+        decimal_places=2
+    )
+    daily_cap = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        ordering = ["first_day"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["policy", "first_day"],
+                name="fine_tier_policy_first_day_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"From day {self.first_day}: x{self.multiplier}"
+
+
+class FineCoverMultiplier(models.Model):
+    """A multiplier of the fines of the books with the cover."""
+    policy = models.ForeignKey(
+        FinePolicy,
+        related_name="cover_multipliers",
+        on_delete=models.CASCADE
+    )
+    cover = models.CharField(
+        max_length=1,
+        choices=Book.Cover.choices
+    )
+    multiplier = models.DecimalField(
+        max_digits=5,
+        decimal_places=2
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["policy", "cover"],
+                name="fine_cover_multiplier_policy_cover_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_cover_display()}: x{self.multiplier}"
+
+
+class TelegramMessage(models.Model):
+    """
+    Outbox of Telegram notifications. Rows are written in the
+    transaction that triggers the notification and are sent
+    in batches by the `send_telegram_outbox` task, which first
+    claims a batch under its own token until `claimed_until`.
+    """
+    chat_id = models.CharField(max_length=255)
+    text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    claim_token = models.UUIDField(
+        null=True,
+        blank=True
+    )
+    claimed_until = models.DateTimeField(
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(sent_at=None),
+                name="telegram_message_unsent_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Telegram message #{self.pk}"
+
+
 @receiver(post_save, sender=Borrowing)
 def my_handler(sender, instance, **kwargs):
     if not instance.actual_return_date:
@@ -105,4 +252,23 @@ def my_handler(sender, instance, **kwargs):
             f"the actual return date: "
             f"{instance.actual_return_date}"
         )
-    send_to_telegram(message)
+    TelegramMessage.objects.create(
+        chat_id=settings.TELEGRAM_CHAT_ID,
+        text=message
+    )
+
+
+@receiver(post_save, sender=Borrowing)
+@receiver(post_delete, sender=Borrowing)
+def refresh_user_borrowing_stats(sender, instance, **kwargs):
+    refresh_stats_on_commit(instance.user_id)
+
+
+@receiver(post_save, sender=FinePolicy)
+@receiver(post_delete, sender=FinePolicy)
+@receiver(post_save, sender=FineTier)
+@receiver(post_delete, sender=FineTier)
+@receiver(post_save, sender=FineCoverMultiplier)
+@receiver(post_delete, sender=FineCoverMultiplier)
+def recompile_fine_policy(sender, **kwargs):
+    invalidate_fine_policy()
@@ -0,0 +1,124 @@
+"""
+Prices and fines of borrowings.
+
+A borrowing costs the daily fee of its book for every day from the
+borrow date to the expected return date, both included. A fine is
+charged for the days the book is kept after the expected return
+date, by the active fine policy, see `borrowings.fines`.
+
+The same rules are written twice: as plain functions for a single
+borrowing, and as database expressions which `with_prices()` adds
+to a whole queryset in one query, against a single as-of date.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import models
+from django.db.models import ExpressionWrapper, F, Func, Q, Value
+from django.db.models.functions import Greatest
+
+from borrowings.fines import get_fine_policy
+
+CENTS = Decimal("0.01")
+
+
+class PriceField(models.DecimalField):
+    """
+    A computed price, rounded to cents when it is read: SQLite
+    computes with floats and does not round computed decimals.
+    """
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return Decimal(value).quantize(CENTS)
+
+
+PRICE_FIELD = PriceField(max_digits=12, decimal_places=2)
+
+
+def borrowing_price(daily_fee, borrow_date, expected_return_date):
+    days = (expected_return_date - borrow_date).days + 1
+    return daily_fee * days
+
+
+def overdue_days(expected_return_date, as_of=None) -> int:
+    as_of = as_of or date.today()
+    return max((as_of - expected_return_date).days, 0)
+
+
+def fine_price(daily_fee, cover, expected_return_date, as_of=None):
+    return get_fine_policy().evaluate(
+        daily_fee,
+        cover,
+        overdue_days(expected_return_date, as_of)
+    )
+
+
+class DaysBetween(Func):
+    """The number of days from the first date to the second one."""
+    output_field = models.IntegerField()
+    # PostgreSQL subtracts dates into a number of days.
+    template = "(%(expressions)s)"
+    arg_joiner = " - "
+
+    def __init__(self, start, end, **extra):
+        super().__init__(end, start, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="CAST(julianday(%(expressions)s) AS INTEGER)",
+            arg_joiner=") - julianday(",
+            **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="DATEDIFF(%(expressions)s)",
+            arg_joiner=", ",
+            **extra_context
+        )
+
+
+class BorrowingQuerySet(models.QuerySet):
+    def with_prices(self, as_of=None):
+        """
+        Annotate every borrowing with `rental_days`,
+        `borrowing_price`, `overdue_days` and `fine_price`,
+        with fines counted up to `as_of` (today by default).
+        """
+        as_of = as_of or date.today()
+        daily_fee = F("book__daily_fee")
+        policy = get_fine_policy()
+        return self.annotate(
+            rental_days=DaysBetween(
+                "borrow_date", "expected_return_date"
+            ) + 1,
+            overdue_days=Greatest(
+                DaysBetween(
+                    "expected_return_date",
+                    Value(as_of, output_field=models.DateField())
+                ),
+                Value(0)
+            ),
+        ).annotate(
+            borrowing_price=ExpressionWrapper(
+                daily_fee * F("rental_days"),
+                output_field=PRICE_FIELD
+            ),
+            fine_price=policy.expression(
+                F("overdue_days"),
+                daily_fee,
+                "book__cover",
+                # The due date is cheaper to compare than the days.
+                charged=Q(
+                    expected_return_date__lt=(
+                        as_of - timedelta(days=policy.grace_days)
+                    )
+                )
+            ),
+        )
@@ -0,0 +1,128 @@
+"""
+Bulk returns of borrowings at the front desk.
+
+The borrowings are read with one query and their paid payments with
+another, then sorted out: a paid borrowing which is not overdue is
+returned, the others are reported with the reason they are not. The
+clean returns are applied with one UPDATE of the borrowings and one
+UPDATE of the books per distinct number of returned copies, so most
+calls put the copies back with a single statement.
+
+A queryset UPDATE sends no post_save, so the work of the receivers
+is done here once for the whole call: a single Telegram message and
+one refresh of the stats of the borrowers.
+"""
+from collections import Counter
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from books.cache import invalidate_book_stock
+from books.models import Book
+from borrowings.models import Borrowing, TelegramMessage
+from borrowings.pricing import borrowing_price, fine_price
+from payments.models import Payment
+from users.stats import refresh_stats_on_commit
+
+RETURNED = "returned"
+OVERDUE = "overdue"
+UNPAID = "unpaid"
+ALREADY_RETURNED = "already_returned"
+NOT_FOUND = "not_found"
+
+
+@transaction.atomic
+def return_borrowings(borrowing_ids, today=None) -> list:
+    """
+    Return the borrowings which can be returned at once and
+    report the result of every ID, in the order of the IDs:
+    {"id", "status"}, with the "fine" of an overdue borrowing.
+    A repeated ID is reported once.
+    """
+    today = today or date.today()
+    borrowing_ids = list(dict.fromkeys(borrowing_ids))
+    borrowings = {
+        row[0]: row
+        for row in Borrowing.objects.select_for_update(
+            of=("self",)
+        ).filter(
+            id__in=borrowing_ids
+        ).values_list(
+            "id",
+            "user_id",
+            "book_id",
+            "borrow_date",
+            "expected_return_date",
+            "actual_return_date",
+            "book__daily_fee",
+            "book__cover",
+        )
+    }
+    paid = set(
+        Payment.objects.filter(
+            borrowing_id__in=borrowings,
+            type=Payment.Type.PAYMENT,
+            status=Payment.Status.PAID
+        ).values_list(
+            "borrowing_id", "money_to_pay"
+        )
+    )
+
+    results = []
+    returned = []
+    for borrowing_id in borrowing_ids:
+        row = borrowings.get(borrowing_id)
+        if row is None:
+            results.append({"id": borrowing_id, "status": NOT_FOUND})
+            continue
+        (
+            _, user_id, book_id, borrow_date, expected_return_date,
+            actual_return_date, daily_fee, cover
+        ) = row
+        price = borrowing_price(daily_fee, borrow_date, expected_return_date)
+        if actual_return_date:
+            result = {"status": ALREADY_RETURNED}
+        elif (borrowing_id, price) not in paid:
+            result = {"status": UNPAID}
+        elif expected_return_date < today:
+            fine = fine_price(daily_fee, cover, expected_return_date, today)
+            result = {"status": OVERDUE, "fine": str(fine)}
+        else:
+            result = {"status": RETURNED}
+            returned.append(row)
+        results.append({"id": borrowing_id, **result})
+
+    if returned:
+        apply_returns(returned, today)
+    return results
+
+
+def apply_returns(rows, today):
+    Borrowing.objects.filter(
+        id__in=[row[0] for row in rows]
+    ).update(
+        actual_return_date=today
+    )
+
+    copies = Counter(row[2] for row in rows)
+    book_ids_by_copies = {}
+    for book_id, count in copies.items():
+        book_ids_by_copies.setdefault(count, []).append(book_id)
+    for count, book_ids in book_ids_by_copies.items():
+        Book.objects.filter(
+            pk__in=book_ids
+        ).update(
+            inventory=F("inventory") + count
+        )
+    invalidate_book_stock(*copies)
+
+    TelegramMessage.objects.create(
+        chat_id=settings.TELEGRAM_CHAT_ID,
+        text=(
+            f"{len(rows)} borrowings are returned on {today}: "
+            + ", ".join(f"#{row[0]}" for row in rows)
+        )
+    )
+    refresh_stats_on_commit(*{row[1] for row in rows})
@@ -1,14 +1,33 @@
 from datetime import datetime
 
-from django.contrib.auth import get_user_model
+from django.conf import settings
 from django.db import transaction
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from books.inventory import increase_book_inventory
+from books.models import Book
 from books.serializers import BookBorrowingSerializer
-from borrowings.models import Borrowing
-from payments.helper_borrowing_function import create_stripe_session
+from borrowings.models import Borrowing, TelegramMessage
+from borrowings.returns import RETURNED, return_borrowings
+from payments.helper_borrowing_function import (
+    create_batch_stripe_session,
+    create_stripe_session
+)
 from payments.serializers import PaymentSerializer
+from users.stats import refresh_stats_on_commit
+
+
+def validate_return_date(value):
+    """
+    Ensure that the user is unable to set
+    the return date to a time in the past.
+    """
+    if value < datetime.now().date():
+        raise serializers.ValidationError(
+            f"You can't set the return date before today"
+        )
+    return value
 
 
 class ReadBorrowingSerializer(serializers.ModelSerializer):
@@ -36,33 +55,23 @@ class CreateBorrowingSerializer(serializers.ModelSerializer):
 
     def validate_book(self, value):
         """
-        Check that the book inventory is more than zero.
+        Check that the book has copies which are not
+        reserved by pending checkouts.
         """
-        if value.inventory == 0:
+        if value.available <= 0:
             raise serializers.ValidationError(
                 f'No "{value.title}" books left'
             )
         return value
 
     def validate_expected_return_date(self, value):
-        """
-        Ensure that the user is unable to set
-        the return date to a time in the past.
-        """
-        if value < datetime.now().date():
-            raise serializers.ValidationError(
-                f"You can't set the return date before today"
-            )
-        return value
+        return validate_return_date(value)
 
     @transaction.atomic
     def create(self, validated_data):
         request = self.context.get("request")
-        user = get_user_model().objects.get(
-            pk=request.user.pk
-        )
         borrowing = Borrowing.objects.create(
-            user=user,
+            user=request.user,
             **validated_data
         )
         checkout_session = create_stripe_session(
@@ -81,6 +90,98 @@ class CreateBorrowingSerializer(serializers.ModelSerializer):
         return representation
 
 
+class BatchBorrowingItemSerializer(serializers.Serializer):
+    # A plain ID: the books of the whole cart are read at once.
+    book = serializers.IntegerField(min_value=1)
+    expected_return_date = serializers.DateField()
+
+    def validate_expected_return_date(self, value):
+        return validate_return_date(value)
+
+
+class BatchBorrowingSerializer(serializers.Serializer):
+    """
+    A cart of books borrowed with one checkout session:
+    the borrowings are created with one INSERT, the copies
+    are held with one UPDATE, and the user is notified once.
+    """
+    items = BatchBorrowingItemSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=settings.BORROWING_BATCH_MAX_SIZE
+    )
+
+    def validate_items(self, items):
+        """
+        Check all the books of the cart with one query:
+        every book exists, appears once and has copies
+        which are not reserved by pending checkouts.
+        """
+        book_ids = [item["book"] for item in items]
+        if len(set(book_ids)) != len(book_ids):
+            raise serializers.ValidationError(
+                "Every book can be borrowed only once per cart."
+            )
+        books = Book.objects.in_bulk(book_ids)
+        missing = [
+            book_id for book_id in book_ids
+            if book_id not in books
+        ]
+        if missing:
+            raise serializers.ValidationError(
+                f"No books with the IDs "
+                f"{', '.join(map(str, missing))}"
+            )
+        sold_out = [
+            books[book_id].title for book_id in book_ids
+            if books[book_id].available <= 0
+        ]
+        if sold_out:
+            raise serializers.ValidationError(
+                [f'No "{title}" books left' for title in sold_out]
+            )
+        for item in items:
+            item["book"] = books[item["book"]]
+        return items
+
+    @transaction.atomic
+    def create(self, validated_data):
+        request = self.context.get("request")
+        borrowings = Borrowing.objects.bulk_create(
+            Borrowing(
+                user=request.user,
+                **item
+            )
+            for item in validated_data["items"]
+        )
+        checkout_session = create_batch_stripe_session(
+            borrowings, request=request
+        )
+        # bulk_create sends no post_save, so the receivers'
+        # work is done here once for the whole cart.
+        TelegramMessage.objects.create(
+            chat_id=settings.TELEGRAM_CHAT_ID,
+            text="\n".join(
+                [f"{len(borrowings)} borrowings are created:"]
+                + [
+                    f"The borrowing #{borrowing.id} of "
+                    f"\"{borrowing.book.title}\", expected return "
+                    f"date: {borrowing.expected_return_date}"
+                    for borrowing in borrowings
+                ]
+            )
+        )
+        refresh_stats_on_commit(request.user.id)
+        self.checkout_session_url = checkout_session.url
+        return borrowings
+
+    def to_representation(self, instance):
+        return {
+            "borrowings": BorrowingSerializer(instance, many=True).data,
+            "checkout_session_url": self.checkout_session_url
+        }
+
+
 class BorrowingSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -91,26 +192,32 @@ class BorrowingSerializer(serializers.ModelSerializer):
 class ReturnBorrowingSerializer(serializers.Serializer):
 
     def return_borrowing(self):
+        """
+        The checks run from the cheapest to the most expensive:
+        the loaded borrowing, then one query for its payment, and
+        only then the fine's checkout session, which may need a
+        call to the payment gateway.
+        """
         borrowing = self.context.get("borrowing")
         request = self.context.get("request")
         book = borrowing.book
-        money_to_pay = borrowing.calculate_borrowing_price()
-        money_paid = borrowing.payments.filter(
-            money_to_pay=money_to_pay,
-            status="PAID"
-        )
-        overdue = borrowing.check_overdue(request)
 
         if borrowing.actual_return_date:
             raise ValidationError(
                 f"The book {book} has already been returned."
             )
 
+        money_to_pay = borrowing.calculate_borrowing_price()
+        money_paid = borrowing.payments.filter(
+            money_to_pay=money_to_pay,
+            status="PAID"
+        ).exists()
         if not money_paid:
             raise ValidationError(
                 "The payment for this borrowing could not be found."
             )
 
+        overdue = borrowing.check_overdue(request)
         if overdue:
             return {
                 "message":
@@ -122,9 +229,30 @@ class ReturnBorrowingSerializer(serializers.Serializer):
             }
 
         borrowing.make_today_actual_return_date()
-        book.increase_book_inventory()
+        increase_book_inventory(book.id)
 
         return {
             "message":
                 f"The book {book.title} has been returned."
         }
+
+
+class BulkReturnSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BORROWING_BULK_RETURN_MAX_SIZE
+    )
+
+    def return_borrowings(self):
+        """
+        Return the paid borrowings which are not overdue; the
+        overdue ones are left for the fine's checkout.
+        """
+        results = return_borrowings(self.validated_data["ids"])
+        return {
+            "returned": sum(
+                result["status"] == RETURNED for result in results
+            ),
+            "results": results
+        }
@@ -1,60 +1,319 @@
+import uuid
 from datetime import date, timedelta
+from decimal import Decimal
+from itertools import chain, islice
+from math import ceil
 
-from celery import shared_task
+from celery import chord, shared_task
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
 
-from borrowings.models import Borrowing
-from borrowings.telegram_notification import send_to_telegram
+from borrowings.models import Borrowing, TelegramMessage
+from borrowings.telegram_notification import (
+    get_notifier,
+    pack_messages,
+    send_to_telegram
+)
+
+
+def overdue_borrowings_queryset(day, as_of=None):
+    """
+    Active borrowings due by the day, with only the columns
+    used by the overdue report and their prices and fines
+    as of `as_of` (today by default).
+    """
+    return Borrowing.is_active.filter(
+        expected_return_date__lte=day,
+    ).select_related(
+        "user", "book"
+    ).only(
+        "id",
+        "borrow_date",
+        "expected_return_date",
+        "user_id",
+        "user__email",
+        "user__first_name",
+        "user__last_name",
+        "book__title",
+        "book__author",
+        "book__cover",
+        "book__daily_fee",
+    ).with_prices(
+        as_of=as_of
+    ).order_by(
+        # Ordered like the partial index of active borrowings
+        # by due date, so the rows are read from the index.
+        "expected_return_date", "id"
+    )
+
+
+def render_overdue_messages(borrowings):
+    for borrowing in borrowings:
+        book = borrowing.book
+        user = borrowing.user
+        first_name = (
+            f"{user.first_name}" if user.first_name
+            else "not specified"
+        )
+        last_name = (
+            f"{user.last_name}" if user.last_name
+            else "not specified"
+        )
+        yield (
+            f"Borrowing ID: {borrowing.id},\n\n"
+            f"Borrower information:\n"
+            f"borrower id: {borrowing.user_id}\n"
+            f"borrower email: {user.email},\n"
+            f"borrower first name: {first_name}\n"
+            f"borrower last name: {last_name}\n\n"
+            f"Book:\n"
+            f"Title: {book.title},\n"
+            f"Author: {book.author},\n"
+            f"Cover: {book.get_cover_display()}\n\n"
+            f"The total price is: {borrowing.borrowing_price}$"
+        )
 
 
 @shared_task
 def send_overdue_borrowings():
+    """
+    Stream the overdue borrowings from the database, render
+    them lazily and send them packed into as few Telegram
+    messages as possible, so memory use does not depend on
+    the number of overdue borrowings.
+    Return the number of sent Telegram messages.
+    """
     current_date = date.today()
     formatted_date = current_date.strftime("%B %d, %Y")
     tomorrow = date.today() + timedelta(days=1)
+    overdue_borrowings = overdue_borrowings_queryset(
+        tomorrow,
+        as_of=current_date
+    ).iterator(
+        chunk_size=settings.OVERDUE_BORROWINGS_CHUNK_SIZE
+    )
+    messages = render_overdue_messages(overdue_borrowings)
+
+    first_message = next(messages, None)
+    if first_message is None:
+        return int(send_to_telegram(
+            f"No borrowings overdue today!"
+        ))
+
+    packs = pack_messages(
+        chain(
+            [f"Overdue borrowings, date: {formatted_date}", first_message],
+            messages
+        )
+    )
+    return get_notifier().send_in_order(packs)
+
+
+def partition_ids(queryset, size):
+    """
+    Split the ids of the queryset into consecutive
+    (first id, last id) ranges of `size` ids each.
+    Only the ids are read, through the primary key index.
+    """
+    ids = queryset.order_by(
+        "id"
+    ).values_list(
+        "id", flat=True
+    ).iterator(
+        chunk_size=settings.OVERDUE_BORROWINGS_CHUNK_SIZE
+    )
+    while True:
+        partition = list(islice(ids, size))
+        if not partition:
+            return
+        yield partition[0], partition[-1]
+
+
+@shared_task
+def dispatch_overdue_borrowings():
+    """
+    Coordinate the overdue report over several workers: split
+    the overdue borrowings into id ranges and send each range
+    from its own shard task. The chord callback posts a summary
+    once every shard has finished.
+    Partitions hold OVERDUE_PARTITION_SIZE borrowings, but there
+    are never more than OVERDUE_MAX_SHARDS of them.
+    """
+    today = date.today()
     overdue_borrowings = Borrowing.is_active.filter(
-        expected_return_date__lte=tomorrow,
-    ).prefetch_related("user", "book")
-
-    if overdue_borrowings:
-        messages = [
-            f"Overdue borrowings, date: {formatted_date}"
-        ]
-        for borrowing in overdue_borrowings:
-            book = borrowing.book
-            user = borrowing.user
-            first_name = (
-                f"{user.first_name}" if user.first_name
-                else "not specified"
-            )
-            last_name = (
-                f"{user.last_name}" if user.last_name
-                else "not specified"
-            )
-            time_difference = (
-                    borrowing.expected_return_date
-                    - borrowing.borrow_date
+        expected_return_date__lte=today + timedelta(days=1),
+    )
+    total = overdue_borrowings.count()
+    if not total:
+        return int(send_to_telegram(
+            f"No borrowings overdue today!"
+        ))
+
+    partition_size = max(
+        settings.OVERDUE_PARTITION_SIZE,
+        ceil(total / settings.OVERDUE_MAX_SHARDS)
+    )
+    shards = [
+        send_overdue_borrowings_shard.s(
+            first_id, last_id, today.isoformat()
+        )
+        for first_id, last_id in partition_ids(
+            overdue_borrowings, partition_size
+        )
+    ]
+    chord(shards)(summarise_overdue_borrowings.s(today.isoformat()))
+    return len(shards)
+
+
+@shared_task
+def send_overdue_borrowings_shard(first_id, last_id, day):
+    """
+    Render and send the overdue borrowings with ids
+    from `first_id` to `last_id` inclusive.
+    """
+    today = date.fromisoformat(day)
+    borrowings = overdue_borrowings_queryset(
+        today + timedelta(days=1),
+        as_of=today
+    ).filter(
+        id__gte=first_id,
+        id__lte=last_id
+    ).iterator(
+        chunk_size=settings.OVERDUE_BORROWINGS_CHUNK_SIZE
+    )
+    summary = {"borrowings": 0, "fines": Decimal("0")}
+
+    def count(borrowings):
+        for borrowing in borrowings:
+            summary["borrowings"] += 1
+            summary["fines"] += borrowing.fine_price
+            yield borrowing
+
+    messages = pack_messages(render_overdue_messages(count(borrowings)))
+    summary["messages"] = get_notifier().send_in_order(messages)
+    summary["fines"] = str(summary["fines"])
+    return summary
+
+
+@shared_task
+def summarise_overdue_borrowings(results, day):
+    borrowings = sum(result["borrowings"] for result in results)
+    messages = sum(result["messages"] for result in results)
+    fines = sum(Decimal(result["fines"]) for result in results)
+    send_to_telegram(
+        f"Overdue borrowings, date: "
+        f"{date.fromisoformat(day).strftime('%B %d, %Y')}\n\n"
+        f"Borrowings: {borrowings}\n"
+        f"Shards: {len(results)}\n"
+        f"Total expected fines: {fines}$"
+    )
+    return {
+        "borrowings": borrowings,
+        "messages": messages,
+        "fines": str(fines),
+    }
+
+
+def claim_outbox_batch(claim_token, now):
+    """
+    Claim a batch of pending outbox messages for one run of
+    `send_telegram_outbox`: a conditional UPDATE stamps them
+    with the run's token, so overlapping runs never claim the
+    same message. A claim lapses after TELEGRAM_OUTBOX_CLAIM_TIMEOUT
+    seconds, for the messages of a run which has died.
+    Return the claimed (id, chat_id, text) rows.
+    """
+    claimable = Q(claimed_until=None) | Q(claimed_until__lte=now)
+    candidate_ids = list(
+        TelegramMessage.objects.filter(
+            claimable,
+            sent_at=None,
+            attempts__lt=settings.TELEGRAM_OUTBOX_MAX_ATTEMPTS
+        ).order_by(
+            "id"
+        ).values_list(
+            "id", flat=True
+        )[:settings.TELEGRAM_OUTBOX_BATCH_SIZE]
+    )
+    if not candidate_ids:
+        return []
+    # The conditions are checked again by the UPDATE itself,
+    # so rows claimed by another run since the SELECT are left.
+    TelegramMessage.objects.filter(
+        claimable,
+        id__in=candidate_ids,
+        sent_at=None
+    ).update(
+        claim_token=claim_token,
+        claimed_until=now + timedelta(
+            seconds=settings.TELEGRAM_OUTBOX_CLAIM_TIMEOUT
+        )
+    )
+    return list(
+        TelegramMessage.objects.filter(
+            claim_token=claim_token,
+            sent_at=None
+        ).order_by(
+            "id"
+        ).values_list(
+            "id", "chat_id", "text"
+        )
+    )
+
+
+@shared_task
+def send_telegram_outbox():
+    """
+    Send pending outbox messages in batches. Every batch is
+    claimed first, so only this run sends it. Messages to the
+    same chat are joined into as few Telegram messages as
+    possible, and the notifier keeps the sending within
+    Telegram's rate limits.
+    """
+    claim_token = uuid.uuid4()
+    sent = 0
+    while True:
+        batch = claim_outbox_batch(claim_token, timezone.now())
+        if not batch:
+            return sent
+
+        messages_by_chat = {}
+        for message_id, chat_id, text in batch:
+            messages_by_chat.setdefault(chat_id, []).append(
+                (message_id, text)
             )
-            time_difference = time_difference.days + 1
-            expected_price = book.daily_fee * time_difference
-
-            message = (
-                f"Borrowing ID: {borrowing.id},\n\n"
-                f"Borrower information:\n"
-                f"borrower id: {borrowing.user_id}\n"
-                f"borrower email: {user.email},\n"
-                f"borrower first name: {first_name}\n"
-                f"borrower last name: {last_name}\n\n"
-                f"Book:\n"
-                f"Title: {book.title},\n"
-                f"Author: {book.author},\n"
-                f"Cover: {book.get_cover_display()}\n\n"
-                f"The total price is: {expected_price}$"
+
+        failed = False
+        for chat_id, messages in messages_by_chat.items():
+            message_ids = [message_id for message_id, _ in messages]
+            texts = [text for _, text in messages]
+            delivered = True
+            for pack in pack_messages(texts):
+                if not send_to_telegram(pack, chat_id=chat_id):
+                    delivered = False
+                    break
+
+            claimed = TelegramMessage.objects.filter(
+                id__in=message_ids,
+                claim_token=claim_token
             )
-            messages.append(message)
+            if delivered:
+                claimed.update(
+                    sent_at=timezone.now(),
+                    claim_token=None,
+                    claimed_until=None
+                )
+                sent += len(message_ids)
+            else:
+                claimed.update(
+                    attempts=F("attempts") + 1,
+                    claim_token=None,
+                    claimed_until=None
+                )
+                failed = True
 
-        for message in messages:
-            send_to_telegram(message)
-    else:
-        send_to_telegram(
-            f"No borrowings overdue today!"
-        )
+        if failed:
+            # Leave the rest for the next run instead of
+            # hammering Telegram while it is failing.
+            return sent
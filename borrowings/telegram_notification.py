@@ -1,20 +1,211 @@
-import os
+import threading
+import time
 
 import requests
-from dotenv import load_dotenv
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
 
-load_dotenv()
 
+class TelegramNotifier:
+    """
+    A Telegram Bot API client sharing one pooled keep-alive
+    session. Every request waits for its turn on the notifier's
+    RateLimiter, so messages to one chat go out at most once per
+    TELEGRAM_CHAT_MIN_INTERVAL: packing them into fewer messages,
+    not sending them at once, is what shortens a long report.
+    Requests have timeouts, and failed requests are retried with
+    exponential backoff; "429 Too Many Requests" pauses every
+    sender of the notifier for `retry_after`.
+    """
 
-def send_to_telegram(message=None):
+    def __init__(
+            self,
+            api_url=None,
+            api_token=None,
+            chat_id=None,
+            timeout=None,
+            max_retries=None,
+            backoff=None,
+            pool_size=None,
+            rate_limiter=None
+    ):
+        self.api_url = (
+            f"{api_url or settings.TELEGRAM_API_URL}/"
+            f"bot{api_token or settings.TELEGRAM_API_TOKEN}/sendMessage"
+        )
+        self.chat_id = chat_id or settings.TELEGRAM_CHAT_ID
+        self.timeout = timeout or settings.TELEGRAM_TIMEOUT
+        self.max_retries = (
+            settings.TELEGRAM_MAX_RETRIES
+            if max_retries is None else max_retries
+        )
+        self.backoff = (
+            settings.TELEGRAM_RETRY_BACKOFF
+            if backoff is None else backoff
+        )
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size or settings.TELEGRAM_POOL_SIZE
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
 
-    api_token = os.getenv("API_TOKEN")
-    chat_id = os.getenv("CHAT_ID")
-    api_url = (
-        f"https://api.telegram.org/bot{api_token}/sendMessage"
-    )
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(
+                self.paused_until,
+                time.monotonic() + seconds
+            )
 
+    def wait_for_pause(self):
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def send(self, message, chat_id=None) -> bool:
+        """
+        Send the message to the Telegram chat and
+        return whether Telegram has accepted it.
+        """
+        payload = {"chat_id": chat_id or self.chat_id, "text": message}
+        for attempt in range(self.max_retries + 1):
+            self.wait_for_pause()
+            self.rate_limiter.wait(payload["chat_id"])
+            delay = self.backoff * 2 ** attempt
+            try:
+                response = self.session.post(
+                    self.api_url,
+                    json=payload,
+                    timeout=self.timeout
+                )
+            except requests.RequestException:
+                pass
+            else:
+                if response.ok:
+                    return True
+                if response.status_code == 429:
+                    self.pause(retry_after(response, delay))
+                    delay = 0
+                elif response.status_code < 500:
+                    return False
+            if attempt < self.max_retries:
+                time.sleep(delay)
+        return False
+
+    def send_in_order(self, messages, chat_id=None) -> int:
+        """
+        Send the messages one after another, e.g. the parts of
+        a report, and return the number of delivered ones.
+        """
+        return sum(self.send(message, chat_id) for message in messages)
+
+    def close(self):
+        self.session.close()
+
+
+def retry_after(response, default):
+    """
+    Read the delay from Telegram's 429 response,
+    which is sent both in the body and in a header.
+    """
     try:
-        requests.post(api_url, json={'chat_id': chat_id, 'text': message})
-    except Exception as e:
-        return e
+        return float(response.json()["parameters"]["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        pass
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return default
+
+
+_notifier = None
+_notifier_lock = threading.Lock()
+
+
+def get_notifier() -> TelegramNotifier:
+    """Return the notifier shared by the whole process."""
+    global _notifier
+    if _notifier is None:
+        with _notifier_lock:
+            if _notifier is None:
+                _notifier = TelegramNotifier()
+    return _notifier
+
+
+@receiver(setting_changed)
+def reset_notifier(setting, **kwargs):
+    global _notifier
+    if setting.startswith("TELEGRAM_") and _notifier is not None:
+        _notifier.close()
+        _notifier = None
+
+
+def send_to_telegram(message=None, chat_id=None) -> bool:
+    return get_notifier().send(message, chat_id=chat_id)
+
+
+def pack_messages(messages, limit=None, separator="\n\n"):
+    """
+    Join consecutive messages into as few texts as possible,
+    each of them no longer than Telegram's message limit.
+    A message that is too long on its own is split into parts.
+    """
+    limit = limit or settings.TELEGRAM_MESSAGE_MAX_LENGTH
+    pack = ""
+    for message in messages:
+        while len(message) > limit:
+            if pack:
+                yield pack
+                pack = ""
+            yield message[:limit]
+            message = message[limit:]
+        if not pack:
+            pack = message
+        elif len(pack) + len(separator) + len(message) <= limit:
+            pack = f"{pack}{separator}{message}"
+        else:
+            yield pack
+            pack = message
+    if pack:
+        yield pack
+
+
+class RateLimiter:
+    """
+    Keep sending below Telegram's limits: a minimal interval
+    between messages to the same chat and a maximal number
+    of messages per second overall. Safe to share between
+    threads: every caller reserves its own slot.
+    """
+
+    def __init__(self, chat_interval=None, per_second=None):
+        self.chat_interval = (
+            settings.TELEGRAM_CHAT_MIN_INTERVAL
+            if chat_interval is None else chat_interval
+        )
+        self.interval = 1 / (
+            per_second or settings.TELEGRAM_MAX_MESSAGES_PER_SECOND
+        )
+        self.last_sent = 0.0
+        self.last_sent_to_chat = {}
+        self.lock = threading.Lock()
+
+    def wait(self, chat_id):
+        with self.lock:
+            now = time.monotonic()
+            ready_at = max(
+                now,
+                self.last_sent + self.interval,
+                self.last_sent_to_chat.get(chat_id, 0.0)
+                + self.chat_interval
+            )
+            self.last_sent = ready_at
+            self.last_sent_to_chat[chat_id] = ready_at
+        if ready_at > now:
+            time.sleep(ready_at - now)
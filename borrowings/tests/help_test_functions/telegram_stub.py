@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that give up waiting (e.g. on a timeout)
+        # close the socket before the response is written.
+        pass
+
+
+class TelegramStub:
+    """
+    A local stand-in for the Telegram Bot API. It records the
+    messages posted to `sendMessage` and the client connections
+    they came from, and answers with the queued responses (200
+    when the queue is empty), after an optional delay imitating
+    the network round-trip.
+
+    with TelegramStub(delay=0.2) as telegram:
+        with override_settings(TELEGRAM_API_URL=telegram.url):
+            ...
+    """
+
+    def __init__(self, delay=0.0, record_messages=True):
+        self.delay = delay
+        self.record_messages = record_messages
+        self.requests = 0
+        self.messages = []
+        self.connections = set()
+        self.responses = []
+        self.lock = threading.Lock()
+        self.server = QuietHTTPServer(
+            ("127.0.0.1", 0),
+            self.handler_class()
+        )
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with stub.lock:
+                    stub.requests += 1
+                    if stub.record_messages:
+                        stub.messages.append(body)
+                    stub.connections.add(self.client_address)
+                    status, payload = (
+                        stub.responses.pop(0) if stub.responses
+                        else (200, {"ok": True, "result": {}})
+                    )
+                if stub.delay:
+                    time.sleep(stub.delay)
+                content = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def respond_with(self, status, payload=None):
+        """Queue a response for the next request."""
+        self.responses.append(
+            (status, payload or {"ok": status == 200})
+        )
+
+    @property
+    def texts(self):
+        return [message["text"] for message in self.messages]
+
+    def __enter__(self):
+        threading.Thread(
+            target=self.server.serve_forever,
+            daemon=True
+        ).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,167 @@
+import datetime
+from _decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.inventory import reserve_book_copies
+from books.models import Book, Reservation
+from borrowings.models import Borrowing, TelegramMessage
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_book,
+    sample_user
+)
+from payments.gateways import track_gateway_time
+from payments.models import Payment
+from payments.tests.test_webhook import checkout_event, deliver_event
+
+User = get_user_model()
+BATCH_URL = reverse("borrowings:borrowing-batch")
+SUCCESS_URL = reverse("payments:success")
+RETURN_DATE = datetime.date.today() + datetime.timedelta(days=5)
+
+
+@override_settings(PAYMENT_GATEWAY="fake")
+class BatchBorrowingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(**sample_user())
+        self.client.force_authenticate(user=self.user)
+        self.books = [
+            Book.objects.create(
+                **sample_book(title=f"Book {index}", daily_fee=fee)
+            )
+            for index, fee in enumerate(
+                (Decimal("1.99"), Decimal("0.50"), Decimal("3.10"))
+            )
+        ]
+
+    def cart(self, books=None, expected_return_date=RETURN_DATE):
+        return {
+            "items": [
+                {
+                    "book": book.id,
+                    "expected_return_date": expected_return_date
+                }
+                for book in books or self.books
+            ]
+        }
+
+    def checkout(self, cart):
+        with track_gateway_time() as gateway_time:
+            response = self.client.post(BATCH_URL, cart, format="json")
+        return response, gateway_time.calls
+
+    def test_cart_is_paid_with_one_session(self):
+        # Whatever the size of the cart: the books, the borrowings,
+        # the stock, the reservations, the payments and the message,
+        # and two savepoints.
+        with self.assertNumQueries(10):
+            response, calls = self.checkout(self.cart())
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(calls, 1)
+        self.assertEqual(len(response.data["borrowings"]), 3)
+        payments = Payment.objects.order_by("id")
+        self.assertEqual(
+            {payment.session_url for payment in payments},
+            {response.data["checkout_session_url"]}
+        )
+        self.assertEqual(
+            [payment.money_to_pay for payment in payments],
+            [
+                borrowing.calculate_borrowing_price()
+                for borrowing in Borrowing.objects.order_by("id")
+            ]
+        )
+        self.assertEqual(Reservation.objects.count(), 3)
+        self.assertEqual(
+            [book.reserved for book in Book.objects.order_by("id")],
+            [1, 1, 1]
+        )
+        self.assertEqual(TelegramMessage.objects.count(), 1)
+
+    def test_cart_is_validated_with_one_query(self):
+        Book.objects.filter(pk=self.books[1].pk).update(reserved=10)
+
+        with self.assertNumQueries(1):
+            response, _ = self.checkout(self.cart())
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["items"],
+            ['No "Book 1" books left']
+        )
+        self.assertFalse(Borrowing.objects.exists())
+
+    def test_cart_is_not_reserved_partly(self):
+        borrowings = Borrowing.objects.bulk_create(
+            Borrowing(
+                user=self.user,
+                book=book,
+                expected_return_date=RETURN_DATE
+            )
+            for book in self.books
+        )
+        # The last copy was taken after the cart was validated.
+        Book.objects.filter(pk=self.books[2].pk).update(inventory=0)
+
+        reserved = reserve_book_copies(borrowings, timezone.now())
+
+        self.assertFalse(reserved)
+        self.assertFalse(Reservation.objects.exists())
+        self.assertEqual(
+            [book.reserved for book in Book.objects.order_by("id")],
+            [0, 0, 0]
+        )
+
+    def test_duplicate_and_missing_books_are_rejected(self):
+        duplicate, _ = self.checkout(self.cart(books=self.books * 2))
+        cart = self.cart()
+        cart["items"][0]["book"] = 1000
+        missing, _ = self.checkout(cart)
+
+        self.assertEqual(duplicate.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(missing.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Borrowing.objects.exists())
+
+    def test_past_return_date_is_rejected(self):
+        response, _ = self.checkout(
+            self.cart(expected_return_date=datetime.date(2020, 1, 1))
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_empty_and_too_large_carts_are_rejected(self):
+        empty, _ = self.checkout({"items": []})
+        large, _ = self.checkout(self.cart(books=self.books * 4))
+
+        self.assertEqual(empty.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(large.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            large.data["items"]["non_field_errors"][0].code,
+            "max_length"
+        )
+
+    def test_webhook_hands_out_every_book(self):
+        response, _ = self.checkout(self.cart())
+        session_id = Payment.objects.first().session_id
+
+        deliver_event(self.client, checkout_event(session_id=session_id))
+        success = self.client.get(SUCCESS_URL, {"session_id": session_id})
+
+        self.assertEqual(success.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(
+            Payment.objects.exclude(status=Payment.Status.PAID).exists()
+        )
+        self.assertEqual(
+            [
+                (book.inventory, book.reserved)
+                for book in Book.objects.order_by("id")
+            ],
+            [(9, 0), (9, 0), (9, 0)]
+        )
@@ -0,0 +1,128 @@
+import datetime
+from _decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.models import Book
+from borrowings.models import Borrowing
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    BORROWING_LIST_URL,
+    sample_book,
+    sample_user
+)
+from payments.models import Payment
+
+User = get_user_model()
+TOMORROW = datetime.date.today() + datetime.timedelta(days=1)
+
+
+class BorrowingListQueriesTest(TestCase):
+    """
+    The list endpoint must run the same number of queries
+    however many borrowings it returns: one for the
+    borrowings with their books and one for the payments.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            **sample_user()
+        )
+        self.client.force_authenticate(
+            user=self.user
+        )
+        self.books = Book.objects.bulk_create(
+            Book(**sample_book(title=f"Book {index}"))
+            for index in range(10)
+        )
+
+    def create_borrowings(self, number):
+        borrowings = Borrowing.objects.bulk_create(
+            Borrowing(
+                book=self.books[index % len(self.books)],
+                user=self.user,
+                expected_return_date=TOMORROW,
+            )
+            for index in range(number)
+        )
+        Payment.objects.bulk_create(
+            Payment(
+                status=Payment.Status.PAID,
+                type=Payment.Type.PAYMENT,
+                borrowing=borrowing,
+                session_url="https://checkout.stripe.com/",
+                session_id=f"cs_{borrowing.id}",
+                money_to_pay=Decimal("3.98")
+            )
+            for borrowing in borrowings
+        )
+
+    def assertListQueries(self, number, **params):
+        self.create_borrowings(number)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(BORROWING_LIST_URL, params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_one_borrowing(self):
+        response = self.assertListQueries(1)
+
+        borrowing = response.data["results"][0]
+        self.assertEqual(
+            set(borrowing["book"]),
+            {"id", "cover", "title", "author", "daily_fee"}
+        )
+        self.assertEqual(len(borrowing["payments"]), 1)
+        self.assertEqual(
+            set(borrowing["payments"][0]),
+            {
+                "id",
+                "status",
+                "type",
+                "borrowing",
+                "session_url",
+                "session_id",
+                "money_to_pay",
+                "out_of_stock",
+                "created_at",
+            }
+        )
+
+    def test_hundred_borrowings(self):
+        self.assertListQueries(100, is_active="true")
+
+    def test_ten_thousand_borrowings(self):
+        self.create_borrowings(10000)
+        page_size = settings.PAGINATION_MAX_PAGE_SIZE
+        url, params, ids = BORROWING_LIST_URL, {"page_size": page_size}, []
+
+        while url:
+            with self.assertNumQueries(2):
+                response = self.client.get(url, params)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            results = response.data["results"]
+            self.assertLessEqual(len(results), page_size)
+            ids.extend(borrowing["id"] for borrowing in results)
+            url, params = response.data["next"], None
+
+        self.assertGreater(10000 // page_size, 1)
+        self.assertEqual(len(ids), 10000)
+        self.assertEqual(len(set(ids)), 10000)
+
+    def test_borrowings_are_not_duplicated(self):
+        self.create_borrowings(3)
+
+        response = self.client.get(BORROWING_LIST_URL)
+
+        ids = [
+            borrowing["id"] for borrowing in response.data["results"]
+        ]
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(len(set(ids)), 3)
@@ -0,0 +1,134 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.models import Book
+from borrowings.models import Borrowing, TelegramMessage
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_book,
+    sample_user
+)
+from payments.models import Payment
+from users.models import UserBorrowingStats
+
+User = get_user_model()
+BULK_RETURN_URL = reverse("borrowings:borrowing-bulk-return")
+TODAY = datetime.date.today()
+
+
+class BulkReturnTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            user=User.objects.create_superuser(
+                **sample_user(email="desk@example.com")
+            )
+        )
+        self.user = User.objects.create_user(**sample_user())
+        self.books = [
+            Book.objects.create(**sample_book(title=f"Book {index}"))
+            for index in range(2)
+        ]
+
+    def borrow(self, book, days=3, paid=True):
+        borrowing = Borrowing.objects.create(
+            book=book,
+            user=self.user,
+            expected_return_date=TODAY + datetime.timedelta(days=days)
+        )
+        Borrowing.objects.filter(pk=borrowing.pk).update(
+            borrow_date=TODAY - datetime.timedelta(days=10)
+        )
+        borrowing.refresh_from_db()
+        if paid:
+            Payment.objects.create(
+                status=Payment.Status.PAID,
+                type=Payment.Type.PAYMENT,
+                borrowing=borrowing,
+                session_url="https://checkout.stripe.com/paid",
+                session_id=f"cs_{borrowing.id}",
+                money_to_pay=borrowing.calculate_borrowing_price()
+            )
+        return borrowing
+
+    def bulk_return(self, ids):
+        return self.client.post(BULK_RETURN_URL, {"ids": ids}, format="json")
+
+    def test_results_of_every_id(self):
+        clean = self.borrow(self.books[0])
+        overdue = self.borrow(self.books[0], days=-2)
+        unpaid = self.borrow(self.books[1], paid=False)
+        returned = self.borrow(self.books[1])
+        returned.make_today_actual_return_date()
+
+        response = self.bulk_return(
+            [clean.id, overdue.id, unpaid.id, returned.id, 1000, clean.id]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["returned"], 1)
+        self.assertEqual(
+            response.data["results"],
+            [
+                {"id": clean.id, "status": "returned"},
+                {
+                    "id": overdue.id,
+                    "status": "overdue",
+                    "fine": str(overdue.calculate_fine_price())
+                },
+                {"id": unpaid.id, "status": "unpaid"},
+                {"id": returned.id, "status": "already_returned"},
+                {"id": 1000, "status": "not_found"},
+            ]
+        )
+        clean.refresh_from_db()
+        overdue.refresh_from_db()
+        self.assertEqual(clean.actual_return_date, TODAY)
+        self.assertIsNone(overdue.actual_return_date)
+
+    def test_copies_are_put_back_per_book(self):
+        borrowings = [
+            self.borrow(self.books[0]),
+            self.borrow(self.books[0]),
+            self.borrow(self.books[1]),
+        ]
+        TelegramMessage.objects.all().delete()
+
+        # The borrowings and their payments, one UPDATE of the
+        # borrowings, one UPDATE per distinct number of copies
+        # and the message, in a savepoint.
+        with self.assertNumQueries(8):
+            self.bulk_return([borrowing.id for borrowing in borrowings])
+
+        self.assertEqual(
+            [book.inventory for book in Book.objects.order_by("id")],
+            [12, 11]
+        )
+        self.assertEqual(TelegramMessage.objects.count(), 1)
+
+    def test_stats_of_the_borrowers_are_refreshed(self):
+        borrowing = self.borrow(self.books[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bulk_return([borrowing.id])
+
+        self.assertEqual(
+            UserBorrowingStats.objects.get(user=self.user).active_count,
+            0
+        )
+
+    def test_bulk_return_is_staff_only(self):
+        self.client.force_authenticate(user=self.user)
+
+        response = self.bulk_return([1])
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_empty_list_is_rejected(self):
+        response = self.bulk_return([])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -2,7 +2,7 @@ import datetime
 import uuid
 from _decimal import Decimal
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from django.contrib.auth import get_user_model
 from rest_framework import status
@@ -120,6 +120,7 @@ class CreateBorrowingUnauthorizedUserTest(TestCase):
         )
 
 
+@override_settings(PAYMENT_GATEWAY="fake")
 class CreateBorrowingAuthorizedUserTest(TestCase):
 
     def setUp(self) -> None:
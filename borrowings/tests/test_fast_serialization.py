@@ -0,0 +1,95 @@
+import datetime
+from _decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from books.models import Book
+from borrowings.models import Borrowing
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    BORROWING_LIST_URL,
+    sample_book,
+    sample_user
+)
+from payments.models import Payment
+
+User = get_user_model()
+TODAY = datetime.date.today()
+
+
+class FastBorrowingListTest(TestCase):
+    """
+    The `.values()` list path has to render
+    exactly the JSON of `ReadBorrowingSerializer`.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            **sample_user()
+        )
+        self.user = User.objects.create_user(
+            **sample_user(email="reader@reader.com")
+        )
+        hard_book = Book.objects.create(
+            **sample_book()
+        )
+        soft_book = Book.objects.create(
+            **sample_book(cover="S", daily_fee=Decimal("0.50"))
+        )
+        for index in range(6):
+            borrowing = Borrowing.objects.create(
+                book=soft_book if index % 2 else hard_book,
+                user=self.user if index % 3 else self.admin,
+                expected_return_date=TODAY + datetime.timedelta(days=index),
+                actual_return_date=TODAY if index == 4 else None
+            )
+            for number in range(index % 3):
+                Payment.objects.create(
+                    status=Payment.Status.PAID if number else "PENDING",
+                    type=Payment.Type.FINE if number else "PAYMENT",
+                    borrowing=borrowing,
+                    session_url=f"https://checkout.stripe.com/{index}",
+                    session_id=f"cs_{index}_{number}",
+                    money_to_pay=Decimal("10.5")
+                )
+
+    def assert_same_content(self, user, url, params=None):
+        self.client.force_authenticate(user=user)
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            expected = self.client.get(url, params)
+        with override_settings(FAST_LIST_SERIALIZATION=True):
+            response = self.client.get(url, params)
+
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        return response
+
+    def test_admin_list_is_byte_identical(self):
+        response = self.assert_same_content(self.admin, BORROWING_LIST_URL)
+
+        self.assertEqual(len(response.data["results"]), 6)
+
+    def test_filtered_list_is_byte_identical(self):
+        self.assert_same_content(
+            self.admin,
+            BORROWING_LIST_URL,
+            {"user_id": self.user.id, "is_active": "true"}
+        )
+        self.assert_same_content(self.user, BORROWING_LIST_URL)
+
+    def test_pages_are_byte_identical(self):
+        response = self.assert_same_content(
+            self.admin,
+            BORROWING_LIST_URL,
+            {"page_size": 4}
+        )
+
+        self.assert_same_content(self.admin, response.data["next"])
+
+    def test_fast_list_reads_payments_with_one_query(self):
+        self.client.force_authenticate(user=self.admin)
+
+        with self.assertNumQueries(2):
+            self.client.get(BORROWING_LIST_URL)
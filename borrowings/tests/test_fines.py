@@ -0,0 +1,186 @@
+import datetime
+from _decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.db.models import F
+from django.test import TestCase
+
+from books.models import Book
+from borrowings.fines import get_fine_policy
+from borrowings.models import (
+    Borrowing,
+    FineCoverMultiplier,
+    FinePolicy,
+    FineTier
+)
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_book,
+    sample_user
+)
+
+User = get_user_model()
+TODAY = datetime.date.today()
+FEE = Decimal("1.99")
+
+
+def sample_policy(**params):
+    defaults = {
+        "name": "Tiered",
+        "is_active": True,
+        "grace_days": 2,
+        "max_fine": Decimal("100.00")
+    }
+    defaults.update(params)
+
+    policy = FinePolicy.objects.create(**defaults)
+    FineTier.objects.create(
+        policy=policy,
+        first_day=1,
+        multiplier=Decimal("1.50")
+    )
+    FineTier.objects.create(
+        policy=policy,
+        first_day=8,
+        multiplier=Decimal("3.00"),
+        daily_cap=Decimal("5.00")
+    )
+    FineCoverMultiplier.objects.create(
+        policy=policy,
+        cover=Book.Cover.SOFT,
+        multiplier=Decimal("0.75")
+    )
+    return policy
+
+
+class FinePolicyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        # The rolled back policy is still compiled in the process.
+        cache.clear()
+
+    def fine(self, overdue_days, cover=Book.Cover.HARD, daily_fee=FEE):
+        return get_fine_policy().evaluate(daily_fee, cover, overdue_days)
+
+    def test_default_policy_charges_twice_the_daily_fee(self):
+        self.assertEqual(self.fine(0), Decimal("0.00"))
+        self.assertEqual(self.fine(3), FEE * 3 * 2)
+
+    def test_grace_days_are_not_charged(self):
+        sample_policy()
+
+        self.assertEqual(self.fine(2), Decimal("0.00"))
+        self.assertEqual(self.fine(3), Decimal("2.99"))
+
+    def test_tiers_and_daily_cap(self):
+        sample_policy()
+
+        # 7 days at 1.5 x 1.99, then 3 days at min(3 x 1.99, 5.00).
+        self.assertEqual(
+            self.fine(12),
+            Decimal("20.90") + Decimal("15.00")
+        )
+
+    def test_cover_multiplier(self):
+        sample_policy()
+
+        self.assertEqual(self.fine(3, cover=Book.Cover.SOFT), Decimal("2.24"))
+
+    def test_max_fine(self):
+        sample_policy()
+
+        self.assertEqual(self.fine(1000), Decimal("100.00"))
+
+    def test_policy_is_compiled_again_when_it_changes(self):
+        policy = sample_policy()
+        self.assertEqual(self.fine(1000), Decimal("100.00"))
+
+        policy.max_fine = None
+        policy.save()
+
+        self.assertGreater(self.fine(1000), Decimal("100.00"))
+
+        FineTier.objects.filter(policy=policy).delete()
+
+        self.assertEqual(self.fine(1000), Decimal("0.00"))
+
+    def test_compiled_policy_is_kept_between_calls(self):
+        sample_policy()
+        get_fine_policy()
+
+        with self.assertNumQueries(0):
+            get_fine_policy()
+
+    def test_inactive_policy_is_ignored(self):
+        sample_policy(is_active=False)
+
+        self.assertEqual(self.fine(3), FEE * 3 * 2)
+
+    def test_only_one_policy_is_active(self):
+        sample_policy()
+
+        with self.assertRaises(IntegrityError):
+            sample_policy(name="Another")
+
+
+class FinePolicyAnnotationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        sample_policy()
+        user = User.objects.create_user(**sample_user())
+        books = [
+            Book.objects.create(**sample_book(daily_fee=fee, cover=cover))
+            for fee, cover in (
+                (Decimal("1.99"), Book.Cover.HARD),
+                (Decimal("0.05"), Book.Cover.SOFT),
+                (Decimal("12.30"), Book.Cover.SOFT),
+            )
+        ]
+        for index in range(30):
+            Borrowing.objects.create(
+                book=books[index % len(books)],
+                user=user,
+                expected_return_date=(
+                    TODAY - datetime.timedelta(days=index * 3)
+                )
+            )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_annotation_matches_the_method(self):
+        borrowings = Borrowing.objects.select_related(
+            "book"
+        ).with_prices()
+
+        for borrowing in borrowings:
+            self.assertEqual(
+                borrowing.fine_price,
+                borrowing.calculate_fine_price()
+            )
+
+    def test_fines_around_the_grace_days(self):
+        book = Book.objects.create(**sample_book(title="Grace"))
+        for days in (-5, 0, 2, 3):
+            Borrowing.objects.create(
+                book=book,
+                user=User.objects.get(),
+                expected_return_date=TODAY - datetime.timedelta(days=days)
+            )
+
+        borrowings = Borrowing.objects.select_related(
+            "book"
+        ).with_prices().annotate(
+            # Without the condition on the due date.
+            unconditional_fine=get_fine_policy().expression(
+                F("overdue_days"), F("book__daily_fee"), "book__cover"
+            )
+        )
+
+        for borrowing in borrowings:
+            fine = borrowing.calculate_fine_price()
+            self.assertEqual(borrowing.fine_price, fine)
+            self.assertEqual(borrowing.unconditional_fine, fine)
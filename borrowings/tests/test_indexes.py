@@ -0,0 +1,62 @@
+import datetime
+
+from django.db import connection
+from django.test import TestCase, skipUnlessDBFeature
+
+from borrowings.models import Borrowing
+from borrowings.tasks import overdue_borrowings_queryset
+from payments.models import Payment
+
+TODAY = datetime.date.today()
+
+
+@skipUnlessDBFeature("supports_partial_indexes")
+class BorrowingIndexesTest(TestCase):
+    """
+    Check with EXPLAIN that the frequent lookups are
+    answered from the indexes instead of table scans.
+    """
+
+    def assertUsesIndex(self, queryset, index_name):
+        if connection.vendor != "sqlite":
+            self.skipTest("The query plans are checked on SQLite.")
+        plan = queryset.explain()
+        self.assertIn(f"USING INDEX {index_name}", plan)
+        self.assertNotIn("SCAN borrowings_borrowing", plan)
+
+    def test_user_active_borrowings(self):
+        self.assertUsesIndex(
+            Borrowing.objects.filter(user_id=1, actual_return_date=None),
+            "borrowing_user_returned_idx"
+        )
+
+    def test_active_borrowings_due_by(self):
+        self.assertUsesIndex(
+            Borrowing.is_active.filter(expected_return_date__lte=TODAY),
+            "borrowing_active_due_idx"
+        )
+
+    def test_overdue_report(self):
+        self.assertUsesIndex(
+            overdue_borrowings_queryset(TODAY),
+            "borrowing_active_due_idx"
+        )
+
+    def test_payment_by_session_id(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("The query plans are checked on SQLite.")
+        plan = Payment.objects.filter(session_id="cs_test").explain()
+
+        self.assertIn("USING INDEX", plan)
+        self.assertIn("(session_id=?)", plan)
+
+
+class PaymentSessionIdTest(TestCase):
+    def test_session_id_is_unique_per_borrowing(self):
+        self.assertTrue(
+            any(
+                constraint.name == "payment_session_id_borrowing_unique"
+                and constraint.fields == ("session_id", "borrowing")
+                for constraint in Payment._meta.constraints
+            )
+        )
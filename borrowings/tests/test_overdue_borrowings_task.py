@@ -0,0 +1,150 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from books.models import Book
+from borrowings.models import Borrowing
+from borrowings.tasks import (
+    dispatch_overdue_borrowings,
+    send_overdue_borrowings
+)
+from borrowings.tests.help_test_functions.telegram_stub import (
+    TelegramStub
+)
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_book,
+    sample_user
+)
+from library_service_project.celery import app
+
+User = get_user_model()
+TODAY = datetime.date.today()
+
+
+class OverdueBorrowingsTestCase(TestCase):
+    def setUp(self):
+        self.telegram = TelegramStub()
+        self.telegram.__enter__()
+        self.addCleanup(self.telegram.__exit__, None, None, None)
+        settings_override = override_settings(
+            TELEGRAM_API_URL=self.telegram.url,
+            TELEGRAM_MESSAGE_MAX_LENGTH=1000,
+            TELEGRAM_CHAT_MIN_INTERVAL=0,
+            OVERDUE_BORROWINGS_CHUNK_SIZE=5,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(
+            **sample_user()
+        )
+        self.book = Book.objects.create(
+            **sample_book()
+        )
+
+    def create_borrowings(self, number, expected_return_date):
+        return Borrowing.objects.bulk_create(
+            Borrowing(
+                book=self.book,
+                user=self.user,
+                expected_return_date=expected_return_date,
+            )
+            for _ in range(number)
+        )
+
+
+class SendOverdueBorrowingsTest(OverdueBorrowingsTestCase):
+    def test_no_overdue_borrowings(self):
+        self.create_borrowings(2, TODAY + datetime.timedelta(days=7))
+
+        self.assertEqual(send_overdue_borrowings(), 1)
+        self.assertEqual(
+            self.telegram.texts,
+            ["No borrowings overdue today!"]
+        )
+
+    def test_overdue_borrowings_are_packed(self):
+        overdue = self.create_borrowings(
+            12, TODAY - datetime.timedelta(days=1)
+        )
+        self.create_borrowings(3, TODAY + datetime.timedelta(days=7))
+
+        with self.assertNumQueries(1):
+            sent = send_overdue_borrowings()
+
+        report = "\n\n".join(self.telegram.texts)
+        self.assertEqual(sent, len(self.telegram.messages))
+        self.assertTrue(
+            self.telegram.texts[0].startswith("Overdue borrowings, date:")
+        )
+        self.assertLess(sent, len(overdue))
+        self.assertTrue(
+            all(len(text) <= 1000 for text in self.telegram.texts)
+        )
+        self.assertEqual(report.count("Borrowing ID:"), len(overdue))
+        # The packs arrive in the order of the report.
+        positions = [
+            report.index(f"Borrowing ID: {borrowing.id},")
+            for borrowing in overdue
+        ]
+        self.assertEqual(positions, sorted(positions))
+        self.assertIn("borrower email: ", report)
+        self.assertIn("Cover: Hard", report)
+
+
+@override_settings(
+    OVERDUE_PARTITION_SIZE=4,
+    OVERDUE_MAX_SHARDS=3,
+)
+class DispatchOverdueBorrowingsTest(OverdueBorrowingsTestCase):
+    """
+    Run the partitioned report with CELERY_TASK_ALWAYS_EAGER,
+    so the shards and the chord callback run in the test.
+    """
+
+    def setUp(self):
+        super().setUp()
+        eager = app.conf.task_always_eager
+        propagates = app.conf.task_eager_propagates
+        app.conf.task_always_eager = True
+        app.conf.task_eager_propagates = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", eager)
+        self.addCleanup(
+            setattr, app.conf, "task_eager_propagates", propagates
+        )
+
+    def test_no_overdue_borrowings(self):
+        self.create_borrowings(2, TODAY + datetime.timedelta(days=7))
+
+        self.assertEqual(dispatch_overdue_borrowings(), 1)
+        self.assertEqual(
+            self.telegram.texts,
+            ["No borrowings overdue today!"]
+        )
+
+    def test_borrowings_are_split_into_shards(self):
+        overdue = self.create_borrowings(
+            10, TODAY - datetime.timedelta(days=2)
+        )
+        self.create_borrowings(3, TODAY + datetime.timedelta(days=7))
+
+        shards = dispatch_overdue_borrowings()
+
+        # 10 borrowings do not fit in 3 shards of 4 borrowings.
+        self.assertEqual(shards, 3)
+        summary = self.telegram.texts[-1]
+        report = "\n\n".join(self.telegram.texts[:-1])
+        self.assertEqual(report.count("Borrowing ID:"), len(overdue))
+        self.assertIn("Borrowings: 10\n", summary)
+        self.assertIn("Shards: 3\n", summary)
+        # Two days overdue, 1.99$ a day, multiplied by 2.
+        self.assertIn("Total expected fines: 79.60$", summary)
+
+    def test_partitions_cover_every_borrowing_once(self):
+        overdue = self.create_borrowings(
+            9, TODAY - datetime.timedelta(days=2)
+        )
+
+        self.assertEqual(dispatch_overdue_borrowings(), 3)
+        report = "\n\n".join(self.telegram.texts[:-1])
+        self.assertEqual(report.count("Borrowing ID:"), len(overdue))
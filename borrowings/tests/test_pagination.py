@@ -0,0 +1,134 @@
+import datetime
+from _decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from books.models import Book
+from borrowings.models import Borrowing
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    BORROWING_LIST_URL,
+    sample_book,
+    sample_user
+)
+from payments.models import Payment
+
+User = get_user_model()
+TOMORROW = datetime.date.today() + datetime.timedelta(days=1)
+BOOK_LIST_URL = reverse("books:book-list")
+PAYMENT_LIST_URL = reverse("payments:payment-list")
+
+
+class CursorPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_superuser(
+            **sample_user()
+        )
+        self.client.force_authenticate(
+            user=self.user
+        )
+        self.book = Book.objects.create(
+            **sample_book()
+        )
+
+    def create_borrowings(self, number, user=None, **params):
+        return Borrowing.objects.bulk_create(
+            Borrowing(
+                book=self.book,
+                user=user or self.user,
+                expected_return_date=TOMORROW,
+                **params
+            )
+            for _ in range(number)
+        )
+
+    def walk(self, url, params):
+        """Follow the `next` links and return every page."""
+        pages = []
+        while url:
+            response = self.client.get(url, params)
+            pages.append(response.data)
+            url, params = response.data["next"], None
+        return pages
+
+    def test_pages_cover_every_borrowing_once(self):
+        borrowings = self.create_borrowings(25)
+
+        pages = self.walk(BORROWING_LIST_URL, {"page_size": 10})
+
+        self.assertEqual(
+            [len(page["results"]) for page in pages],
+            [10, 10, 5]
+        )
+        self.assertEqual(
+            [
+                borrowing["id"]
+                for page in pages for borrowing in page["results"]
+            ],
+            [borrowing.id for borrowing in borrowings]
+        )
+
+    def test_deep_page_does_not_use_offset(self):
+        self.create_borrowings(30)
+        response = self.client.get(BORROWING_LIST_URL, {"page_size": 10})
+        response = self.client.get(response.data["next"])
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(response.data["next"])
+
+        for query in context.captured_queries:
+            self.assertNotIn("OFFSET", query["sql"])
+
+    def test_filters_are_kept_across_pages(self):
+        other_user = User.objects.create_user(
+            **sample_user()
+        )
+        active = self.create_borrowings(7, user=other_user)
+        self.create_borrowings(5, user=other_user, actual_return_date=TOMORROW)
+        self.create_borrowings(5)
+
+        pages = self.walk(
+            BORROWING_LIST_URL,
+            {"page_size": 3, "is_active": "true", "user_id": other_user.id}
+        )
+
+        self.assertEqual(
+            [
+                borrowing["id"]
+                for page in pages for borrowing in page["results"]
+            ],
+            [borrowing.id for borrowing in active]
+        )
+
+    def test_page_size_is_capped(self):
+        Book.objects.bulk_create(
+            Book(**sample_book()) for _ in range(1100)
+        )
+
+        response = self.client.get(BOOK_LIST_URL, {"page_size": 5000})
+
+        self.assertEqual(len(response.data["results"]), 1000)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_payments_are_paginated(self):
+        Payment.objects.bulk_create(
+            Payment(
+                status=Payment.Status.PAID,
+                type=Payment.Type.PAYMENT,
+                borrowing=borrowing,
+                session_url="https://checkout.stripe.com/",
+                session_id=f"cs_{borrowing.id}",
+                money_to_pay=Decimal("3.98")
+            )
+            for borrowing in self.create_borrowings(3)
+        )
+
+        response = self.client.get(PAYMENT_LIST_URL, {"page_size": 2})
+
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
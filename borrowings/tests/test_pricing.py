@@ -0,0 +1,99 @@
+import datetime
+from _decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Sum, Value
+from django.test import TestCase
+
+from books.models import Book
+from borrowings.models import Borrowing
+from borrowings.pricing import DaysBetween
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_book,
+    sample_user
+)
+
+User = get_user_model()
+TODAY = datetime.date.today()
+
+
+class WithPricesTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(**sample_user())
+        fees = (Decimal("1.99"), Decimal("0.05"), Decimal("12.30"))
+        books = [
+            Book.objects.create(**sample_book(daily_fee=fee))
+            for fee in fees
+        ]
+        for index in range(12):
+            borrowing = Borrowing.objects.create(
+                book=books[index % len(books)],
+                user=user,
+                expected_return_date=(
+                    TODAY + datetime.timedelta(days=index * 7 - 40)
+                )
+            )
+            Borrowing.objects.filter(pk=borrowing.pk).update(
+                borrow_date=(
+                    borrowing.expected_return_date
+                    - datetime.timedelta(days=index * 3)
+                )
+            )
+
+    def test_annotations_match_the_methods(self):
+        as_of = TODAY + datetime.timedelta(days=3)
+        borrowings = Borrowing.objects.select_related(
+            "book"
+        ).with_prices(
+            as_of=as_of
+        )
+
+        for borrowing in borrowings:
+            self.assertEqual(
+                borrowing.borrowing_price,
+                borrowing.calculate_borrowing_price()
+            )
+            self.assertEqual(
+                borrowing.fine_price,
+                borrowing.calculate_fine_price(as_of)
+            )
+            self.assertEqual(
+                borrowing.overdue_days,
+                max((as_of - borrowing.expected_return_date).days, 0)
+            )
+
+    def test_prices_are_computed_in_one_query(self):
+        with self.assertNumQueries(1):
+            prices = list(
+                Borrowing.is_active.with_prices().order_by(
+                    "id"
+                ).values_list(
+                    "borrowing_price", "fine_price"
+                )
+            )
+
+        self.assertEqual(len(prices), 12)
+        self.assertEqual(prices[0][1], Decimal("1.99") * 40 * 2)
+
+    def test_fines_can_be_aggregated(self):
+        total = Borrowing.objects.with_prices().aggregate(
+            total=Sum("fine_price")
+        )["total"]
+
+        self.assertEqual(
+            Decimal(total).quantize(Decimal("0.01")),
+            sum(
+                borrowing.calculate_fine_price()
+                for borrowing in Borrowing.objects.select_related("book")
+            )
+        )
+
+    def test_days_between_crosses_months_and_leap_days(self):
+        borrowing = Borrowing.objects.annotate(
+            days=DaysBetween(
+                Value(datetime.date(2024, 2, 27)),
+                Value(datetime.date(2024, 3, 2))
+            )
+        ).first()
+
+        self.assertEqual(borrowing.days, 4)
@@ -68,11 +68,11 @@ class BorrowingQuerysetTest(TestCase):
         )
         self.assertIn(
             active_borrowing.data,
-            response.data
+            response.data["results"]
         )
         self.assertNotIn(
             inactive_borrowing.data,
-            response.data
+            response.data["results"]
         )
 
     def test_list_borrowing_with_query_params_admin(self):
@@ -110,9 +110,9 @@ class BorrowingQuerysetTest(TestCase):
         )
         self.assertIn(
             active_borrowing.data,
-            response.data
+            response.data["results"]
         )
         self.assertNotIn(
             inactive_borrowing.data,
-            response.data
+            response.data["results"]
         )
@@ -0,0 +1,110 @@
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from borrowings.telegram_notification import (
+    RateLimiter,
+    TelegramNotifier,
+    get_notifier
+)
+from borrowings.tests.help_test_functions.telegram_stub import (
+    TelegramStub
+)
+
+
+class TelegramNotifierTest(SimpleTestCase):
+    def setUp(self):
+        self.telegram = TelegramStub()
+        self.telegram.__enter__()
+        self.addCleanup(self.telegram.__exit__, None, None, None)
+
+    def notifier(self, **params):
+        defaults = {
+            "api_url": self.telegram.url,
+            "api_token": "token",
+            "chat_id": "42",
+            "backoff": 0,
+            "rate_limiter": RateLimiter(chat_interval=0, per_second=1000),
+        }
+        defaults.update(params)
+        notifier = TelegramNotifier(**defaults)
+        self.addCleanup(notifier.close)
+        return notifier
+
+    def test_connection_is_reused(self):
+        notifier = self.notifier()
+
+        for number in range(5):
+            self.assertTrue(notifier.send(f"Message {number}"))
+
+        self.assertEqual(len(self.telegram.messages), 5)
+        self.assertEqual(len(self.telegram.connections), 1)
+        self.assertEqual(self.telegram.messages[0]["chat_id"], "42")
+
+    def test_server_errors_are_retried(self):
+        notifier = self.notifier(max_retries=2)
+        self.telegram.respond_with(500)
+        self.telegram.respond_with(502)
+
+        self.assertTrue(notifier.send("Message"))
+        self.assertEqual(len(self.telegram.messages), 3)
+
+    def test_retries_are_bounded(self):
+        notifier = self.notifier(max_retries=1)
+        for _ in range(3):
+            self.telegram.respond_with(500)
+
+        self.assertFalse(notifier.send("Message"))
+        self.assertEqual(len(self.telegram.messages), 2)
+
+    def test_client_errors_are_not_retried(self):
+        notifier = self.notifier(max_retries=3)
+        self.telegram.respond_with(400)
+
+        self.assertFalse(notifier.send("Message"))
+        self.assertEqual(len(self.telegram.messages), 1)
+
+    def test_too_many_requests_waits_retry_after(self):
+        notifier = self.notifier(max_retries=1)
+        self.telegram.respond_with(
+            429,
+            {"ok": False, "parameters": {"retry_after": 0.3}}
+        )
+
+        start = time.monotonic()
+        self.assertTrue(notifier.send("Message"))
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
+        self.assertEqual(len(self.telegram.messages), 2)
+
+    def test_timeout_is_retried(self):
+        self.telegram.delay = 0.5
+        notifier = self.notifier(max_retries=1, timeout=(1, 0.1))
+
+        self.assertFalse(notifier.send("Message"))
+        self.assertEqual(len(self.telegram.messages), 2)
+
+    def test_send_in_order_keeps_the_chat_interval(self):
+        notifier = self.notifier(
+            rate_limiter=RateLimiter(chat_interval=0.1, per_second=1000)
+        )
+
+        start = time.monotonic()
+        delivered = notifier.send_in_order(
+            f"Message {number}" for number in range(4)
+        )
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
+        self.assertEqual(delivered, 4)
+        self.assertEqual(
+            [message["text"] for message in self.telegram.messages],
+            [f"Message {number}" for number in range(4)]
+        )
+
+    def test_shared_notifier_follows_settings(self):
+        with override_settings(TELEGRAM_API_URL=self.telegram.url):
+            notifier = get_notifier()
+            self.assertIs(get_notifier(), notifier)
+            self.assertTrue(notifier.send("Message"))
+
+        self.assertIsNot(get_notifier(), notifier)
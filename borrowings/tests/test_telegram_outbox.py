@@ -0,0 +1,156 @@
+import datetime
+import uuid
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from books.models import Book
+from borrowings.models import Borrowing, TelegramMessage
+from borrowings.tasks import send_telegram_outbox
+from borrowings.telegram_notification import (
+    pack_messages,
+    send_to_telegram
+)
+from borrowings.tests.help_test_functions.telegram_stub import (
+    TelegramStub
+)
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_book,
+    sample_user
+)
+
+User = get_user_model()
+TOMORROW = datetime.date.today() + datetime.timedelta(days=1)
+
+
+@override_settings(
+    TELEGRAM_CHAT_ID="42",
+    TELEGRAM_CHAT_MIN_INTERVAL=0,
+    TELEGRAM_MAX_RETRIES=0,
+)
+class TelegramOutboxTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            **sample_user()
+        )
+        self.book = Book.objects.create(
+            **sample_book()
+        )
+        self.telegram = TelegramStub()
+        self.telegram.__enter__()
+        self.addCleanup(self.telegram.__exit__, None, None, None)
+        settings_override = override_settings(
+            TELEGRAM_API_URL=self.telegram.url
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create_borrowing(self):
+        return Borrowing.objects.create(
+            expected_return_date=TOMORROW,
+            book=self.book,
+            user=self.user,
+        )
+
+    @patch("requests.post")
+    def test_borrowing_write_does_not_call_telegram(self, mock_post):
+        borrowing = self.create_borrowing()
+
+        mock_post.assert_not_called()
+        message = TelegramMessage.objects.get()
+        self.assertEqual(message.chat_id, "42")
+        self.assertEqual(message.sent_at, None)
+        self.assertIn(f"#{borrowing.id} is created", message.text)
+
+    def test_rolled_back_borrowing_leaves_no_message(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.create_borrowing()
+                raise RuntimeError
+
+        self.assertFalse(TelegramMessage.objects.exists())
+
+    def test_outbox_messages_are_coalesced_per_chat(self):
+        for _ in range(3):
+            self.create_borrowing()
+        TelegramMessage.objects.create(chat_id="7", text="Other chat")
+
+        sent = send_telegram_outbox()
+
+        self.assertEqual(sent, 4)
+        self.assertEqual(len(self.telegram.messages), 2)
+        self.assertEqual(
+            sorted(message["chat_id"] for message in self.telegram.messages),
+            ["42", "7"]
+        )
+        self.assertEqual(self.telegram.texts[0].count("is created"), 3)
+        self.assertFalse(
+            TelegramMessage.objects.filter(sent_at=None).exists()
+        )
+
+    def test_failed_messages_are_retried_later(self):
+        self.create_borrowing()
+        self.telegram.respond_with(500)
+
+        self.assertEqual(send_telegram_outbox(), 0)
+        message = TelegramMessage.objects.get()
+        self.assertEqual(message.attempts, 1)
+        self.assertEqual(message.sent_at, None)
+
+        self.assertEqual(send_telegram_outbox(), 1)
+        self.assertEqual(len(self.telegram.messages), 2)
+
+
+    def test_overlapping_runs_do_not_send_twice(self):
+        self.create_borrowing()
+        overlapping_runs = []
+
+        def send_during_another_run(message, chat_id=None):
+            overlapping_runs.append(send_telegram_outbox())
+            return send_to_telegram(message, chat_id=chat_id)
+
+        with patch(
+            "borrowings.tasks.send_to_telegram",
+            side_effect=send_during_another_run
+        ):
+            self.assertEqual(send_telegram_outbox(), 1)
+
+        self.assertEqual(overlapping_runs, [0])
+        self.assertEqual(len(self.telegram.messages), 1)
+        message = TelegramMessage.objects.get()
+        self.assertIsNotNone(message.sent_at)
+        self.assertIsNone(message.claim_token)
+
+    def test_lapsed_claims_are_sent(self):
+        self.create_borrowing()
+        TelegramMessage.objects.update(
+            claim_token=uuid.uuid4(),
+            claimed_until=timezone.now() - datetime.timedelta(seconds=1)
+        )
+
+        self.assertEqual(send_telegram_outbox(), 1)
+
+    def test_live_claims_are_left(self):
+        self.create_borrowing()
+        TelegramMessage.objects.update(
+            claim_token=uuid.uuid4(),
+            claimed_until=timezone.now() + datetime.timedelta(minutes=1)
+        )
+
+        self.assertEqual(send_telegram_outbox(), 0)
+        self.assertEqual(self.telegram.messages, [])
+
+
+class PackMessagesTest(TestCase):
+    def test_messages_are_packed_up_to_the_limit(self):
+        packs = list(pack_messages(["a" * 4, "b" * 4, "c" * 4], limit=10))
+
+        self.assertEqual(packs, ["aaaa\n\nbbbb", "cccc"])
+
+    def test_long_message_is_split(self):
+        packs = list(pack_messages(["a" * 25], limit=10))
+
+        self.assertEqual(packs, ["a" * 10, "a" * 10, "a" * 5])
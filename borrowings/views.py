@@ -1,18 +1,27 @@
+from django.db.models import Prefetch
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import generics, mixins, status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSetMixin
 
+from borrowings.fast_serializers import (
+    BORROWING_LIST_VALUES,
+    serialize_borrowings
+)
 from borrowings.models import Borrowing
 from borrowings.serializers import (
+    BatchBorrowingSerializer,
     BorrowingSerializer,
+    BulkReturnSerializer,
     CreateBorrowingSerializer,
     ReadBorrowingSerializer,
     ReturnBorrowingSerializer
 )
+from library_service_project.mixins import ValuesListModelMixin
+from payments.models import Payment
 
 
 class GenericViewSet(ViewSetMixin, generics.GenericAPIView):
@@ -25,7 +34,7 @@ class GenericViewSet(ViewSetMixin, generics.GenericAPIView):
 
 
 class BorrowingViewSet(
-    mixins.ListModelMixin,
+    ValuesListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     GenericViewSet
@@ -33,10 +42,25 @@ class BorrowingViewSet(
     queryset = (
         Borrowing.objects.select_related(
             "book"
+        ).only(
+            "id",
+            "user_id",
+            "borrow_date",
+            "expected_return_date",
+            "actual_return_date",
+            "book__id",
+            "book__title",
+            "book__author",
+            "book__cover",
+            "book__daily_fee",
         ).prefetch_related(
-            "payments"
+            Prefetch(
+                "payments",
+                queryset=Payment.objects.order_by("id")
+            )
         )
     )
+    list_values = BORROWING_LIST_VALUES
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -55,7 +79,7 @@ class BorrowingViewSet(
                 actual_return_date=None
             ) if is_active else queryset
 
-        return queryset.distinct()
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -64,9 +88,16 @@ class BorrowingViewSet(
             return ReadBorrowingSerializer
         elif self.action == "return_borrowing":
             return ReturnBorrowingSerializer
+        elif self.action == "batch":
+            return BatchBorrowingSerializer
+        elif self.action == "bulk_return":
+            return BulkReturnSerializer
 
         return BorrowingSerializer
 
+    def serialize_values(self, rows) -> list:
+        return serialize_borrowings(rows)
+
     @extend_schema(
         methods=["POST"],
         description=(
@@ -145,8 +176,60 @@ class BorrowingViewSet(
         response_data = serializer.return_borrowing()
         return Response(response_data, status=status.HTTP_200_OK)
 
+    @extend_schema(
+        description=(
+                "Borrow a cart of books with one checkout session. "
+                "Every item holds a book ID and its expected return "
+                "date; a book can appear once. The response holds the "
+                "created borrowings and the URL of the checkout "
+                "session paying for all of them."
+        ),
+    )
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="batch",
+        permission_classes=[IsAuthenticated],
+    )
+    def batch(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        description=(
+                "Return many borrowings at the front desk at once "
+                "(only for admin users). Every ID gets a status: "
+                "'returned'; 'overdue', with the fine to pay, which "
+                "leaves the borrowing active; 'unpaid'; "
+                "'already_returned' or 'not_found'."
+        ),
+    )
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="bulk-return",
+        permission_classes=[IsAdminUser],
+    )
+    def bulk_return(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        response_data = serializer.return_borrowings()
+        return Response(response_data, status=status.HTTP_200_OK)
+
     @extend_schema(
         parameters=[
+            OpenApiParameter(
+                name="user_id",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description=(
+                        "Filter by the borrower id "
+                        "(only for admin users)."
+                ),
+                required=False,
+            ),
             OpenApiParameter(
                 name="is_active",
                 type=OpenApiTypes.BOOL,
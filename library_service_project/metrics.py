@@ -0,0 +1,324 @@
+"""
+Request metrics in the Prometheus text format.
+
+`RequestMetricsMiddleware` records every request under the name of
+the URL pattern it resolved to: the response time, the number and
+the time of its database queries, the time spent calling the payment
+gateway and the size of the response. Every worker process adds its
+requests up in memory, so recording one takes a lock and a few
+additions and no I/O. A background thread of the worker adds the
+totals to counters in the cache every METRICS_FLUSH_INTERVAL
+seconds, and so does rendering the metrics. With a shared cache,
+any worker serves the totals of all of them, behind by the flush
+interval at most. Telegram is
+called by the Celery workers, never while a request waits, so the
+outbound time of a request is the gateway time.
+"""
+import hashlib
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+from payments.metrics import increment, session_reuse_stats
+
+# Upper bounds of the response time buckets, in seconds.
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+UNRESOLVED_ENDPOINT = "unresolved"
+
+# The counters of a series of requests, i.e. of an endpoint, method
+# and status. The last bucket counts the requests above every bound;
+# times are counted in microseconds, as the cache adds integers.
+BUCKETS = len(DURATION_BUCKETS) + 1
+COUNTERS = tuple(f"bucket_{index}" for index in range(BUCKETS)) + (
+    "duration",
+    "queries",
+    "db_seconds",
+    "outbound_seconds",
+    "response_bytes",
+)
+DURATION, QUERIES, DB_SECONDS, OUTBOUND_SECONDS, RESPONSE_BYTES = range(
+    BUCKETS, len(COUNTERS)
+)
+SERIES_KEY = "metrics:series"
+
+
+def series_key(endpoint, method, status) -> str:
+    digest = hashlib.sha256(
+        f"{endpoint} {method} {status}".encode()
+    ).hexdigest()
+    return f"metrics:{digest}"
+
+
+def microseconds(seconds) -> int:
+    return round(seconds * 1_000_000)
+
+
+class EndpointMetrics:
+    __slots__ = (
+        "statuses",
+        "buckets",
+        "duration",
+        "queries",
+        "db_seconds",
+        "outbound_seconds",
+        "response_bytes",
+    )
+
+    def __init__(self):
+        self.statuses = {}
+        self.buckets = [0] * BUCKETS
+        self.duration = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.outbound_seconds = 0.0
+        self.response_bytes = 0
+
+    @property
+    def requests(self) -> int:
+        return sum(self.buckets)
+
+    def add(self, status, counters):
+        self.statuses[status] = sum(counters[:BUCKETS])
+        for index in range(BUCKETS):
+            self.buckets[index] += counters[index]
+        self.duration += counters[DURATION] / 1_000_000
+        self.queries += counters[QUERIES]
+        self.db_seconds += counters[DB_SECONDS] / 1_000_000
+        self.outbound_seconds += counters[OUTBOUND_SECONDS] / 1_000_000
+        self.response_bytes += counters[RESPONSE_BYTES]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        # The flushing thread is not inherited by forked workers.
+        self.flushing_pid = None
+
+    def record(
+            self,
+            endpoint,
+            method,
+            status,
+            duration,
+            queries,
+            db_seconds,
+            outbound_seconds,
+            response_bytes
+    ):
+        bucket = bisect_left(DURATION_BUCKETS, duration)
+        with self.lock:
+            counters = self.pending.get((endpoint, method, status))
+            if counters is None:
+                counters = self.pending[endpoint, method, status] = (
+                    [0] * len(COUNTERS)
+                )
+            counters[bucket] += 1
+            counters[DURATION] += microseconds(duration)
+            counters[QUERIES] += queries
+            counters[DB_SECONDS] += microseconds(db_seconds)
+            counters[OUTBOUND_SECONDS] += microseconds(outbound_seconds)
+            counters[RESPONSE_BYTES] += response_bytes
+            if self.flushing_pid == os.getpid():
+                return
+            self.flushing_pid = os.getpid()
+        threading.Thread(
+            target=self.flush_periodically,
+            name="metrics-flush",
+            daemon=True
+        ).start()
+
+    def flush_periodically(self):
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception:
+                # The totals of the interval are lost, e.g. while
+                # the cache is down; the thread keeps flushing.
+                pass
+
+    def flush(self):
+        """Add the totals of this process to the shared ones."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return
+        for series, counters in pending.items():
+            key = series_key(*series)
+            for name, value in zip(COUNTERS, counters):
+                if value:
+                    increment(f"{key}:{name}", value)
+        # A series dropped by a concurrent write of the index
+        # is added back by its next flush.
+        index = cache.get(SERIES_KEY, set())
+        if not index.issuperset(pending):
+            cache.set(SERIES_KEY, index | set(pending), None)
+
+    def snapshot(self) -> list:
+        """The shared metrics, sorted by endpoint and method."""
+        self.flush()
+        keys = {
+            series: series_key(*series)
+            for series in cache.get(SERIES_KEY, set())
+        }
+        values = cache.get_many([
+            f"{key}:{name}" for key in keys.values() for name in COUNTERS
+        ])
+        endpoints = {}
+        for (endpoint, method, status), key in keys.items():
+            metrics = endpoints.get((endpoint, method))
+            if metrics is None:
+                metrics = endpoints[endpoint, method] = EndpointMetrics()
+            metrics.add(
+                status,
+                [values.get(f"{key}:{name}", 0) for name in COUNTERS]
+            )
+        return sorted(endpoints.items())
+
+    def reset(self):
+        """Drop the totals of this process and the shared ones."""
+        with self.lock:
+            self.pending = {}
+        cache.delete_many([SERIES_KEY] + [
+            f"{series_key(*series)}:{name}"
+            for series in cache.get(SERIES_KEY, set())
+            for name in COUNTERS
+        ])
+
+
+registry = MetricsRegistry()
+
+
+def escape(value) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def labels(**values) -> str:
+    return "{" + ",".join(
+        f'{name}="{escape(value)}"' for name, value in values.items()
+    ) + "}"
+
+
+def metric(lines, name, kind, description, samples):
+    lines.append(f"# HELP {name} {description}")
+    lines.append(f"# TYPE {name} {kind}")
+    for suffix, sample_labels, value in samples:
+        lines.append(f"{name}{suffix}{sample_labels} {value}")
+
+
+def render_metrics() -> str:
+    snapshot = registry.snapshot()
+    lines = []
+
+    def per_endpoint(attribute):
+        return [
+            (
+                "",
+                labels(endpoint=endpoint, method=method),
+                getattr(metrics, attribute)
+            )
+            for (endpoint, method), metrics in snapshot
+        ]
+
+    metric(
+        lines,
+        "library_http_requests_total",
+        "counter",
+        "Requests handled, by endpoint, method and status.",
+        [
+            (
+                "",
+                labels(endpoint=endpoint, method=method, status=status),
+                count
+            )
+            for (endpoint, method), metrics in snapshot
+            for status, count in sorted(metrics.statuses.items())
+        ]
+    )
+
+    durations = []
+    for (endpoint, method), metrics in snapshot:
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS, metrics.buckets):
+            cumulative += count
+            durations.append((
+                "_bucket",
+                labels(endpoint=endpoint, method=method, le=bound),
+                cumulative
+            ))
+        durations.append((
+            "_bucket",
+            labels(endpoint=endpoint, method=method, le="+Inf"),
+            metrics.requests
+        ))
+        durations.append((
+            "_sum",
+            labels(endpoint=endpoint, method=method),
+            metrics.duration
+        ))
+        durations.append((
+            "_count",
+            labels(endpoint=endpoint, method=method),
+            metrics.requests
+        ))
+    metric(
+        lines,
+        "library_http_request_duration_seconds",
+        "histogram",
+        "Response time of the requests.",
+        durations
+    )
+
+    metric(
+        lines,
+        "library_db_queries_total",
+        "counter",
+        "Database queries run by the requests.",
+        per_endpoint("queries")
+    )
+    metric(
+        lines,
+        "library_db_query_duration_seconds_total",
+        "counter",
+        "Time of the database queries run by the requests.",
+        per_endpoint("db_seconds")
+    )
+    metric(
+        lines,
+        "library_outbound_http_duration_seconds_total",
+        "counter",
+        "Time the requests have waited for the payment gateway.",
+        per_endpoint("outbound_seconds")
+    )
+    metric(
+        lines,
+        "library_http_response_size_bytes_total",
+        "counter",
+        "Size of the response bodies.",
+        per_endpoint("response_bytes")
+    )
+
+    reuse = session_reuse_stats()
+    metric(
+        lines,
+        "library_checkout_session_reuse_total",
+        "counter",
+        "Checkout sessions handed out again or created anew.",
+        [
+            ("", labels(result="hit"), reuse["hits"]),
+            ("", labels(result="miss"), reuse["misses"]),
+        ]
+    )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,86 @@
+import time
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from library_service_project.metrics import UNRESOLVED_ENDPOINT, registry
+from payments.gateways import track_gateway_time
+
+
+class QueryTimer:
+    """A database execute wrapper counting the queries and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+def response_size(response) -> int:
+    if response.streaming:
+        return int(response.get("Content-Length") or 0)
+    return len(response.content)
+
+
+def server_timing(duration, query_timer, gateway_time) -> str:
+    entries = [
+        f"db;dur={query_timer.seconds * 1000:.1f};"
+        f'desc="{query_timer.count} queries"'
+    ]
+    if gateway_time.calls:
+        entries.append(
+            f"gateway;dur={gateway_time.seconds * 1000:.1f};"
+            f'desc="{gateway_time.calls} payment gateway calls"'
+        )
+    entries.append(f"total;dur={duration * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class RequestMetricsMiddleware:
+    """
+    Record the metrics of every request, see
+    `library_service_project.metrics`, and report its database,
+    payment gateway and total time in a `Server-Timing` header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        query_timer = QueryTimer()
+        # What connection.execute_wrapper() does, without looking
+        # the connection up through its proxy on both ends.
+        database = connections[DEFAULT_DB_ALIAS]
+        database.execute_wrappers.append(query_timer)
+        try:
+            with track_gateway_time() as gateway_time:
+                response = self.get_response(request)
+        finally:
+            database.execute_wrappers.pop()
+        duration = time.perf_counter() - start
+
+        resolver_match = getattr(request, "resolver_match", None)
+        registry.record(
+            endpoint=(
+                resolver_match.view_name if resolver_match
+                else UNRESOLVED_ENDPOINT
+            ),
+            method=request.method,
+            status=response.status_code,
+            duration=duration,
+            queries=query_timer.count,
+            db_seconds=query_timer.seconds,
+            outbound_seconds=gateway_time.seconds,
+            response_bytes=response_size(response)
+        )
+        response["Server-Timing"] = server_timing(
+            duration, query_timer, gateway_time
+        )
+        return response
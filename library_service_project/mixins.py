@@ -0,0 +1,36 @@
+from abc import ABCMeta, abstractmethod
+
+from django.conf import settings
+from rest_framework import mixins
+from rest_framework.response import Response
+
+
+class ValuesListModelMixin(mixins.ListModelMixin, metaclass=ABCMeta):
+    """
+    List a queryset read with `.values(*list_values)` and rendered
+    by `serialize_values`, so no model instance and no serializer
+    is built per row. The output has to be the same as the one of
+    the serializer; FAST_LIST_SERIALIZATION = False switches back
+    to listing through the serializer.
+    """
+    list_values = ()
+
+    @abstractmethod
+    def serialize_values(self, rows) -> list:
+        """The serializer's representation of the `.values()` rows."""
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_LIST_SERIALIZATION:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(
+            self.get_queryset()
+        ).prefetch_related(
+            None
+        ).values(
+            *self.list_values
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.serialize_values(page))
+        return Response(self.serialize_values(queryset))
@@ -0,0 +1,14 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the primary key. The cursor holds the
+    id of the last row of the previous page, so every page is
+    fetched with `WHERE id > ? ORDER BY id LIMIT ?` and deep
+    pages cost the same as the first one (there is no OFFSET).
+    """
+    ordering = "id"
+    page_size_query_param = "page_size"
+    max_page_size = settings.PAGINATION_MAX_PAGE_SIZE
@@ -1,6 +1,8 @@
 import os
 from datetime import timedelta
 from pathlib import Path
+
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -31,6 +33,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "library_service_project.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -101,12 +104,57 @@ INTERNAL_IPS = [
     "127.0.0.1",
 ]
 
+# Redis in production, the per-process memory cache otherwise.
+if os.getenv("CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("CACHE_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Catalogue pages are invalidated on every book write, the stock
+# of a book is also invalidated by the inventory helpers.
+BOOK_CATALOGUE_CACHE_TIMEOUT = 60 * 60
+BOOK_STOCK_CACHE_TIMEOUT = 5
+
+# Shorter search terms match whole words instead of prefixes, and
+# only the first matches of a search by id are ranked.
+BOOK_SEARCH_MIN_PREFIX_LENGTH = 3
+BOOK_SEARCH_MAX_RANKED = 1000
+
+# Bulk import and export of the catalogue.
+BOOK_IMPORT_CHUNK_SIZE = 1000
+BOOK_IMPORT_MAX_REPORTED_ERRORS = 1000
+# Books per UPDATE, the CASE WHEN of `bulk_update` grows with it.
+BOOK_IMPORT_UPDATE_BATCH_SIZE = 200
+BOOK_EXPORT_CHUNK_SIZE = 2000
+
+# Seconds a worker keeps its request metrics before adding them to
+# the shared totals in the cache.
+METRICS_FLUSH_INTERVAL = 10
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": (
+        "library_service_project.pagination.IdCursorPagination"
+    ),
+    "PAGE_SIZE": 100,
 }
+PAGINATION_MAX_PAGE_SIZE = 1000
+
+# List borrowings and payments from `.values()` rows instead of
+# building a model instance and a serializer for every row.
+FAST_LIST_SERIALIZATION = True
 
 SPECTACULAR_SETTINGS = {
     "TITLE": "Library service API",
@@ -119,14 +167,90 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=7),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=30),
 }
+# The verified tokens and the authenticated users are cached for
+# at most this long; a user is dropped from the cache when saved.
+USER_AUTH_CACHE_TIMEOUT = 5 * 60
 
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND")
 CELERY_TIMEZONE = "Europe/Kyiv"
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
+CELERY_BEAT_SCHEDULE = {
+    "send-telegram-outbox": {
+        "task": "borrowings.tasks.send_telegram_outbox",
+        "schedule": timedelta(seconds=10),
+    },
+    "process-stripe-events": {
+        "task": "payments.tasks.process_stripe_events",
+        "schedule": timedelta(seconds=2),
+    },
+    "release-expired-book-reservations": {
+        "task": "books.tasks.release_expired_book_reservations",
+        "schedule": timedelta(minutes=5),
+    },
+    # Borrowings become overdue at midnight without any write.
+    "rebuild-user-borrowing-stats": {
+        "task": "users.tasks.rebuild_user_borrowing_stats",
+        "schedule": crontab(hour=0, minute=5),
+    },
+}
+
+TELEGRAM_API_URL = (
+    os.getenv("TELEGRAM_API_URL") or "https://api.telegram.org"
+)
+TELEGRAM_API_TOKEN = os.getenv("API_TOKEN")
+TELEGRAM_CHAT_ID = os.getenv("CHAT_ID", "")
+# (connect, read) timeouts in seconds
+TELEGRAM_TIMEOUT = (3.05, 10)
+TELEGRAM_MAX_RETRIES = 3
+TELEGRAM_RETRY_BACKOFF = 0.5
+# Connections kept open to Telegram, one per thread sending at once
+TELEGRAM_POOL_SIZE = 8
+# Telegram allows about one message per second to the same chat
+# and 30 messages per second overall.
+TELEGRAM_CHAT_MIN_INTERVAL = 1.0
+TELEGRAM_MAX_MESSAGES_PER_SECOND = 30
+TELEGRAM_MESSAGE_MAX_LENGTH = 4096
+TELEGRAM_OUTBOX_BATCH_SIZE = 500
+TELEGRAM_OUTBOX_MAX_ATTEMPTS = 5
+# Seconds a run of the outbox task holds the messages it claimed,
+# after which the messages of a run that has died are sent again.
+TELEGRAM_OUTBOX_CLAIM_TIMEOUT = 5 * 60
+OVERDUE_BORROWINGS_CHUNK_SIZE = 2000
+# The partitioned overdue report splits the overdue borrowings
+# into shards of this size, but into no more than OVERDUE_MAX_SHARDS
+# shards, which bounds how many workers it keeps busy at once.
+OVERDUE_PARTITION_SIZE = 5000
+OVERDUE_MAX_SHARDS = 8
+# Users whose borrowing stats are rebuilt in one query batch.
+USER_STATS_CHUNK_SIZE = 1000
 
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
 STRIPE_PUBLISHABLE_KEY = os.getenv("STRIPE_PUBLISHABLE_KEY")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
+# (connect, read) timeouts of the requests to Stripe, in seconds.
+STRIPE_TIMEOUT = (3.05, 30)
+STRIPE_MAX_RETRIES = 2
+STRIPE_POOL_SIZE = 10
+# Webhook events are stored in an inbox and handled in batches.
+STRIPE_EVENT_BATCH_SIZE = 500
+STRIPE_EVENT_MAX_ATTEMPTS = 5
+
+# "stripe", or "fake" for the in-process gateway of tests and
+# offline load tests, see payments.gateways.
+PAYMENT_GATEWAY = os.getenv("PAYMENT_GATEWAY") or "stripe"
+FAKE_GATEWAY_LATENCY = float(os.getenv("FAKE_GATEWAY_LATENCY") or 0)
+FAKE_GATEWAY_FAILURE_RATE = float(os.getenv("FAKE_GATEWAY_FAILURE_RATE") or 0)
 YOUR_DOMAIN = "http://127.0.0.1:8000/"
+# Stripe expires checkout sessions after 24 hours, and the copy
+# reserved for a pending checkout is held for the same time.
+CHECKOUT_SESSION_LIFETIME = timedelta(hours=24)
+# A pending checkout session is handed out again instead of creating
+# a new one, unless it expires within this margin.
+CHECKOUT_SESSION_REUSE_MARGIN = timedelta(hours=1)
+RESERVATION_RELEASE_BATCH_SIZE = 1000
+# The most books borrowed with one batch checkout.
+BORROWING_BATCH_MAX_SIZE = 10
+# The most borrowings returned with one bulk return.
+BORROWING_BULK_RETURN_MAX_SIZE = 1000
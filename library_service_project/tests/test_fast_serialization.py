@@ -0,0 +1,109 @@
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import get_resolver
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from books.models import Book
+from borrowings.models import Borrowing
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_book,
+    sample_user
+)
+from library_service_project.mixins import ValuesListModelMixin
+from payments.models import Payment
+
+User = get_user_model()
+TODAY = datetime.date.today()
+
+
+def fast_list_views():
+    """Every view listing through `serialize_values`."""
+    # The URLconf imports every view.
+    get_resolver().url_patterns
+    views, pending = [], [ValuesListModelMixin]
+    while pending:
+        view = pending.pop()
+        pending.extend(view.__subclasses__())
+        if not view.__abstractmethods__:
+            views.append(view)
+    return views
+
+
+class FastListParityTest(TestCase):
+    """
+    `serialize_values` has to render the `.values()` rows of every
+    fast list exactly like the view's serializer renders the models.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(**sample_user())
+        reader = User.objects.create_user(
+            **sample_user(email="reader@reader.com")
+        )
+        books = [
+            Book.objects.create(**sample_book()),
+            Book.objects.create(
+                **sample_book(cover="S", daily_fee=Decimal("0.05"))
+            ),
+            Book.objects.create(
+                **sample_book(title="Sold", daily_fee=Decimal("120"))
+            ),
+        ]
+        for index in range(9):
+            borrowing = Borrowing.objects.create(
+                book=books[index % 3],
+                user=reader if index % 2 else self.admin,
+                expected_return_date=TODAY + datetime.timedelta(days=index),
+                actual_return_date=TODAY if index % 4 == 0 else None
+            )
+            for number in range(index % 3):
+                Payment.objects.create(
+                    status=Payment.Status.PAID if number else "PENDING",
+                    type=Payment.Type.FINE if index % 2 else "PAYMENT",
+                    borrowing=borrowing,
+                    session_url=f"https://checkout.stripe.com/{index}",
+                    session_id=f"cs_{index}_{number}",
+                    money_to_pay=Decimal(index) / 4,
+                    out_of_stock=index == 5
+                )
+
+    def list_view(self, view_class):
+        view = view_class()
+        view.action = "list"
+        view.args, view.kwargs = (), {}
+        view.format_kwarg = None
+        request = APIRequestFactory().get("/")
+        force_authenticate(request, user=self.admin)
+        view.request = Request(request)
+        return view
+
+    def test_every_fast_list_renders_like_its_serializer(self):
+        views = fast_list_views()
+
+        self.assertGreaterEqual(len(views), 2)
+        for view_class in views:
+            with self.subTest(view=view_class.__name__):
+                view = self.list_view(view_class)
+                queryset = view.filter_queryset(view.get_queryset())
+                expected = view.get_serializer(queryset, many=True).data
+                rows = queryset.prefetch_related(None).values(
+                    *view.list_values
+                )
+
+                self.assertTrue(expected)
+                self.assertEqual(
+                    JSONRenderer().render(view.serialize_values(rows)),
+                    JSONRenderer().render(expected)
+                )
+
+    def test_serialize_values_has_to_be_implemented(self):
+        class View(ValuesListModelMixin):
+            list_values = ("id",)
+
+        with self.assertRaises(TypeError):
+            View()
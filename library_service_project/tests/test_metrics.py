@@ -0,0 +1,228 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.models import Book
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_book,
+    sample_user
+)
+from library_service_project.metrics import (
+    COUNTERS,
+    SERIES_KEY,
+    MetricsRegistry,
+    registry,
+    series_key
+)
+from payments.metrics import record_session_reuse
+
+User = get_user_model()
+BOOK_LIST_URL = reverse("books:book-list")
+BORROWING_LIST_URL = reverse("borrowings:borrowing-list")
+METRICS_URL = reverse("metrics")
+
+
+def sample(metrics, name, **labels):
+    """The value of the sample with exactly these labels."""
+    prefix = name + "{" + ",".join(
+        f'{label}="{value}"' for label, value in labels.items()
+    ) + "} "
+    for line in metrics.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return None
+
+
+
+def record_book_list(metrics_registry, duration=0.01):
+    metrics_registry.record(
+        endpoint="books:book-list",
+        method="GET",
+        status=200,
+        duration=duration,
+        queries=1,
+        db_seconds=0.001,
+        outbound_seconds=0,
+        response_bytes=100
+    )
+
+
+def book_list_requests(metrics):
+    return sample(
+        metrics, "library_http_requests_total",
+        endpoint="books:book-list", method="GET", status=200
+    )
+
+
+class RequestMetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(**sample_user())
+        Book.objects.create(**sample_book())
+
+    def metrics(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(METRICS_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.content.decode()
+
+    def test_server_timing_reports_the_queries(self):
+        response = self.client.get(BOOK_LIST_URL)
+
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$'
+        )
+
+    def test_requests_are_recorded_per_endpoint(self):
+        responses = [self.client.get(BOOK_LIST_URL) for _ in range(3)]
+        self.client.get("/api/no-such-page/")
+
+        metrics = self.metrics()
+
+        endpoint = {"endpoint": "books:book-list", "method": "GET"}
+        self.assertEqual(
+            sample(
+                metrics, "library_http_requests_total",
+                **endpoint, status=200
+            ),
+            3
+        )
+        self.assertEqual(
+            sample(
+                metrics, "library_http_request_duration_seconds_bucket",
+                **endpoint, le="+Inf"
+            ),
+            3
+        )
+        self.assertEqual(
+            sample(
+                metrics, "library_http_response_size_bytes_total",
+                **endpoint
+            ),
+            sum(len(response.content) for response in responses)
+        )
+        self.assertGreater(
+            sample(metrics, "library_db_queries_total", **endpoint), 0
+        )
+        self.assertEqual(
+            sample(
+                metrics, "library_http_requests_total",
+                endpoint="unresolved", method="GET", status=404
+            ),
+            1
+        )
+
+    def test_totals_of_every_worker_are_served(self):
+        self.client.get(BOOK_LIST_URL)
+        other_worker = MetricsRegistry()
+        record_book_list(other_worker, duration=0.25)
+        other_worker.flush()
+
+        metrics = self.metrics()
+
+        endpoint = {"endpoint": "books:book-list", "method": "GET"}
+        self.assertEqual(
+            sample(
+                metrics, "library_http_requests_total",
+                **endpoint, status=200
+            ),
+            2
+        )
+        self.assertEqual(
+            sample(
+                metrics, "library_http_request_duration_seconds_bucket",
+                **endpoint, le=0.1
+            ),
+            1
+        )
+
+    def test_requests_are_not_flushed_while_recorded(self):
+        other_worker = MetricsRegistry()
+        record_book_list(other_worker)
+        record_book_list(other_worker)
+
+        self.assertIsNone(book_list_requests(self.metrics()))
+        other_worker.flush()
+        self.assertEqual(book_list_requests(self.metrics()), 2)
+
+    @override_settings(METRICS_FLUSH_INTERVAL=0.01)
+    def test_workers_flush_their_totals_in_the_background(self):
+        other_worker = MetricsRegistry()
+        record_book_list(other_worker)
+
+        deadline = time.monotonic() + 5
+        while not cache.get(SERIES_KEY) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(book_list_requests(self.metrics()), 1)
+
+    def test_reset_drops_the_shared_counters(self):
+        record_book_list(registry)
+        registry.flush()
+
+        registry.reset()
+
+        key = series_key("books:book-list", "GET", 200)
+        self.assertEqual(
+            cache.get_many([f"{key}:{name}" for name in COUNTERS]), {}
+        )
+        self.assertIsNone(cache.get(SERIES_KEY))
+
+    @override_settings(PAYMENT_GATEWAY="fake")
+    def test_gateway_time_is_recorded(self):
+        self.client.force_authenticate(
+            user=User.objects.create_user(
+                **sample_user(email="reader@example.com")
+            )
+        )
+        response = self.client.post(
+            BORROWING_LIST_URL,
+            {
+                "book": Book.objects.get().id,
+                "expected_return_date": "2100-01-01"
+            }
+        )
+
+        self.assertIn("gateway;dur=", response["Server-Timing"])
+        self.assertIsNotNone(
+            sample(
+                self.metrics(),
+                "library_outbound_http_duration_seconds_total",
+                endpoint="borrowings:borrowing-list",
+                method="POST"
+            )
+        )
+
+    def test_session_reuse_counters_are_exported(self):
+        record_session_reuse(True)
+        record_session_reuse(False)
+        record_session_reuse(False)
+
+        metrics = self.metrics()
+
+        self.assertEqual(
+            sample(
+                metrics, "library_checkout_session_reuse_total",
+                result="miss"
+            ),
+            2
+        )
+
+    def test_metrics_are_staff_only(self):
+        self.client.force_authenticate(
+            user=User.objects.create_user(
+                **sample_user(email="reader@example.com")
+            )
+        )
+
+        response = self.client.get(METRICS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
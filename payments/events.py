@@ -0,0 +1,161 @@
+"""
+Payment confirmation from the gateway's webhook events.
+
+The webhook only verifies an event and stores it in the StripeEvent
+inbox with one INSERT which ignores already stored event IDs, so
+bursts and redeliveries are acknowledged at once. The events are
+handled later by `process_pending_events`, in batches and in the
+order they arrived; a failed event is retried on the next run, and
+until then the later events of its borrowing wait behind it.
+
+Handling is the only path which marks a payment as paid and hands
+out the book or finishes the fine; the success redirect just reads
+the result.
+"""
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from books.inventory import fulfil_reservation
+from borrowings.helper_functions import finish_fine_payment
+from payments.models import Payment, StripeEvent
+
+PAID_EVENTS = (
+    "checkout.session.completed",
+    "checkout.session.async_payment_succeeded",
+)
+
+
+def borrowing_id_of(event):
+    """
+    The borrowing of the event's session; the first one
+    for the session of a batch checkout. None when the
+    metadata holds no valid id: the event is still stored,
+    so a verified delivery is never refused over it.
+    """
+    metadata = event["data"]["object"].get("metadata") or {}
+    try:
+        borrowing_id = int(
+            metadata.get("borrowing_id")
+            or str(metadata.get("borrowing_ids") or "").split(",")[0]
+        )
+    except (TypeError, ValueError):
+        return None
+    return borrowing_id if borrowing_id >= 0 else None
+
+
+def record_event(event, payload) -> None:
+    """Store a verified event and its raw payload in the inbox."""
+    StripeEvent.objects.bulk_create(
+        [
+            StripeEvent(
+                event_id=event["id"],
+                type=event["type"],
+                borrowing_id=borrowing_id_of(event),
+                payload=payload.decode()
+            )
+        ],
+        ignore_conflicts=True
+    )
+
+
+def handle_event(event) -> None:
+    session = event["data"]["object"]
+    if (
+            event["type"] in PAID_EVENTS
+            and session["payment_status"] == "paid"
+    ):
+        confirm_payment(session["id"])
+
+
+def process_pending_events(batch_size=None, max_attempts=None) -> int:
+    """
+    Handle the stored events which have not been handled yet.
+    Every batch is one transaction, with a savepoint per event.
+    Handlers are idempotent, so an event handled twice by
+    overlapping runs does no harm.
+    Return the number of handled events.
+    """
+    batch_size = batch_size or settings.STRIPE_EVENT_BATCH_SIZE
+    max_attempts = max_attempts or settings.STRIPE_EVENT_MAX_ATTEMPTS
+    processed = 0
+    while True:
+        batch = list(
+            StripeEvent.objects.filter(
+                processed_at=None,
+                attempts__lt=max_attempts
+            ).order_by(
+                "id"
+            ).values_list(
+                "id", "borrowing_id", "payload"
+            )[:batch_size]
+        )
+        if not batch:
+            return processed
+
+        handled, failed = [], []
+        blocked = set()
+        with transaction.atomic():
+            for event_id, borrowing_id, payload in batch:
+                if borrowing_id is not None and borrowing_id in blocked:
+                    continue
+                try:
+                    with transaction.atomic():
+                        handle_event(json.loads(payload))
+                except Exception:
+                    failed.append(event_id)
+                    blocked.add(borrowing_id)
+                    continue
+                handled.append(event_id)
+
+            StripeEvent.objects.filter(
+                id__in=handled
+            ).update(
+                processed_at=timezone.now()
+            )
+            StripeEvent.objects.filter(
+                id__in=failed
+            ).update(
+                attempts=F("attempts") + 1
+            )
+        processed += len(handled)
+        if failed or len(batch) < batch_size:
+            # Events held back behind a failed one
+            # are left for the next run.
+            return processed
+
+
+@transaction.atomic
+def confirm_payment(session_id):
+    """
+    Mark the payments of the checkout session as paid, then hand
+    out the reserved copies or, for a fine, return the book.
+    Payments which are already paid are left as they are.
+    Return the payments of the session.
+    """
+    payments = list(
+        Payment.objects.select_for_update(
+            of=("self",)
+        ).select_related(
+            "borrowing__book"
+        ).filter(
+            session_id=session_id
+        ).order_by(
+            "id"
+        )
+    )
+    for payment in payments:
+        if payment.status == Payment.Status.PAID:
+            continue
+        payment.status = Payment.Status.PAID
+        if payment.type == Payment.Type.FINE:
+            finish_fine_payment(payment)
+        else:
+            payment.out_of_stock = not fulfil_reservation(
+                payment.borrowing
+            )
+        payment.save(update_fields=["status", "out_of_stock"])
+    return payments
@@ -0,0 +1,66 @@
+from books.fast_serializers import (
+    cover_display,
+    format_datetime,
+    format_decimal
+)
+
+PAYMENT_LIST_VALUES = (
+    "id",
+    "borrowing__user_id",
+    "borrowing__book__id",
+    "borrowing__book__cover",
+    "borrowing__book__title",
+    "borrowing__book__author",
+    "borrowing__book__inventory",
+    # Only read to work out the available copies.
+    "borrowing__book__reserved",
+    "borrowing__book__daily_fee",
+    "status",
+    "type",
+    "session_url",
+    "session_id",
+    "money_to_pay",
+    "out_of_stock",
+    "created_at",
+    "borrowing_id",
+)
+
+
+def serialize_payments(rows) -> list:
+    """
+    Render `PAYMENT_LIST_VALUES` rows the
+    way `PaymentListSerializer` does.
+    """
+    covers = cover_display()
+    return [
+        {
+            "id": row["id"],
+            "payer_id": row["borrowing__user_id"],
+            "book": {
+                "id": row["borrowing__book__id"],
+                "cover": covers.get(
+                    row["borrowing__book__cover"],
+                    row["borrowing__book__cover"]
+                ),
+                "title": row["borrowing__book__title"],
+                "author": row["borrowing__book__author"],
+                "inventory": row["borrowing__book__inventory"],
+                "available": (
+                    row["borrowing__book__inventory"]
+                    - row["borrowing__book__reserved"]
+                ),
+                "daily_fee": format_decimal(
+                    row["borrowing__book__daily_fee"]
+                ),
+            },
+            "status": row["status"],
+            "type": row["type"],
+            "session_url": row["session_url"],
+            "session_id": row["session_id"],
+            "money_to_pay": format_decimal(row["money_to_pay"]),
+            "out_of_stock": row["out_of_stock"],
+            "created_at": format_datetime(row["created_at"]),
+            "borrowing": row["borrowing_id"],
+        }
+        for row in rows
+    ]
@@ -0,0 +1,349 @@
+"""
+Payment gateways: the only place where the payments app talks to
+the payment provider.
+
+`get_gateway()` returns the gateway selected by PAYMENT_GATEWAY:
+"stripe" for `StripeGateway`, "fake" for `FakeGateway`, an in-process
+gateway with configurable latency and failures for offline tests and
+load tests. The time spent in gateway calls is added up per request
+by `track_gateway_time`.
+"""
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import requests
+import stripe
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+
+CheckoutSession = namedtuple(
+    "CheckoutSession",
+    ["id", "url", "payment_status", "metadata"]
+)
+
+
+class GatewayError(Exception):
+    pass
+
+
+class AmountTooLarge(GatewayError):
+    pass
+
+
+class InvalidSignature(GatewayError):
+    pass
+
+
+_gateway_time = ContextVar("gateway_time", default=None)
+
+
+class GatewayTime:
+    """
+    Add up the time of the gateway calls made inside the block.
+    The calls are also added to the enclosing block, if any.
+    A class rather than a generator: every request enters one.
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.token = None
+
+    def __enter__(self):
+        self.token = _gateway_time.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _gateway_time.reset(self.token)
+        outer = _gateway_time.get()
+        if outer is not None:
+            outer.seconds += self.seconds
+            outer.calls += self.calls
+
+
+def track_gateway_time() -> GatewayTime:
+    return GatewayTime()
+
+
+@contextmanager
+def gateway_call():
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        gateway_time = _gateway_time.get()
+        if gateway_time is not None:
+            gateway_time.seconds += time.perf_counter() - start
+            gateway_time.calls += 1
+
+
+class PaymentGateway:
+    """
+    Checkout sessions of one line item per book, paid on the
+    gateway's page, and the events the gateway sends back.
+    """
+
+    def create_checkout_session(
+            self,
+            line_items,
+            metadata,
+            success_url,
+            cancel_url
+    ) -> CheckoutSession:
+        """
+        `line_items` are (name, amount in cents) pairs.
+        `success_url` and `cancel_url` may hold
+        the "{CHECKOUT_SESSION_ID}" placeholder.
+        """
+        with gateway_call():
+            return self._create_checkout_session(
+                line_items, metadata, success_url, cancel_url
+            )
+
+    def retrieve_checkout_session(self, session_id) -> CheckoutSession:
+        with gateway_call():
+            return self._retrieve_checkout_session(session_id)
+
+    def construct_event(self, payload, signature) -> dict:
+        """
+        Check the signature of a webhook event and parse it.
+        Raise InvalidSignature or ValueError for a bad event.
+        """
+        raise NotImplementedError
+
+    def activate(self):
+        """Set up the process-wide state the gateway relies on."""
+
+    def close(self):
+        pass
+
+    def _create_checkout_session(
+            self, line_items, metadata, success_url, cancel_url
+    ):
+        raise NotImplementedError
+
+    def _retrieve_checkout_session(self, session_id):
+        raise NotImplementedError
+
+
+def to_checkout_session(session) -> CheckoutSession:
+    return CheckoutSession(
+        id=session.get("id"),
+        url=session.get("url"),
+        payment_status=session.get("payment_status"),
+        metadata=session.get("metadata") or {},
+    )
+
+
+class StripeGateway(PaymentGateway):
+    """
+    Stripe Checkout through one pooled keep-alive HTTP session,
+    with connect and read timeouts and retries of failed requests.
+    """
+
+    def __init__(
+            self,
+            api_key=None,
+            webhook_secret=None,
+            timeout=None,
+            max_retries=None,
+            pool_size=None
+    ):
+        self.api_key = api_key or settings.STRIPE_SECRET_KEY
+        self.webhook_secret = webhook_secret or settings.STRIPE_WEBHOOK_SECRET
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size or settings.STRIPE_POOL_SIZE
+        )
+        self.session.mount("https://", adapter)
+        self.http_client = stripe.http_client.RequestsClient(
+            timeout=timeout or settings.STRIPE_TIMEOUT,
+            session=self.session
+        )
+        self.max_retries = (
+            settings.STRIPE_MAX_RETRIES
+            if max_retries is None else max_retries
+        )
+
+    def activate(self):
+        # The stripe library sends every request through its
+        # default client and retry count, which are process-wide.
+        stripe.default_http_client = self.http_client
+        stripe.max_network_retries = self.max_retries
+
+    def _create_checkout_session(
+            self, line_items, metadata, success_url, cancel_url
+    ):
+        try:
+            session = stripe.checkout.Session.create(
+                api_key=self.api_key,
+                payment_method_types=["card"],
+                line_items=[
+                    {
+                        "price_data": {
+                            "currency": "usd",
+                            "unit_amount": amount,
+                            "product_data": {
+                                "name": name,
+                            }
+                        },
+                        "quantity": 1
+                    }
+                    for name, amount in line_items
+                ],
+                metadata=metadata,
+                mode="payment",
+                success_url=success_url,
+                cancel_url=cancel_url
+            )
+        except stripe.error.InvalidRequestError as error:
+            if "Amount is too large" in str(error):
+                raise AmountTooLarge(str(error)) from error
+            raise
+        return to_checkout_session(session)
+
+    def _retrieve_checkout_session(self, session_id):
+        return to_checkout_session(
+            stripe.checkout.Session.retrieve(session_id, api_key=self.api_key)
+        )
+
+    def construct_event(self, payload, signature) -> dict:
+        try:
+            return stripe.Webhook.construct_event(
+                payload,
+                signature,
+                self.webhook_secret
+            )
+        except stripe.error.SignatureVerificationError as error:
+            raise InvalidSignature(str(error)) from error
+
+    def close(self):
+        if stripe.default_http_client is self.http_client:
+            stripe.default_http_client = None
+        self.session.close()
+
+
+class FakeGateway(PaymentGateway):
+    """
+    An in-process gateway. Every call waits for `latency` seconds
+    and fails with GatewayError with the `failure_rate` probability.
+    Sessions are paid with `pay()`; webhook events are signed with
+    `sign()`.
+    """
+    url = "https://checkout.fake.local/pay"
+
+    def __init__(
+            self,
+            latency=None,
+            failure_rate=None,
+            webhook_secret=None,
+            seed=None
+    ):
+        self.latency = (
+            settings.FAKE_GATEWAY_LATENCY
+            if latency is None else latency
+        )
+        self.failure_rate = (
+            settings.FAKE_GATEWAY_FAILURE_RATE
+            if failure_rate is None else failure_rate
+        )
+        self.webhook_secret = (
+            webhook_secret or settings.STRIPE_WEBHOOK_SECRET or "fake"
+        )
+        self.randomizer = random.Random(seed)
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def call(self):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            failed = self.randomizer.random() < self.failure_rate
+        if failed:
+            raise GatewayError("The fake gateway has failed.")
+
+    def _create_checkout_session(
+            self, line_items, metadata, success_url, cancel_url
+    ):
+        self.call()
+        session_id = f"cs_fake_{uuid.uuid4().hex}"
+        session = CheckoutSession(
+            id=session_id,
+            url=f"{self.url}/{session_id}",
+            payment_status="unpaid",
+            metadata=dict(metadata),
+        )
+        with self.lock:
+            self.sessions[session_id] = session
+        return session
+
+    def _retrieve_checkout_session(self, session_id):
+        self.call()
+        with self.lock:
+            session = self.sessions.get(session_id)
+        if session is None:
+            raise GatewayError(f"No such checkout session: {session_id}")
+        return session
+
+    def pay(self, session_id) -> CheckoutSession:
+        with self.lock:
+            session = self.sessions[session_id]._replace(
+                payment_status="paid"
+            )
+            self.sessions[session_id] = session
+        return session
+
+    def sign(self, payload: bytes) -> str:
+        return hmac.new(
+            self.webhook_secret.encode(),
+            payload,
+            hashlib.sha256
+        ).hexdigest()
+
+    def construct_event(self, payload, signature) -> dict:
+        if not hmac.compare_digest(self.sign(payload), signature or ""):
+            raise InvalidSignature("The signature does not match.")
+        return json.loads(payload)
+
+
+GATEWAYS = {
+    "stripe": StripeGateway,
+    "fake": FakeGateway,
+}
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> PaymentGateway:
+    """Return the gateway shared by the whole process."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                gateway = GATEWAYS[settings.PAYMENT_GATEWAY]()
+                gateway.activate()
+                _gateway = gateway
+    return _gateway
+
+
+@receiver(setting_changed)
+def reset_gateway(setting, **kwargs):
+    global _gateway
+    if (
+            setting == "PAYMENT_GATEWAY"
+            or setting.startswith(("STRIPE_", "FAKE_GATEWAY_"))
+    ) and _gateway is not None:
+        _gateway.close()
+        _gateway = None
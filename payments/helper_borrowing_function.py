@@ -1,10 +1,13 @@
 from _decimal import Decimal
 
-import stripe
+from django.conf import settings
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
-from stripe.error import InvalidRequestError
 from rest_framework.reverse import reverse
 
+from books.inventory import reserve_book_copies, reserve_book_copy
+from payments.gateways import AmountTooLarge, CheckoutSession, get_gateway
+from payments.metrics import record_session_reuse
 from payments.models import Payment
 
 
@@ -16,6 +19,11 @@ class AmountTooLargeError(ValidationError):
     default_code = "amount_too_large"
 
 
+class NoBooksLeftError(ValidationError):
+    default_detail = "No books left."
+    default_code = "no_books_left"
+
+
 def calculate_stripe_price(
         decimal_price: Decimal
 ) -> int:
@@ -28,6 +36,52 @@ def calculate_stripe_price(
     return stripe_price
 
 
+def find_reusable_session(borrowing, payment_type, decimal_price):
+    """
+    Return the checkout session of a pending payment of the same
+    type and amount for the borrowing, if it will not expire for
+    CHECKOUT_SESSION_REUSE_MARGIN yet, or None.
+    """
+    created_after = (
+        timezone.now()
+        - settings.CHECKOUT_SESSION_LIFETIME
+        + settings.CHECKOUT_SESSION_REUSE_MARGIN
+    )
+    payment = Payment.objects.filter(
+        borrowing=borrowing,
+        status=Payment.Status.PENDING,
+        type=payment_type,
+        money_to_pay=decimal_price,
+        created_at__gt=created_after
+    ).only(
+        "session_id", "session_url"
+    ).order_by(
+        "-id"
+    ).first()
+    if payment is None:
+        return None
+    return CheckoutSession(
+        id=payment.session_id,
+        url=payment.session_url,
+        payment_status="unpaid",
+        metadata={}
+    )
+
+
+def checkout_urls(request):
+    """The success and cancel URLs of a checkout session."""
+    success_url = request.build_absolute_uri(
+        reverse("payments:success")
+    )
+    cancel_url = request.build_absolute_uri(
+        reverse("payments:cancel")
+    )
+    return (
+        success_url + "?session_id={CHECKOUT_SESSION_ID}",
+        cancel_url + "?session_id={CHECKOUT_SESSION_ID}"
+    )
+
+
 def create_stripe_session(
         borrowing,
         request,
@@ -48,58 +102,87 @@ def create_stripe_session(
         stripe_payment = calculate_stripe_price(
             decimal_price
         )
+    checkout_session = find_reusable_session(
+        borrowing, payment_type, decimal_price
+    )
+    record_session_reuse(checkout_session is not None)
+    if checkout_session is not None:
+        return checkout_session
+
     book = borrowing.book
+    if not is_fine_payment:
+        expires_at = timezone.now() + settings.CHECKOUT_SESSION_LIFETIME
+        if not reserve_book_copy(borrowing, expires_at):
+            raise NoBooksLeftError(
+                {"book": [f'No "{book.title}" books left']}
+            )
+    success_url, cancel_url = checkout_urls(request)
     try:
-        success_url = request.build_absolute_uri(
-            reverse("payments:success")
-        )
-        cancel_url = request.build_absolute_uri(
-            reverse("payments:cancel")
+        checkout_session = get_gateway().create_checkout_session(
+            line_items=[(book.title, stripe_payment)],
+            metadata={
+                "borrowing_id": borrowing.id,
+                "is_fine_payment": is_fine_payment
+            },
+            success_url=success_url,
+            cancel_url=cancel_url
         )
+    except AmountTooLarge:
+        raise AmountTooLargeError
 
-        checkout_session = stripe.checkout.Session.create(
-            payment_method_types=["card"],
+    Payment.objects.create(
+        status=Payment.Status.PENDING,
+        type=payment_type,
+        borrowing=borrowing,
+        session_url=checkout_session.url,
+        session_id=checkout_session.id,
+        money_to_pay=decimal_price
+    )
+    return checkout_session
+
+
+def create_batch_stripe_session(borrowings, request):
+    """
+    Hold a copy of every borrowed book and open one checkout
+    session with a line item for each borrowing, paid for by
+    a payment of each borrowing. The borrowings must be of
+    different books, with their books loaded.
+    """
+    expires_at = timezone.now() + settings.CHECKOUT_SESSION_LIFETIME
+    if not reserve_book_copies(borrowings, expires_at):
+        raise NoBooksLeftError
+    prices = [
+        borrowing.calculate_borrowing_price()
+        for borrowing in borrowings
+    ]
+    success_url, cancel_url = checkout_urls(request)
+    try:
+        checkout_session = get_gateway().create_checkout_session(
             line_items=[
-                {
-                    "price_data": {
-                        "currency": "usd",
-                        "unit_amount": stripe_payment,
-                        "product_data": {
-                            "name": book.title,
-                        }
-                    },
-                    "quantity": 1
-                },
+                (borrowing.book.title, calculate_stripe_price(price))
+                for borrowing, price in zip(borrowings, prices)
             ],
             metadata={
-                "borrowing_id": borrowing.id,
-                "is_fine_payment": is_fine_payment
+                "borrowing_ids": ",".join(
+                    str(borrowing.id) for borrowing in borrowings
+                ),
+                "is_fine_payment": ""
             },
-            mode="payment",
-            success_url=(
-                    success_url +
-                    "?session_id={CHECKOUT_SESSION_ID}"
-            ),
-            cancel_url=(
-                    cancel_url +
-                    "?session_id={CHECKOUT_SESSION_ID}"
-            )
+            success_url=success_url,
+            cancel_url=cancel_url
         )
-        session_url = checkout_session.get("url")
-        session_id = checkout_session.get("id")
-        Payment.objects.create(
+    except AmountTooLarge:
+        raise AmountTooLargeError
+
+    Payment.objects.bulk_create(
+        Payment(
             status=Payment.Status.PENDING,
-            type=payment_type,
+            type=Payment.Type.PAYMENT,
             borrowing=borrowing,
-            session_url=session_url,
-            session_id=session_id,
-            money_to_pay=decimal_price
+            session_url=checkout_session.url,
+            session_id=checkout_session.id,
+            money_to_pay=price
         )
-
-        return checkout_session
-
-    except InvalidRequestError as e:
-        if "Amount is too large" in str(e):
-            raise AmountTooLargeError
-    except Exception as e:
-        raise e
+        for borrowing, price in zip(borrowings, prices)
+    )
+    return checkout_session
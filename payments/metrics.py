@@ -0,0 +1,36 @@
+"""
+Counters of checkout session reuse, kept in the cache so that every
+worker process adds to the same numbers when the cache is shared.
+"""
+from django.core.cache import cache
+
+SESSION_REUSE_HITS_KEY = "payments:session_reuse:hits"
+SESSION_REUSE_MISSES_KEY = "payments:session_reuse:misses"
+
+
+def increment(key, delta=1):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # Not counted yet, or evicted; another process
+        # may add the key first.
+        if not cache.add(key, delta, None):
+            cache.incr(key, delta)
+
+
+def record_session_reuse(hit: bool):
+    increment(SESSION_REUSE_HITS_KEY if hit else SESSION_REUSE_MISSES_KEY)
+
+
+def session_reuse_stats() -> dict:
+    counters = cache.get_many(
+        [SESSION_REUSE_HITS_KEY, SESSION_REUSE_MISSES_KEY]
+    )
+    hits = counters.get(SESSION_REUSE_HITS_KEY, 0)
+    misses = counters.get(SESSION_REUSE_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else None,
+    }
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.3 on 2026-10-18 12:31
+
+import datetime
+
+from django.db import migrations, models
+
+# The creation time of the existing payments is unknown. They are
+# dated at the epoch, so none of their checkout sessions, which
+# may have expired long ago, is ever handed out again.
+UNKNOWN_CREATION_TIME = datetime.datetime(
+    1970, 1, 1, tzinfo=datetime.timezone.utc
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payments", "0005_stripe_event_inbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payment",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, default=UNKNOWN_CREATION_TIME
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.3 on 2026-10-18 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payments", "0006_payment_created_at"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="payment",
+            name="payment_session_id_unique",
+        ),
+        migrations.AddConstraint(
+            model_name="payment",
+            constraint=models.UniqueConstraint(
+                fields=("session_id", "borrowing"),
+                name="payment_session_id_borrowing_unique",
+            ),
+        ),
+    ]
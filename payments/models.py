@@ -1,8 +1,12 @@
 from decimal import Decimal
 
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
+from users.stats import refresh_stats_on_commit
+
 
 class Payment(models.Model):
     class Status(models.TextChoices):
@@ -37,13 +41,80 @@ class Payment(models.Model):
         decimal_places=2,
         default=Decimal('0.00')
     )
+    out_of_stock = models.BooleanField(
+        default=False
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True
+    )
+
+    class Meta:
+        # A batch checkout pays for several borrowings
+        # in one session, with a payment for each.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["session_id", "borrowing"],
+                name="payment_session_id_borrowing_unique",
+            ),
+        ]
 
     def change_payment_status_to_paid(self):
         self.status = "PAID"
-        self.save()
+        self.save(update_fields=["status"])
 
     def __str__(self):
         return (
             f"Status: "
             f"{self.get_status_display()}"
         )
+
+
+class StripeEvent(models.Model):
+    """
+    Inbox of webhook events. The webhook stores the raw event and
+    acknowledges it at once; the `process_stripe_events` task
+    handles the stored events in order. The unique event ID makes
+    a redelivered event a no-op.
+    """
+    event_id = models.CharField(
+        max_length=255,
+        unique=True
+    )
+    type = models.CharField(
+        max_length=100
+    )
+    borrowing_id = models.PositiveIntegerField(
+        null=True,
+        blank=True
+    )
+    payload = models.TextField()
+    received_at = models.DateTimeField(
+        auto_now_add=True
+    )
+    processed_at = models.DateTimeField(
+        null=True,
+        blank=True
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(processed_at=None),
+                name="stripe_event_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.type} {self.event_id}"
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def refresh_user_borrowing_stats(sender, instance, **kwargs):
+    if Payment.borrowing.is_cached(instance):
+        refresh_stats_on_commit(instance.borrowing.user_id)
+    else:
+        # The borrowers are read at once when the transaction commits.
+        refresh_stats_on_commit(borrowing_ids=[instance.borrowing_id])
@@ -1,8 +1,13 @@
-import stripe
 from rest_framework import serializers, status
 
 from books.serializers import BookSerializer
-from borrowings.helper_functions import get_payment, finish_fine_payment, payment_successful_response_message
+from borrowings.helper_functions import (
+    batch_payment_successful_response_message,
+    get_payments,
+    fine_payment_response_message,
+    out_of_stock_response_message,
+    payment_successful_response_message
+)
 from payments.models import Payment
 
 
@@ -11,6 +16,13 @@ PAYMENT_DOES_NOT_EXIST_RESPONSE = {
         "status": status.HTTP_204_NO_CONTENT
     }
 
+PAYMENT_IS_PENDING_RESPONSE = {
+    "message":
+        "The payment has not been confirmed yet. "
+        "Please refresh this page in a few seconds.",
+    "status": status.HTTP_202_ACCEPTED,
+}
+
 
 class PaymentSerializer(serializers.ModelSerializer):
 
@@ -37,34 +49,26 @@ class PaymentListSerializer(PaymentSerializer):
 class PaymentSuccessSerializer(serializers.Serializer):
 
     def return_success_response(self):
+        """
+        Report the payment as confirmed by the webhook,
+        without asking the payment gateway.
+        """
         session_id = self.context.get("session_id")
-        session = stripe.checkout.Session.retrieve(
-            session_id
-        )
-        is_fine_payment = session.get(
-            "metadata"
-        ).get("is_fine_payment")
-        payment_status = session.get("payment_status")
-        paid = payment_status == "paid"
-
-        if paid:
-            try:
-                payment = get_payment(session_id)
-            except Payment.DoesNotExist as e:
-                return PAYMENT_DOES_NOT_EXIST_RESPONSE
-            payment.change_payment_status_to_paid()
-            if is_fine_payment:
-                response = finish_fine_payment(payment)
-                return response
+        payments = get_payments(session_id)
+        if not payments:
+            return PAYMENT_DOES_NOT_EXIST_RESPONSE
 
-            borrowing = payment.borrowing
-            borrowing.book.decrease_book_inventory()
-            response = payment_successful_response_message(
-                payment
-            )
-            return response
-        return {
-            "message":
-                f"Something went wrong",
-            "status": status.HTTP_204_NO_CONTENT,
-        }
+        payment = payments[0]
+        if any(
+                payment.status != Payment.Status.PAID
+                for payment in payments
+        ):
+            return PAYMENT_IS_PENDING_RESPONSE
+        if payment.type == Payment.Type.FINE:
+            return fine_payment_response_message(payment)
+        for payment in payments:
+            if payment.out_of_stock:
+                return out_of_stock_response_message(payment)
+        if len(payments) > 1:
+            return batch_payment_successful_response_message(payments)
+        return payment_successful_response_message(payment)
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from payments.events import process_pending_events
+
+
+@shared_task
+def process_stripe_events():
+    return process_pending_events()
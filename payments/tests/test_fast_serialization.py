@@ -0,0 +1,95 @@
+import datetime
+from _decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from books.models import Book
+from borrowings.models import Borrowing
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_book,
+    sample_user
+)
+from payments.models import Payment
+
+User = get_user_model()
+PAYMENT_LIST_URL = reverse("payments:payment-list")
+
+
+class FastPaymentListTest(TestCase):
+    """
+    The `.values()` list path has to render
+    exactly the JSON of `PaymentListSerializer`.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            **sample_user()
+        )
+        self.user = User.objects.create_user(
+            **sample_user(email="reader@reader.com")
+        )
+        books = [
+            Book.objects.create(**sample_book()),
+            Book.objects.create(
+                **sample_book(cover="S", daily_fee=Decimal("0.05"))
+            ),
+        ]
+        for index in range(5):
+            borrowing = Borrowing.objects.create(
+                book=books[index % 2],
+                user=self.user if index % 2 else self.admin,
+                expected_return_date=(
+                    datetime.date.today() + datetime.timedelta(days=1)
+                )
+            )
+            Payment.objects.create(
+                status=Payment.Status.PENDING,
+                type=Payment.Type.PAYMENT,
+                borrowing=borrowing,
+                session_url="https://checkout.stripe.com/",
+                session_id=f"cs_{index}",
+                money_to_pay=Decimal(index)
+            )
+
+    def assert_same_content(self, user, url, params=None):
+        self.client.force_authenticate(user=user)
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            expected = self.client.get(url, params)
+        with override_settings(FAST_LIST_SERIALIZATION=True):
+            response = self.client.get(url, params)
+
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        return response
+
+    def test_admin_list_is_byte_identical(self):
+        response = self.assert_same_content(self.admin, PAYMENT_LIST_URL)
+
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_user_list_is_byte_identical(self):
+        response = self.assert_same_content(self.user, PAYMENT_LIST_URL)
+
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_pages_are_byte_identical(self):
+        response = self.assert_same_content(
+            self.admin,
+            PAYMENT_LIST_URL,
+            {"page_size": 2}
+        )
+
+        self.assert_same_content(self.admin, response.data["next"])
+
+    def test_reserved_copies_are_not_listed(self):
+        Book.objects.update(reserved=1)
+
+        response = self.assert_same_content(self.admin, PAYMENT_LIST_URL)
+
+        book = response.data["results"][0]["book"]
+        self.assertNotIn("reserved", book)
+        self.assertEqual(book["available"], book["inventory"] - 1)
@@ -0,0 +1,140 @@
+import json
+from unittest.mock import patch
+
+import stripe
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.models import Book
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_book,
+    sample_borrowing,
+    sample_user
+)
+from payments.gateways import (
+    AmountTooLarge,
+    FakeGateway,
+    GatewayError,
+    InvalidSignature,
+    StripeGateway,
+    get_gateway,
+    track_gateway_time
+)
+from payments.models import Payment
+
+User = get_user_model()
+BORROWING_LIST_URL = reverse("borrowings:borrowing-list")
+
+
+def create_session(gateway, **metadata):
+    return gateway.create_checkout_session(
+        line_items=[("Dune", 1099)],
+        metadata=metadata,
+        success_url="https://example.com/success",
+        cancel_url="https://example.com/cancel"
+    )
+
+
+class FakeGatewayTest(TestCase):
+    def setUp(self):
+        self.gateway = FakeGateway(webhook_secret="secret")
+
+    def test_sessions_are_created_paid_and_retrieved(self):
+        session = create_session(self.gateway, borrowing_id=1)
+
+        self.gateway.pay(session.id)
+        retrieved = self.gateway.retrieve_checkout_session(session.id)
+
+        self.assertEqual(retrieved.payment_status, "paid")
+        self.assertEqual(retrieved.metadata, {"borrowing_id": 1})
+        self.assertTrue(retrieved.url.endswith(session.id))
+
+    def test_failure_rate(self):
+        gateway = FakeGateway(failure_rate=1)
+
+        with self.assertRaises(GatewayError):
+            create_session(gateway)
+
+    def test_events_are_verified(self):
+        payload = json.dumps({"type": "checkout.session.completed"}).encode()
+
+        event = self.gateway.construct_event(
+            payload,
+            self.gateway.sign(payload)
+        )
+
+        self.assertEqual(event["type"], "checkout.session.completed")
+        with self.assertRaises(InvalidSignature):
+            self.gateway.construct_event(payload, "forged")
+
+    def test_calls_are_timed(self):
+        with track_gateway_time() as gateway_time:
+            session = create_session(self.gateway)
+            self.gateway.retrieve_checkout_session(session.id)
+
+        self.assertEqual(gateway_time.calls, 2)
+
+
+class GetGatewayTest(TestCase):
+    def test_gateway_follows_the_setting(self):
+        with override_settings(PAYMENT_GATEWAY="fake"):
+            gateway = get_gateway()
+            self.assertIsInstance(gateway, FakeGateway)
+            self.assertIs(get_gateway(), gateway)
+
+        with override_settings(PAYMENT_GATEWAY="stripe"):
+            self.assertIsInstance(get_gateway(), StripeGateway)
+
+    def test_only_the_shared_stripe_gateway_configures_stripe(self):
+        with override_settings(PAYMENT_GATEWAY="stripe"):
+            gateway = get_gateway()
+            StripeGateway(max_retries=7)
+
+            self.assertIs(stripe.default_http_client, gateway.http_client)
+            self.assertEqual(stripe.max_network_retries, gateway.max_retries)
+
+        self.assertIsNone(stripe.default_http_client)
+
+
+@override_settings(PAYMENT_GATEWAY="fake")
+class GatewayBorrowingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            user=User.objects.create_user(**sample_user())
+        )
+        self.book = Book.objects.create(**sample_book())
+
+    def test_borrowing_reports_gateway_time(self):
+        response = self.client.post(
+            BORROWING_LIST_URL,
+            data=sample_borrowing(book=self.book.id)
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn("gateway;dur=", response["Server-Timing"])
+        payment = Payment.objects.get()
+        self.assertEqual(
+            get_gateway().retrieve_checkout_session(
+                payment.session_id
+            ).metadata["borrowing_id"],
+            payment.borrowing_id
+        )
+
+    def test_amount_too_large(self):
+        with patch.object(
+                FakeGateway,
+                "_create_checkout_session",
+                side_effect=AmountTooLarge
+        ):
+            response = self.client.post(
+                BORROWING_LIST_URL,
+                data=sample_borrowing(book=self.book.id)
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Payment.objects.exists())
@@ -0,0 +1,141 @@
+import datetime
+from _decimal import Decimal
+from importlib import import_module
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.models import Book
+from borrowings.models import Borrowing
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    return_url_,
+    sample_book,
+    sample_user
+)
+from payments.gateways import track_gateway_time
+from payments.models import Payment
+
+User = get_user_model()
+SESSION_REUSE_URL = reverse("payments:payment-session-reuse")
+TODAY = datetime.date.today()
+
+
+@override_settings(PAYMENT_GATEWAY="fake")
+class SessionReuseTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(**sample_user())
+        self.client.force_authenticate(user=self.user)
+        self.book = Book.objects.create(**sample_book())
+        self.borrowing = Borrowing.objects.create(
+            expected_return_date=TODAY - datetime.timedelta(days=3),
+            book=self.book,
+            user=self.user
+        )
+        Borrowing.objects.filter(pk=self.borrowing.pk).update(
+            borrow_date=TODAY - datetime.timedelta(days=5)
+        )
+        self.borrowing.refresh_from_db()
+        Payment.objects.create(
+            status=Payment.Status.PAID,
+            type=Payment.Type.PAYMENT,
+            borrowing=self.borrowing,
+            session_url="https://checkout.stripe.com/paid",
+            session_id="cs_paid",
+            money_to_pay=self.borrowing.calculate_borrowing_price()
+        )
+        self.return_url = return_url_(self.borrowing.id)
+
+    def return_borrowing(self):
+        with track_gateway_time() as gateway_time:
+            response = self.client.post(self.return_url)
+        return response, gateway_time.calls
+
+    def fines(self):
+        return Payment.objects.filter(type=Payment.Type.FINE)
+
+    def test_pending_fine_session_is_reused(self):
+        first, first_calls = self.return_borrowing()
+        second, second_calls = self.return_borrowing()
+
+        self.assertEqual(
+            first.data["checkout_session_url"],
+            second.data["checkout_session_url"]
+        )
+        self.assertEqual((first_calls, second_calls), (1, 0))
+        self.assertEqual(self.fines().count(), 1)
+
+    def test_expired_session_is_not_reused(self):
+        self.return_borrowing()
+        self.fines().update(
+            created_at=timezone.now() - datetime.timedelta(hours=23)
+        )
+
+        _, calls = self.return_borrowing()
+
+        self.assertEqual(calls, 1)
+        self.assertEqual(self.fines().count(), 2)
+
+    def test_session_of_a_migrated_payment_is_not_reused(self):
+        migration = import_module(
+            "payments.migrations.0006_payment_created_at"
+        )
+        self.return_borrowing()
+        self.fines().update(created_at=migration.UNKNOWN_CREATION_TIME)
+
+        _, calls = self.return_borrowing()
+
+        self.assertEqual(calls, 1)
+        self.assertEqual(self.fines().count(), 2)
+
+    def test_session_of_another_amount_is_not_reused(self):
+        self.return_borrowing()
+        self.fines().update(money_to_pay=Decimal("0.01"))
+
+        _, calls = self.return_borrowing()
+
+        self.assertEqual(calls, 1)
+        self.assertEqual(self.fines().count(), 2)
+
+    def test_returned_borrowing_does_not_create_a_session(self):
+        self.borrowing.make_today_actual_return_date()
+
+        response, calls = self.return_borrowing()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(calls, 0)
+        self.assertFalse(self.fines().exists())
+
+    def test_unpaid_borrowing_does_not_create_a_session(self):
+        Payment.objects.all().delete()
+
+        response, calls = self.return_borrowing()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(calls, 0)
+        self.assertFalse(self.fines().exists())
+
+    def test_reuse_stats(self):
+        for _ in range(4):
+            self.return_borrowing()
+        self.client.force_authenticate(
+            user=User.objects.create_superuser(**sample_user())
+        )
+
+        response = self.client.get(SESSION_REUSE_URL)
+
+        self.assertEqual(
+            response.data,
+            {"hits": 3, "misses": 1, "hit_rate": 0.75}
+        )
+
+    def test_reuse_stats_are_staff_only(self):
+        response = self.client.get(SESSION_REUSE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,9 +1,8 @@
 from _decimal import Decimal
 from datetime import datetime
-from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework import status
 from django.urls import reverse
 
@@ -13,22 +12,15 @@ from borrowings.tests.test_create_list_return_borrowings_api import (
     sample_user, sample_book
 )
 from payments.models import Payment
+from payments.tests.test_webhook import (
+    SESSION_ID,
+    checkout_event,
+    deliver_event
+)
 
-SESSION_ID = "test_id"
 SUCCESS_URL = reverse("payments:success")
 
 
-def session_(**params):
-    session = {
-        "metadata": {
-            "is_fine_payment": False
-        },
-        "payment_status": "paid"
-    }
-    session.update(params)
-    return session
-
-
 def refresh_data(payment, borrowing, book):
     payment.refresh_from_db()
     borrowing.refresh_from_db()
@@ -38,6 +30,7 @@ def refresh_data(payment, borrowing, book):
 User = get_user_model()
 
 
+@override_settings(PAYMENT_GATEWAY="fake")
 class SuccessViewTest(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -65,20 +58,17 @@ class SuccessViewTest(TestCase):
         self.borrowing.refresh_from_db()
         self.book.refresh_from_db()
 
-    @patch(
-        "stripe.checkout.Session.retrieve",
-        return_value=session_()
-    )
-    def test_success_payment(self, mock_retrieve):
+    def test_success_payment(self):
         """
         This test checks the behaviour of success
-        endpoint if session has status 'paid', and
-        "is_fine_payment": False parameter in metadata.
+        endpoint once the webhook has confirmed
+        the payment of a borrowing.
         """
         book = self.book
         book_starting_inventory = book.inventory
         borrowing = self.borrowing
         payment = self.payment
+        deliver_event(self.client, checkout_event())
         response = self.client.get(
             SUCCESS_URL,
             {
@@ -108,21 +98,16 @@ class SuccessViewTest(TestCase):
             "borrowing_payment"
         )
 
-    @patch(
-        "stripe.checkout.Session.retrieve",
-        return_value=session_(
-            metadata={
-                "is_fine_payment": True
-            }
-        )
-    )
-    def test_success_fine_payment(self, mock_retrieve):
+    def test_success_fine_payment(self):
         """
         This test checks the behaviour of success
-        endpoint if session has status 'paid' and
-        "is_fine_payment": True parameter in metadata.
+        endpoint once the webhook has confirmed
+        the payment of a fine.
         """
         book_starting_inventory = self.book.inventory
+        self.payment.type = "FINE"
+        self.payment.save()
+        deliver_event(self.client, checkout_event())
         response = self.client.get(
             SUCCESS_URL,
             {
@@ -152,11 +137,37 @@ class SuccessViewTest(TestCase):
             "fine_payment"
         )
 
-    @patch(
-        "stripe.checkout.Session.retrieve",
-        return_value=session_()
-    )
-    def test_payment_does_not_exist(self, mock_retrieve):
+    def test_success_payment_no_books_left(self):
+        """
+        This test checks that the inventory never goes
+        below zero if the last copy was taken while
+        the user was paying.
+        """
+        self.book.inventory = 0
+        self.book.save()
+        deliver_event(self.client, checkout_event())
+        response = self.client.get(
+            SUCCESS_URL,
+            {
+                "session_id": SESSION_ID
+            }
+        )
+        self.refresh_data()
+
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_409_CONFLICT,
+        )
+        self.assertEqual(
+            self.payment.status,
+            "PAID"
+        )
+        self.assertEqual(
+            self.book.inventory,
+            0,
+        )
+
+    def test_payment_does_not_exist(self):
         """
         This test checks the behaviour of success
         endpoint if the payment related to the
@@ -165,6 +176,7 @@ class SuccessViewTest(TestCase):
         book_starting_inventory = self.book.inventory
         self.payment.session_id = "not_exist"
         self.payment.save()
+        deliver_event(self.client, checkout_event())
         response = self.client.get(
             SUCCESS_URL,
             {
@@ -190,25 +202,30 @@ class SuccessViewTest(TestCase):
             None
         )
 
-    @patch(
-        "stripe.checkout.Session.retrieve",
-        return_value=session_(
-            payment_status="not paid"
-        )
-    )
-    def test_session_returns_not_paid(self, mock_retrieve):
+    def test_payment_is_not_confirmed_yet(self):
         """
         This test examines the behavior of the success
-        endpoint when the status of the payment inside
-        the session is not "paid."
+        endpoint when the redirect arrives before the
+        webhook has confirmed the payment.
         """
+        deliver_event(
+            self.client,
+            checkout_event(payment_status="unpaid")
+        )
         response = self.client.get(
             SUCCESS_URL,
             {
                 "session_id": SESSION_ID
             }
         )
+        self.refresh_data()
+
         self.assertEqual(
             response.status_code,
-            status.HTTP_204_NO_CONTENT,
+            status.HTTP_202_ACCEPTED,
+        )
+        self.assertEqual(
+            self.payment.status,
+            "PENDING"
         )
+        self.assertNotIn("gateway;", response["Server-Timing"])
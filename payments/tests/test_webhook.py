@@ -0,0 +1,253 @@
+import json
+import uuid
+from _decimal import Decimal
+from datetime import timedelta
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from books.inventory import reserve_book_copy
+from books.models import Book, Reservation
+from borrowings.models import Borrowing
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_user, sample_book
+)
+from payments.events import process_pending_events
+from payments.gateways import get_gateway
+from payments.models import Payment, StripeEvent
+
+SESSION_ID = "cs_test_id"
+WEBHOOK_URL = reverse("stripe-webhook")
+
+User = get_user_model()
+
+
+def checkout_event(
+        session_id=SESSION_ID,
+        event_type="checkout.session.completed",
+        payment_status="paid",
+        borrowing_id=None
+):
+    return {
+        "id": f"evt_{uuid.uuid4().hex}",
+        "type": event_type,
+        "data": {
+            "object": {
+                "id": session_id,
+                "payment_status": payment_status,
+                "metadata": {
+                    "borrowing_id": str(borrowing_id or ""),
+                },
+            }
+        }
+    }
+
+
+def send_event(client, event, signature=None):
+    payload = json.dumps(event).encode()
+    return client.post(
+        WEBHOOK_URL,
+        payload,
+        content_type="application/json",
+        HTTP_STRIPE_SIGNATURE=signature or get_gateway().sign(payload)
+    )
+
+
+def deliver_event(client, event):
+    """Send the event to the webhook and process the inbox."""
+    response = send_event(client, event)
+    process_pending_events()
+    return response
+
+
+@override_settings(PAYMENT_GATEWAY="fake")
+class StripeWebhookTest(TestCase):
+    def setUp(self):
+        self.book = Book.objects.create(
+            **sample_book()
+        )
+        self.borrowing = Borrowing.objects.create(
+            expected_return_date=timezone.now().date(),
+            book=self.book,
+            user=User.objects.create_user(**sample_user()),
+        )
+        reserve_book_copy(
+            self.borrowing,
+            timezone.now() + timedelta(hours=1)
+        )
+        self.payment = Payment.objects.create(
+            status="PENDING",
+            type="PAYMENT",
+            borrowing=self.borrowing,
+            session_url="https://checkout.stripe.com/",
+            session_id=SESSION_ID,
+            money_to_pay=Decimal("10.99")
+        )
+
+    def refresh_data(self):
+        self.payment.refresh_from_db()
+        self.borrowing.refresh_from_db()
+        self.book.refresh_from_db()
+
+    def test_event_is_stored_and_acknowledged(self):
+        response = send_event(self.client, checkout_event())
+        self.refresh_data()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.payment.status, "PENDING")
+        self.assertEqual(
+            StripeEvent.objects.get().processed_at,
+            None
+        )
+
+    def test_completed_session_confirms_the_payment(self):
+        deliver_event(self.client, checkout_event())
+        self.refresh_data()
+
+        self.assertEqual(self.payment.status, "PAID")
+        self.assertEqual(self.book.inventory, 9)
+        self.assertEqual(self.book.reserved, 0)
+        self.assertFalse(Reservation.objects.exists())
+        self.assertTrue(StripeEvent.objects.get().processed_at)
+
+    def test_malformed_borrowing_id_is_stored_as_none(self):
+        for metadata in (
+                {"borrowing_id": "12abc"},
+                {"borrowing_ids": "x,1"},
+                {"borrowing_id": "-3"},
+        ):
+            event = checkout_event()
+            event["data"]["object"]["metadata"] = metadata
+
+            response = send_event(self.client, event)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIsNone(
+                StripeEvent.objects.get(event_id=event["id"]).borrowing_id
+            )
+        process_pending_events()
+        self.refresh_data()
+        self.assertEqual(self.payment.status, "PAID")
+
+    def test_redelivered_event_is_stored_once(self):
+        event = checkout_event()
+        deliver_event(self.client, event)
+
+        with self.assertNumQueries(1):
+            response = send_event(self.client, event)
+        self.refresh_data()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(process_pending_events(), 0)
+        self.assertEqual(self.book.inventory, 9)
+        self.assertEqual(StripeEvent.objects.count(), 1)
+
+    def test_another_event_of_a_paid_session_is_a_no_op(self):
+        deliver_event(self.client, checkout_event())
+        deliver_event(
+            self.client,
+            checkout_event(
+                event_type="checkout.session.async_payment_succeeded"
+            )
+        )
+        self.refresh_data()
+
+        self.assertEqual(self.book.inventory, 9)
+        self.assertEqual(StripeEvent.objects.count(), 2)
+
+    def test_unpaid_session_is_not_confirmed(self):
+        deliver_event(
+            self.client,
+            checkout_event(payment_status="unpaid")
+        )
+        self.refresh_data()
+
+        self.assertEqual(self.payment.status, "PENDING")
+        self.assertEqual(self.book.reserved, 1)
+
+    def test_fine_payment_returns_the_book(self):
+        self.payment.type = "FINE"
+        self.payment.save()
+
+        deliver_event(self.client, checkout_event())
+        self.refresh_data()
+
+        self.assertEqual(self.payment.status, "PAID")
+        self.assertEqual(
+            self.borrowing.actual_return_date,
+            timezone.now().date()
+        )
+        self.assertEqual(self.book.inventory, 11)
+
+    def test_invalid_signature(self):
+        response = send_event(
+            self.client,
+            checkout_event(),
+            signature="forged"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(StripeEvent.objects.exists())
+
+
+@override_settings(PAYMENT_GATEWAY="fake")
+class ProcessPendingEventsTest(TestCase):
+    def setUp(self):
+        for borrowing_id in (1, 1, 2):
+            send_event(
+                self.client,
+                checkout_event(
+                    session_id=f"cs_{borrowing_id}",
+                    borrowing_id=borrowing_id
+                )
+            )
+
+    def test_events_are_handled_in_batches_in_order(self):
+        with patch("payments.events.confirm_payment") as confirm:
+            processed = process_pending_events(batch_size=2)
+
+        self.assertEqual(processed, 3)
+        self.assertEqual(
+            [call.args[0] for call in confirm.call_args_list],
+            ["cs_1", "cs_1", "cs_2"]
+        )
+
+    def test_failed_event_holds_back_its_borrowing(self):
+        def confirm(session_id):
+            if session_id == "cs_1":
+                raise ValueError
+
+        with patch("payments.events.confirm_payment", side_effect=confirm):
+            processed = process_pending_events()
+
+        self.assertEqual(processed, 1)
+        self.assertEqual(
+            [
+                (event.borrowing_id, event.attempts, bool(event.processed_at))
+                for event in StripeEvent.objects.order_by("id")
+            ],
+            [(1, 1, False), (1, 0, False), (2, 0, True)]
+        )
+
+        self.assertEqual(process_pending_events(), 2)
+
+    def test_events_are_given_up_after_max_attempts(self):
+        with patch(
+                "payments.events.confirm_payment",
+                side_effect=ValueError
+        ):
+            # The second event of the first borrowing
+            # waits until the first one is given up.
+            for _ in range(4):
+                process_pending_events(max_attempts=2)
+
+        self.assertEqual(
+            list(StripeEvent.objects.values_list("attempts", flat=True)),
+            [2, 2, 2]
+        )
+        self.assertEqual(process_pending_events(max_attempts=2), 0)
@@ -1,21 +1,26 @@
-import stripe
-from django.conf import settings
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status, mixins
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from borrowings.models import Borrowing
 from borrowings.views import GenericViewSet
+from library_service_project.mixins import ValuesListModelMixin
+from payments.events import record_event
+from payments.gateways import InvalidSignature, get_gateway
+from payments.fast_serializers import (
+    PAYMENT_LIST_VALUES,
+    serialize_payments
+)
+from payments.metrics import session_reuse_stats
 from payments.models import Payment
 from payments.serializers import (
     PaymentListSerializer,
     PaymentSuccessSerializer
 )
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
-
 PAYMENT_DOES_NOT_EXIST_RESPONSE = Response(
     {
         "message": "Payment does not exist"
@@ -28,10 +33,9 @@ class SuccessView(APIView):
     def get(self, request):
         """
         After a successful payment, the user is redirected to this endpoint.
-        If the payment status is 'paid', the book inventory will be
-        decreased by 1, and the payment status will be updated from
-        'pending' to 'paid'. In the case of fine payment,
-        the book inventory will be increased by 1.
+        The payment is confirmed by the gateway's webhook, which updates
+        the payment status and the book inventory; this endpoint only
+        reports the outcome, or 202 while the payment is still pending.
         """
         session_id = self.request.query_params.get(
             "session_id"
@@ -54,7 +58,7 @@ class SuccessView(APIView):
 
 
 class PaymentViewSet(
-    mixins.ListModelMixin,
+    ValuesListModelMixin,
     mixins.RetrieveModelMixin,
     GenericViewSet
 ):
@@ -63,6 +67,7 @@ class PaymentViewSet(
         "borrowing__book"
     )
     serializer_class = PaymentListSerializer
+    list_values = PAYMENT_LIST_VALUES
 
     def get_queryset(self):
         queryset = self.queryset
@@ -72,6 +77,22 @@ class PaymentViewSet(
             )
         return queryset
 
+    def serialize_values(self, rows) -> list:
+        return serialize_payments(rows)
+
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="session-reuse",
+        permission_classes=[IsAdminUser],
+    )
+    def session_reuse(self, request):
+        """
+        How often a pending checkout session was handed out
+        again instead of creating a new one.
+        """
+        return Response(session_reuse_stats())
+
 
 class CancelView(APIView):
     def get(self, request):
@@ -93,32 +114,17 @@ class CancelView(APIView):
 @csrf_exempt
 def stripe_webhook(request):
     """
-    This webhook does not do anything,
-    but it can extend functionality
-    if necessary
+    Verify the event sent by the payment gateway, store it in
+    the inbox and acknowledge it. The `process_stripe_events`
+    task confirms the payments.
     """
     payload = request.body
-    sig_header = request.META["HTTP_STRIPE_SIGNATURE"]
-    event = None
+    signature = request.META.get("HTTP_STRIPE_SIGNATURE")
 
     try:
-        event = stripe.Webhook.construct_event(
-            payload,
-            sig_header,
-            settings.STRIPE_WEBHOOK_SECRET
-        )
-    except ValueError as e:
-        return HttpResponse(status=400)
-    except stripe.error.SignatureVerificationError as e:
+        event = get_gateway().construct_event(payload, signature)
+    except (ValueError, InvalidSignature):
         return HttpResponse(status=400)
 
-    if event["type"] == "checkout.session.completed":
-        session = stripe.checkout.Session.retrieve(
-            event["data"]["object"]["id"],
-            expand=["line_items"],
-        )
-        borrowing_id = session["metadata"]["borrowing_id"]
-        borrowing = Borrowing.objects.get(
-            id=borrowing_id
-        )
+    record_event(event, payload)
     return HttpResponse(status=200)
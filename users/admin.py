@@ -1,5 +1,18 @@
 from django.contrib import admin
 
-from users.models import User
+from users.models import User, UserBorrowingStats
 
 admin.site.register(User)
+
+
+@admin.register(UserBorrowingStats)
+class UserBorrowingStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        "user",
+        "active_count",
+        "overdue_count",
+        "outstanding_fines",
+        "total_paid",
+        "refreshed_at"
+    )
+    list_select_related = ("user",)
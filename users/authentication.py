@@ -0,0 +1,114 @@
+"""
+JWT authentication with the verified tokens and the users cached.
+
+`JWTAuthentication` verifies the token and loads the user row on
+every request. Here the claims of a verified token are cached under
+a digest of the token, until the token expires at the latest, and
+the user under its id as a snapshot of the fields the requests read:
+`id`, `email`, `is_staff` and `is_active`. The user is rebuilt from
+the snapshot with its other fields deferred, so reading one of them
+loads it from the database; the views editing the user load the
+full row. A snapshot is dropped whenever its user is saved or
+deleted, e.g. on a password change.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from books.cache import now_and_on_commit
+
+SNAPSHOT_FIELDS = ("id", "email", "is_staff", "is_active")
+
+
+def token_key(raw_token) -> str:
+    return f"users:token:{hashlib.sha256(raw_token).hexdigest()}"
+
+
+def user_key(user_id) -> str:
+    return f"users:user:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    now_and_on_commit(lambda: cache.delete(user_key(user_id)))
+
+
+def user_snapshot(user) -> dict:
+    return {name: getattr(user, name) for name in SNAPSHOT_FIELDS}
+
+
+def user_from_snapshot(snapshot):
+    """The user with the fields missing from the snapshot deferred."""
+    User = get_user_model()
+    fields = [
+        field.attname
+        for field in User._meta.concrete_fields
+        if field.attname in snapshot
+    ]
+    return User.from_db(
+        router.db_for_read(User),
+        fields,
+        [snapshot[name] for name in fields]
+    )
+
+
+def cached_token(token_class, raw_token, payload):
+    """A token of the class wrapping claims verified before."""
+    token = token_class.__new__(token_class)
+    token.token = raw_token
+    token.current_time = aware_utcnow()
+    token.payload = payload
+    return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_validated_token(self, raw_token):
+        key = token_key(raw_token)
+        cached = cache.get(key)
+        if cached is not None:
+            class_index, payload = cached
+            if payload["exp"] > time.time():
+                return cached_token(
+                    api_settings.AUTH_TOKEN_CLASSES[class_index],
+                    raw_token,
+                    payload
+                )
+
+        token = super().get_validated_token(raw_token)
+        timeout = min(
+            settings.USER_AUTH_CACHE_TIMEOUT,
+            token["exp"] - time.time()
+        )
+        if timeout > 0:
+            cache.set(
+                key,
+                (
+                    api_settings.AUTH_TOKEN_CLASSES.index(type(token)),
+                    token.payload
+                ),
+                timeout
+            )
+        return token
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        snapshot = (
+            cache.get(user_key(user_id)) if user_id is not None else None
+        )
+        if snapshot is not None:
+            return user_from_snapshot(snapshot)
+
+        # Only active users are cached: inactive ones are rejected.
+        user = super().get_user(validated_token)
+        cache.set(
+            user_key(user_id),
+            user_snapshot(user),
+            settings.USER_AUTH_CACHE_TIMEOUT
+        )
+        return user
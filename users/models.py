@@ -1,8 +1,12 @@
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext as _
 
+from users.authentication import invalidate_cached_user
+
 
 class UserManager(BaseUserManager):
     """Define a model manager for User model with no username field."""
@@ -46,3 +50,49 @@ class User(AbstractUser):
     REQUIRED_FIELDS = []
 
     objects = UserManager()
+
+
+class UserBorrowingStats(models.Model):
+    """
+    Borrowing summary of a user, kept by `users.stats`: refreshed
+    when a borrowing or a payment of the user is saved, and rebuilt
+    for everybody by the `rebuild_user_borrowing_stats` task, which
+    also moves borrowings into the overdue count as days pass.
+    """
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name="borrowing_stats",
+        on_delete=models.CASCADE
+    )
+    active_count = models.PositiveIntegerField(default=0)
+    overdue_count = models.PositiveIntegerField(default=0)
+    # The fines accrued by the overdue borrowings up to `as_of`.
+    outstanding_fines = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0
+    )
+    total_paid = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0
+    )
+    as_of = models.DateField()
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "user borrowing stats"
+
+    def __str__(self):
+        return f"Borrowing stats of user #{self.user_id}"
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_authenticated_user(sender, instance, **kwargs):
+    """
+    Drop the snapshot cached by `users.authentication`, e.g.
+    after a profile update or a password change.
+    """
+    invalidate_cached_user(instance.id)
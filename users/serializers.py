@@ -2,7 +2,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 
-from users.models import User
+from users.models import User, UserBorrowingStats
 
 
 class CreateUserSerializer(serializers.ModelSerializer):
@@ -53,6 +53,21 @@ class UpdateUserSerializer(serializers.ModelSerializer):
         read_only_fields = ("is_staff",)
 
 
+class UserBorrowingStatsSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = UserBorrowingStats
+        fields = (
+            "user",
+            "active_count",
+            "overdue_count",
+            "outstanding_fines",
+            "total_paid",
+            "as_of",
+            "refreshed_at"
+        )
+
+
 class ChangePasswordSerializer(serializers.ModelSerializer):
     password = serializers.CharField(
         write_only=True,
@@ -81,8 +96,7 @@ class ChangePasswordSerializer(serializers.ModelSerializer):
         return attrs
 
     def validate_old_password(self, value):
-        user = self.context["request"].user
-        if not user.check_password(value):
+        if not self.instance.check_password(value):
             raise serializers.ValidationError(
                 {"old_password": "Old password is not correct"}
             )
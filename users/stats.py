@@ -0,0 +1,178 @@
+"""
+Materialised borrowing stats of users.
+
+A user's row in UserBorrowingStats is recomputed from their
+borrowings and payments once the transaction that saved one of them
+commits; the users of all the writes of a transaction are refreshed
+together, once. Overdue counts and fines change as days pass without any
+write, so `rebuild_stats` recomputes every row chunk by chunk, with
+a couple of grouped queries and one upsert per chunk.
+"""
+import threading
+from datetime import date
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+STATS_FIELDS = (
+    "active_count",
+    "overdue_count",
+    "outstanding_fines",
+    "total_paid",
+    "as_of",
+    "refreshed_at",
+)
+
+# The (user ids, borrowing ids) to refresh when
+# the transaction of the thread's connection commits.
+_pending = threading.local()
+
+
+def compute_stats(user_ids, as_of=None) -> list:
+    """Return unsaved UserBorrowingStats of the users."""
+    Borrowing = apps.get_model("borrowings", "Borrowing")
+    Payment = apps.get_model("payments", "Payment")
+    UserBorrowingStats = apps.get_model("users", "UserBorrowingStats")
+    as_of = as_of or date.today()
+    now = timezone.now()
+
+    borrowings = {
+        row["user_id"]: row
+        for row in Borrowing.is_active.filter(
+            user_id__in=user_ids
+        ).with_prices(
+            as_of=as_of
+        ).order_by().values(
+            "user_id"
+        ).annotate(
+            active=Count("id"),
+            overdue=Count("id", filter=Q(expected_return_date__lt=as_of)),
+            fines=Sum("fine_price"),
+        )
+    }
+    paid = dict(
+        Payment.objects.filter(
+            borrowing__user_id__in=user_ids,
+            status=Payment.Status.PAID
+        ).order_by().values_list(
+            "borrowing__user_id"
+        ).annotate(
+            total=Sum("money_to_pay")
+        )
+    )
+
+    stats = []
+    for user_id in user_ids:
+        row = borrowings.get(user_id, {})
+        stats.append(
+            UserBorrowingStats(
+                user_id=user_id,
+                active_count=row.get("active", 0),
+                overdue_count=row.get("overdue", 0),
+                outstanding_fines=row.get("fines") or 0,
+                total_paid=paid.get(user_id) or 0,
+                as_of=as_of,
+                refreshed_at=now
+            )
+        )
+    return stats
+
+
+def store_stats(user_ids, as_of=None) -> list:
+    """Recompute and store the stats of the existing users."""
+    UserBorrowingStats = apps.get_model("users", "UserBorrowingStats")
+    return UserBorrowingStats.objects.bulk_create(
+        compute_stats(user_ids, as_of),
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=STATS_FIELDS
+    )
+
+
+def refresh_stats(user_ids, as_of=None) -> list:
+    """
+    Recompute and store the stats of the users, skipping the users
+    deleted by the time a refresh after a commit runs.
+    """
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    return store_stats(
+        list(
+            User.objects.filter(
+                id__in=user_ids
+            ).values_list(
+                "id", flat=True
+            )
+        ),
+        as_of
+    )
+
+
+def refresh_stats_on_commit(*user_ids, borrowing_ids=()):
+    """
+    Refresh the stats of the users, and of the borrowers of the
+    borrowings, once the transaction commits.
+    """
+    pending = getattr(_pending, "stats", None)
+    if pending is None:
+        pending = _pending.stats = (set(), set())
+    pending[0].update(user_ids)
+    pending[1].update(borrowing_ids)
+    # Registered by every write, as a savepoint rollback drops
+    # the callbacks registered in it; the first one to run
+    # refreshes everything, the others find nothing left.
+    transaction.on_commit(refresh_pending_stats)
+
+
+def refresh_pending_stats():
+    pending = getattr(_pending, "stats", None)
+    _pending.stats = None
+    if pending is None:
+        return
+    user_ids, borrowing_ids = pending
+    if borrowing_ids:
+        Borrowing = apps.get_model("borrowings", "Borrowing")
+        user_ids.update(
+            Borrowing.objects.filter(
+                id__in=borrowing_ids
+            ).values_list(
+                "user_id", flat=True
+            )
+        )
+    if user_ids:
+        refresh_stats(user_ids)
+
+
+def get_stats(user_id):
+    """The stored stats of the user, computed on the first request."""
+    UserBorrowingStats = apps.get_model("users", "UserBorrowingStats")
+    stats = UserBorrowingStats.objects.filter(user_id=user_id).first()
+    if stats is None:
+        stats = next(iter(refresh_stats([user_id])), None)
+    return stats
+
+
+def rebuild_stats(chunk_size=None, as_of=None) -> int:
+    """Recompute the stats of every user; return how many."""
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    chunk_size = chunk_size or settings.USER_STATS_CHUNK_SIZE
+    rebuilt = 0
+    last_id = 0
+    while True:
+        user_ids = list(
+            User.objects.filter(
+                id__gt=last_id
+            ).order_by(
+                "id"
+            ).values_list(
+                "id", flat=True
+            )[:chunk_size]
+        )
+        if not user_ids:
+            return rebuilt
+        with transaction.atomic():
+            store_stats(user_ids, as_of)
+        rebuilt += len(user_ids)
+        last_id = user_ids[-1]
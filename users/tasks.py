@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from users.stats import rebuild_stats
+
+
+@shared_task
+def rebuild_user_borrowing_stats():
+    return rebuild_stats()
@@ -0,0 +1,131 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken
+)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import CachedJWTAuthentication, token_key
+from users.tests.test_users_api import sample_user
+
+User = get_user_model()
+USER_PROFILE_URL = reverse("users:manage")
+CHANGE_PASSWORD_URL = reverse("users:change_password")
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(**sample_user())
+        self.token = str(AccessToken.for_user(self.user))
+
+    def tearDown(self):
+        cache.clear()
+
+    def authenticate(self, token=None):
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {token or self.token}"
+        )
+        return CachedJWTAuthentication().authenticate(request)
+
+    def test_user_is_loaded_once(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(user.email, self.user.email)
+        self.assertFalse(user.is_staff)
+        self.assertEqual(token["user_id"], self.user.id)
+
+    def test_other_fields_are_loaded_when_read(self):
+        self.authenticate()
+        user, _ = self.authenticate()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.first_name, self.user.first_name)
+
+    def test_saved_user_is_loaded_again(self):
+        self.authenticate()
+        self.user.is_staff = True
+        self.user.save()
+
+        user, _ = self.authenticate()
+
+        self.assertTrue(user.is_staff)
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_tampered_token_is_verified(self):
+        self.authenticate()
+        header, payload, signature = self.token.split(".")
+
+        with self.assertRaises(InvalidToken):
+            self.authenticate(f"{header}.{payload}.{signature[::-1]}")
+
+    def test_expired_cached_token_is_verified_again(self):
+        token = AccessToken.for_user(self.user)
+        token.set_exp(lifetime=-datetime.timedelta(seconds=1))
+        cache.set(token_key(str(token).encode()), (0, token.payload))
+
+        with self.assertRaises(InvalidToken):
+            self.authenticate(str(token))
+
+
+class CachedUserViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(**sample_user())
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        # Caches the snapshot of the user.
+        self.client.get(USER_PROFILE_URL)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_profile_is_read_from_the_full_user(self):
+        response = self.client.get(USER_PROFILE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["first_name"], "John")
+        self.assertEqual(response.data["last_name"], "Doe")
+
+    def test_profile_update_is_seen_by_the_next_request(self):
+        self.client.patch(USER_PROFILE_URL, {"email": "new@example.com"})
+
+        response = self.client.get(USER_PROFILE_URL)
+
+        self.assertEqual(response.data["email"], "new@example.com")
+
+    def test_password_change(self):
+        response = self.client.put(
+            CHANGE_PASSWORD_URL,
+            {
+                "old_password": sample_user()["password"],
+                "password": "a-new-Passw0rd",
+                "password2": "a-new-Passw0rd",
+            }
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["message"], "Password changed")
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("a-new-Passw0rd"))
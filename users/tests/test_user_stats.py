@@ -0,0 +1,218 @@
+import datetime
+from _decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.models import Book
+from borrowings.models import Borrowing
+from borrowings.tests.test_create_list_return_borrowings_api import (
+    sample_book
+)
+from payments.models import Payment
+from users.models import UserBorrowingStats
+from users.stats import rebuild_stats, refresh_stats
+from users.tests.test_users_api import sample_user
+
+User = get_user_model()
+MY_STATS_URL = reverse("users:manage-stats")
+BORROWING_LIST_URL = reverse("borrowings:borrowing-list")
+TODAY = datetime.date.today()
+
+
+def user_stats_url(user_id):
+    return reverse("users:user-stats", args=[user_id])
+
+
+class UserBorrowingStatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(**sample_user())
+        self.book = Book.objects.create(**sample_book())
+
+    def borrow(self, days, user=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Borrowing.objects.create(
+                book=self.book,
+                user=user or self.user,
+                expected_return_date=TODAY + datetime.timedelta(days=days)
+            )
+
+    def pay(self, borrowing, amount):
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(
+                status=Payment.Status.PAID,
+                type=Payment.Type.PAYMENT,
+                borrowing=borrowing,
+                session_url="https://checkout.stripe.com/paid",
+                session_id=f"cs_{borrowing.id}",
+                money_to_pay=amount
+            )
+
+    def stats(self, user=None):
+        return UserBorrowingStats.objects.get(user=user or self.user)
+
+    def test_stats_follow_borrowings_and_payments(self):
+        borrowing = self.borrow(days=5)
+        overdue = self.borrow(days=-3)
+        self.pay(borrowing, Decimal("11.94"))
+
+        stats = self.stats()
+
+        self.assertEqual(stats.active_count, 2)
+        self.assertEqual(stats.overdue_count, 1)
+        self.assertEqual(
+            stats.outstanding_fines,
+            overdue.calculate_fine_price()
+        )
+        self.assertEqual(stats.total_paid, Decimal("11.94"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            overdue.make_today_actual_return_date()
+
+        stats = self.stats()
+        self.assertEqual(stats.active_count, 1)
+        self.assertEqual(stats.overdue_count, 0)
+        self.assertEqual(stats.outstanding_fines, Decimal("0.00"))
+
+    def test_payment_status_change_updates_stats(self):
+        borrowing = self.borrow(days=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = Payment.objects.create(
+                status=Payment.Status.PENDING,
+                type=Payment.Type.PAYMENT,
+                borrowing=borrowing,
+                session_url="https://checkout.stripe.com/pending",
+                session_id="cs_pending",
+                money_to_pay=Decimal("11.94")
+            )
+        self.assertEqual(self.stats().total_paid, Decimal("0.00"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.change_payment_status_to_paid()
+
+        self.assertEqual(self.stats().total_paid, Decimal("11.94"))
+
+    def test_payment_save_does_not_read_the_borrowing(self):
+        borrowing = self.borrow(days=5)
+        payment = Payment.objects.create(
+            status=Payment.Status.PENDING,
+            type=Payment.Type.PAYMENT,
+            borrowing_id=borrowing.id,
+            session_url="https://checkout.stripe.com/pending",
+            session_id="cs_pending",
+            money_to_pay=Decimal("11.94")
+        )
+        payment = Payment.objects.get(id=payment.id)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertNumQueries(1):
+                payment.change_payment_status_to_paid()
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(self.stats().total_paid, Decimal("11.94"))
+
+    @override_settings(PAYMENT_GATEWAY="fake")
+    def test_stats_are_refreshed_once_per_transaction(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        with patch(
+                "users.stats.refresh_stats", wraps=refresh_stats
+        ) as refresh, self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                BORROWING_LIST_URL,
+                {
+                    "book": self.book.id,
+                    "expected_return_date": TODAY + datetime.timedelta(
+                        days=3
+                    ),
+                }
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        refresh.assert_called_once()
+        self.assertEqual(self.stats().active_count, 1)
+
+    def test_rebuild_counts_newly_overdue_borrowings(self):
+        users = [self.user] + [
+            User.objects.create_user(
+                **sample_user(email=f"user-{index}@example.com")
+            )
+            for index in range(4)
+        ]
+        for user in users:
+            self.borrow(days=2, user=user)
+        self.assertEqual(self.stats().overdue_count, 0)
+
+        as_of = TODAY + datetime.timedelta(days=4)
+        # Per chunk: the user IDs, then the two aggregates and the
+        # upsert in a savepoint; and the last, empty chunk.
+        with self.assertNumQueries(3 * 6 + 1):
+            rebuilt = rebuild_stats(chunk_size=2, as_of=as_of)
+
+        self.assertEqual(rebuilt, 5)
+        for user in users:
+            stats = self.stats(user)
+            self.assertEqual(stats.overdue_count, 1)
+            self.assertEqual(stats.as_of, as_of)
+
+    def test_refresh_of_a_deleted_user_is_skipped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.borrow(days=2)
+            self.user.delete()
+
+        self.assertFalse(UserBorrowingStats.objects.exists())
+
+
+class UserBorrowingStatsApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(**sample_user())
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Borrowing.objects.create(
+                book=Book.objects.create(**sample_book()),
+                user=self.user,
+                expected_return_date=TODAY + datetime.timedelta(days=2)
+            )
+
+    def test_my_stats_are_read_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(MY_STATS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["user"], self.user.id)
+        self.assertEqual(response.data["active_count"], 1)
+
+    def test_missing_stats_are_computed(self):
+        UserBorrowingStats.objects.all().delete()
+
+        response = self.client.get(MY_STATS_URL)
+
+        self.assertEqual(response.data["active_count"], 1)
+
+    def test_stats_of_a_user_are_staff_only(self):
+        response = self.client.get(user_stats_url(self.user.id))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_staff_reads_stats_of_a_user(self):
+        self.client.force_authenticate(
+            user=User.objects.create_superuser(
+                **sample_user(email="admin@example.com")
+            )
+        )
+
+        response = self.client.get(user_stats_url(self.user.id))
+        missing = self.client.get(user_stats_url(self.user.id + 100))
+
+        self.assertEqual(response.data["active_count"], 1)
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
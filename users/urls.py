@@ -6,7 +6,9 @@ from rest_framework_simplejwt.views import (
 from users.views import (
     UserViewSet,
     ManageUserView,
-    ChangePasswordView
+    ChangePasswordView,
+    ManageUserBorrowingStatsView,
+    UserBorrowingStatsView
 )
 
 
@@ -14,6 +16,16 @@ urlpatterns = [
     path("", UserViewSet.as_view(), name="user-create"),
     path("me/", ManageUserView.as_view(), name="manage"),
     path("me/change_password/", ChangePasswordView.as_view(), name="change_password"),
+    path(
+        "me/stats/",
+        ManageUserBorrowingStatsView.as_view(),
+        name="manage-stats"
+    ),
+    path(
+        "<int:pk>/stats/",
+        UserBorrowingStatsView.as_view(),
+        name="user-stats"
+    ),
     path("token/", TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path("token/refresh/", TokenRefreshView.as_view(), name='token_refresh'),
 ]
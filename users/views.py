@@ -1,13 +1,17 @@
 from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.utils.functional import cached_property
 from rest_framework import generics
 from rest_framework.generics import CreateAPIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 
 from users.serializers import (
     CreateUserSerializer,
     UpdateUserSerializer,
     ChangePasswordSerializer,
+    UserBorrowingStatsSerializer,
 )
+from users.stats import get_stats
 
 
 class UserViewSet(
@@ -17,24 +21,56 @@ class UserViewSet(
     serializer_class = CreateUserSerializer
 
 
+class FullUserMixin:
+    """
+    The authenticated user is a cached snapshot of a few fields,
+    see `users.authentication`; the views editing the user load
+    the full row, once per request.
+    """
+
+    @cached_property
+    def full_user(self):
+        return get_user_model().objects.get(pk=self.request.user.pk)
+
+    def get_object(self):
+        return self.full_user
+
+
 class ManageUserView(
+    FullUserMixin,
     generics.RetrieveUpdateAPIView
 ):
     serializer_class = UpdateUserSerializer
     permission_classes = [IsAuthenticated]
 
+
+class UserBorrowingStatsView(generics.RetrieveAPIView):
+    """Borrowing stats of a user, read from the stats table."""
+    serializer_class = UserBorrowingStatsSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_user_id(self):
+        return self.kwargs["pk"]
+
     def get_object(self):
-        return self.request.user
+        stats = get_stats(self.get_user_id())
+        if stats is None:
+            raise Http404
+        return stats
+
+
+class ManageUserBorrowingStatsView(UserBorrowingStatsView):
+    permission_classes = [IsAuthenticated]
 
+    def get_user_id(self):
+        return self.request.user.id
 
-class ChangePasswordView(generics.UpdateAPIView):
+
+class ChangePasswordView(FullUserMixin, generics.UpdateAPIView):
     queryset = get_user_model().objects.all()
     permission_classes = (IsAuthenticated,)
     serializer_class = ChangePasswordSerializer
 
-    def get_object(self):
-        return self.request.user
-
     def put(self, request, *args, **kwargs):
         response = super().put(request, *args, **kwargs)
         user = self.get_object()